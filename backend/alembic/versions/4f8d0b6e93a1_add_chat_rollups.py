@@ -0,0 +1,48 @@
+"""add_chat_rollups
+
+Revision ID: 4f8d0b6e93a1
+Revises: e5c2a7d19b34
+Create Date: 2026-10-19 12:25:41.093817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8d0b6e93a1'
+down_revision: Union[str, Sequence[str], None] = 'e5c2a7d19b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('system_type', postgresql.ENUM('GENERAL_LLM', 'DOMAIN_SPECIFIC_ML', name='aisystemtype', create_type=False), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=True),
+    sa.Column('token_count', sa.BigInteger(), nullable=True),
+    sa.Column('cost', sa.Numeric(precision=14, scale=6), nullable=True),
+    sa.Column('latency_sketch', sa.JSON(), nullable=True),
+    sa.Column('first_token_sketch', sa.JSON(), nullable=True),
+    sa.Column('feedback_count', sa.Integer(), nullable=True),
+    sa.Column('feedback_sum', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('day', 'provider', 'system_type')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('processed_until', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks')
+    op.drop_table('chat_rollups')
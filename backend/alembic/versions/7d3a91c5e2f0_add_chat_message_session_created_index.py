@@ -0,0 +1,31 @@
+"""add_chat_message_session_created_index
+
+Revision ID: 7d3a91c5e2f0
+Revises: 42bf1f8744b4
+Create Date: 2026-10-19 09:12:31.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3a91c5e2f0'
+down_revision: Union[str, Sequence[str], None] = '42bf1f8744b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The composite index serves both session lookups and ordered history reads
+    op.create_index('idx_msg_session_created', 'chat_messages', ['session_id', 'created_at'], unique=False)
+    op.drop_index('idx_msg_session', table_name='chat_messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_msg_session', 'chat_messages', ['session_id'], unique=False)
+    op.drop_index('idx_msg_session_created', table_name='chat_messages')
@@ -0,0 +1,112 @@
+"""partition_chat_messages_and_session_transactions
+
+Revision ID: 9a6c3e1d57b8
+Revises: 4f8d0b6e93a1
+Create Date: 2026-10-19 13:34:07.442516
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c3e1d57b8'
+down_revision: Union[str, Sequence[str], None] = '4f8d0b6e93a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = {
+    'chat_messages': {
+        'foreign_keys': [('session_id', 'chat_sessions', 'CASCADE')],
+        'indexes': [('idx_msg_session_created', 'session_id, created_at'), ('idx_msg_created', 'created_at')],
+    },
+    'session_transactions': {
+        'foreign_keys': [('session_id', 'chat_sessions', 'CASCADE'), ('product_id', 'products', None)],
+        'indexes': [('idx_tx_session_created', 'session_id, created_at'), ('idx_tx_created', 'created_at')],
+    },
+}
+
+# Months of partitions created ahead of the current one. Fixed here rather than
+# read from settings so this revision always produces the same schema; the
+# scheduled partition maintenance takes over from PARTITION_PREMAKE_MONTHS and
+# the retention settings afterwards.
+PREMAKE_MONTHS = 3
+
+
+def _month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(table: str, first_month: date, last_month: date) -> None:
+    """The default partition and one `<table>_pYYYYMM` partition per month, on an empty table."""
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    month = first_month
+    while month <= last_month:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month}') TO ('{end}')"
+        )
+        month = end
+
+
+def _add_keys(table: str, primary_key: str) -> None:
+    spec = TABLES[table]
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})")
+    for column, target, ondelete in spec['foreign_keys']:
+        action = f" ON DELETE {ondelete}" if ondelete else ""
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {target} (id){action}"
+        )
+    for name, columns in spec['indexes']:
+        op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    current = _month_start(datetime.utcnow().date())
+
+    for table in TABLES:
+        old = f"{table}_unpartitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        # created_at becomes part of the primary key
+        op.execute(f"UPDATE {old} SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+
+        first = bind.execute(sa.text(f"SELECT min(created_at) FROM {old}")).scalar()
+        _create_partitions(
+            table,
+            _month_start(first.date()) if first else current,
+            _add_months(current, PREMAKE_MONTHS)
+        )
+
+        op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        op.execute(f"DROP TABLE {old}")
+        _add_keys(table, 'id, created_at')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        partitioned = f"{table}_partitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+        op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+        op.execute(f"DROP TABLE {partitioned}")
+        _add_keys(table, 'id')
+    # These indexes were introduced with partitioning
+    op.execute("DROP INDEX idx_tx_session_created")
+    op.execute("DROP INDEX idx_tx_created")
@@ -0,0 +1,28 @@
+"""add_first_token_time_to_chat_messages
+
+Revision ID: b81f4e0c6a27
+Revises: 7d3a91c5e2f0
+Create Date: 2026-10-19 10:02:54.733190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4e0c6a27'
+down_revision: Union[str, Sequence[str], None] = '7d3a91c5e2f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_messages', sa.Column('first_token_time', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_messages', 'first_token_time')
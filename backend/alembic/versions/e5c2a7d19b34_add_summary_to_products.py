@@ -0,0 +1,66 @@
+"""add_summary_to_products
+
+Revision ID: e5c2a7d19b34
+Revises: b81f4e0c6a27
+Create Date: 2026-10-19 11:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c2a7d19b34'
+down_revision: Union[str, Sequence[str], None] = 'b81f4e0c6a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.services.prompt_context.summarize_product as of this
+# revision, so the backfill does not change when the app's format does
+SUMMARY_MAX_TOKENS = 48
+SUMMARY_MAX_TAGS = 4
+
+
+def summarize_product(name, brand, price, stock, tags, description) -> str:
+    parts = [name]
+    if brand:
+        parts.append(f"by {brand}")
+    if price is not None:
+        parts.append(f"${float(price):.2f}")
+    parts.append("in stock" if stock else "out of stock")
+    if tags:
+        parts.append("tags: " + ", ".join(tags[:SUMMARY_MAX_TAGS]))
+    summary = " | ".join(parts)
+
+    if description:
+        remaining = SUMMARY_MAX_TOKENS - len(summary.split())
+        words = description.split()
+        if remaining > 0 and words:
+            snippet = " ".join(words[:remaining])
+            if len(words) > remaining:
+                snippet += "..."
+            summary += f" | {snippet}"
+    return summary
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('summary', sa.String(), nullable=True))
+
+    # Backfill summaries for existing products
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, name, brand, price, stock, tags, description FROM products"
+    )).all()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE products SET summary = :summary WHERE id = :id"),
+            [{"id": row[0], "summary": summarize_product(*row[1:])} for row in rows]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'summary')
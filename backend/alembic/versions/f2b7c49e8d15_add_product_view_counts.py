@@ -0,0 +1,34 @@
+"""add_product_view_counts
+
+Revision ID: f2b7c49e8d15
+Revises: d4e8b2a6c173
+Create Date: 2026-10-19 18:41:07.215634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c49e8d15'
+down_revision: Union[str, Sequence[str], None] = 'd4e8b2a6c173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_view_counts',
+    sa.Column('minute', sa.DateTime(), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('category_id', sa.String(), nullable=True),
+    sa.Column('views', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('minute', 'product_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_view_counts')
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Optional
+from app.core.admission import admission_controller
+from app.core.db import get_db
+from app.core.dependencies import require_admin_token
+from app.models.orm_models import AISystemType
+from app.services.chat_analytics_service import ChatAnalyticsService
+from app.services.single_flight import single_flight
+from app.schemas.analytics import ChatAnalyticsResponse, AdmissionStatsResponse, ChatRollupResponse, CoalescingStatsResponse
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/chat", response_model=ChatAnalyticsResponse, dependencies=[Depends(require_admin_token)])
+async def get_chat_analytics(
+    start_date: Optional[date] = Query(None, description="First day (defaults to 7 days ago)"),
+    end_date: Optional[date] = Query(None, description="Last day (defaults to today)"),
+    provider: Optional[str] = Query(None, description="Filter by LLM provider"),
+    system_type: Optional[AISystemType] = Query(None, description="Filter by AI system type"),
+    granularity: str = Query("day", pattern="^(day|total)$", description="Per-day rows or totals over the range"),
+    db: Session = Depends(get_db)
+):
+    """Latency percentiles, token, cost and feedback aggregates per provider and system type.
+
+    Served from the daily rollups only; figures lag the live data by up to one rollup run.
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=6)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+
+    analytics_service = ChatAnalyticsService(db)
+    rows = analytics_service.get_rollups(
+        start_date, end_date,
+        provider=provider,
+        system_type=system_type,
+        per_day=granularity == "day"
+    )
+    return ChatAnalyticsResponse(
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity,
+        rows=[ChatRollupResponse(**row) for row in rows]
+    )
+
+@router.get("/coalescing", response_model=CoalescingStatsResponse, dependencies=[Depends(require_admin_token)])
+async def get_coalescing_stats(
+    top: int = Query(20, ge=1, le=200, description="Number of keys to list, most coalesced first")
+):
+    """How many catalog reads this worker executed and how many joined an identical in-flight read, per key."""
+    return single_flight.stats(top)
+
+@router.get("/admission", response_model=AdmissionStatsResponse, dependencies=[Depends(require_admin_token)])
+async def get_admission_stats():
+    """This worker's load signals, in-flight requests and admitted/shed counts per route class."""
+    return admission_controller.stats()
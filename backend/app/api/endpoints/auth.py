@@ -12,7 +12,7 @@ from app.models.orm_models import User
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(
+def register(
     user_data: UserRegister,
     db: Session = Depends(get_db)
 ):
@@ -26,7 +26,7 @@ async def register(
     return user
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     user_credentials: UserLogin,
     db: Session = Depends(get_db)
 ):
@@ -49,7 +49,7 @@ async def login(
     }
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
-async def logout(
+def logout(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -59,7 +59,7 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(
+def refresh_token(
     token_data: TokenRefresh,
     db: Session = Depends(get_db)
 ):
@@ -74,14 +74,14 @@ async def refresh_token(
     }
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(
+def get_current_user_info(
     current_user: User = Depends(get_current_user)
 ):
     """Get current user information."""
     return current_user
 
 @router.put("/me", response_model=UserResponse)
-async def update_current_user(
+def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -96,7 +96,7 @@ async def update_current_user(
     return updated_user
 
 @router.delete("/me", status_code=status.HTTP_200_OK)
-async def delete_current_user(
+def delete_current_user(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from app.core.db import get_db
+from typing import Optional, List, Union
+from app.core.db import get_db, get_read_db
+from app.core.dependencies import get_current_user_optional
+from app.models.orm_models import User
 from app.services.category_service import CategoryService
+from app.services.wishlist_service import WishlistService
+from app.services.listing_serializer import dumps, parse_fields, render_page
 from app.schemas.product import (
     CategoryCreate, CategoryUpdate, CategoryResponse, 
-    CategoryListResponse, ProductResponse, ProductListResponse
+    CategoryListResponse, ProductResponse, ProductListResponse, ProductCompactListResponse
 )
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -20,44 +24,35 @@ async def create_category(
     return category_service.create_category(category_data)
 
 @router.get("/", response_model=CategoryListResponse)
-async def get_categories(
+def get_categories(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
     parent_id: Optional[str] = Query(None, description="Filter by parent category ID"),
     search: Optional[str] = Query(None, description="Search in name and description"),
     active_only: bool = Query(True, description="Show only active categories"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get categories with filtering and pagination."""
     category_service = CategoryService(db)
     
     skip = (page - 1) * page_size
-    categories, total = category_service.get_categories(
+    categories, total = category_service.get_category_rows(
         skip=skip,
         limit=page_size,
         parent_id=parent_id,
         search=search,
         active_only=active_only
     )
-    
-    total_pages = (total + page_size - 1) // page_size
-    
-    return CategoryListResponse(
-        categories=categories,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    return render_page("categories", categories, total, page, page_size)
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(
+def get_category(
     category_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a category by ID."""
     category_service = CategoryService(db)
-    return category_service.get_category(category_id)
+    return Response(content=dumps(category_service.get_category_data(category_id)), media_type="application/json")
 
 @router.put("/{category_id}", response_model=CategoryResponse)
 async def update_category(
@@ -78,29 +73,28 @@ async def delete_category(
     category_service = CategoryService(db)
     category_service.delete_category(category_id)
 
-@router.get("/{category_id}/products", response_model=ProductListResponse)
-async def get_category_products(
+@router.get("/{category_id}/products", response_model=Union[ProductListResponse, ProductCompactListResponse])
+def get_category_products(
     category_id: str,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, e.g. `name,price,brand,thumbnail`; `id` is always included"
+    ),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_db)
 ):
     """Get products in a specific category."""
     category_service = CategoryService(db)
     
     skip = (page - 1) * page_size
-    category, products, total = category_service.get_category_with_products(
+    products, total = category_service.get_category_product_rows(
         category_id=category_id,
         skip=skip,
-        limit=page_size
-    )
-    
-    total_pages = (total + page_size - 1) // page_size
-    
-    return ProductListResponse(
-        products=products,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+        limit=page_size,
+        fields=parse_fields(fields)
     )
+    if current_user:
+        products = WishlistService(db).annotate_rows(current_user.id, products)
+    return render_page("products", products, total, page, page_size)
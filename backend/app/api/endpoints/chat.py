@@ -0,0 +1,207 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional, List
+from datetime import datetime
+from app.core.db import get_db
+from app.core.dependencies import get_current_user_optional
+from app.core.security import verify_token
+from app.models.orm_models import User
+from app.services.chat_history_service import ChatHistoryService
+from app.services.chat_stream_service import ChatStreamService
+from app.services.session_transaction_service import SessionTransactionService
+from app.schemas.chat import (
+    ChatSessionCreate, ChatSessionResponse, ChatMessageAppend,
+    ChatMessageResponse, ChatMessagePage, ChatPrompt, ChatCacheStatsResponse,
+    SessionTransactionCreate, SessionTransactionResponse, SessionTransactionPage,
+    LedgerSummaryResponse, LedgerSummaryRow
+)
+import json
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+def _user_id(user: Optional[User]) -> Optional[str]:
+    return user.id if user else None
+
+@router.post("/sessions", response_model=ChatSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_session(
+    session_data: ChatSessionCreate,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Create a new chat session."""
+    chat_service = ChatHistoryService(db)
+    return chat_service.create_session(session_data, user_id=_user_id(current_user))
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
+async def get_session(
+    session_id: str,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Get a chat session by ID."""
+    chat_service = ChatHistoryService(db)
+    return chat_service.get_session(session_id, _user_id(current_user))
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(
+    session_id: str,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Delete a chat session and its history."""
+    chat_service = ChatHistoryService(db)
+    chat_service.delete_session(session_id, _user_id(current_user))
+
+@router.get("/sessions/{session_id}/messages", response_model=ChatMessagePage)
+async def get_messages(
+    session_id: str,
+    before: Optional[str] = Query(None, description="Cursor from a previous page; omit for the latest messages"),
+    limit: int = Query(20, ge=1, le=100, description="Number of messages per page"),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Get conversation history, newest page first."""
+    chat_service = ChatHistoryService(db)
+    chat_session = chat_service.get_session(session_id, _user_id(current_user))
+
+    messages, next_cursor = chat_service.get_messages(chat_session, before=before, limit=limit)
+
+    return ChatMessagePage(
+        messages=messages,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None
+    )
+
+@router.post(
+    "/sessions/{session_id}/messages",
+    response_model=List[ChatMessageResponse],
+    status_code=status.HTTP_201_CREATED
+)
+async def append_messages(
+    session_id: str,
+    message_data: ChatMessageAppend,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Append one or more turns to a chat session. The turns are stored when this returns."""
+    chat_service = ChatHistoryService(db)
+    chat_service.get_session(session_id, _user_id(current_user))
+    return chat_service.append_messages(session_id, message_data.messages, write_behind=False)
+
+@router.get("/sessions/{session_id}/cache-stats", response_model=ChatCacheStatsResponse)
+async def get_cache_stats(
+    session_id: str,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Get response cache hit rate and savings for a chat session."""
+    ChatHistoryService(db).get_session(session_id, _user_id(current_user))
+    from app.services.response_cache import cache_stats
+    return ChatCacheStatsResponse(session_id=session_id, **cache_stats.get(session_id))
+
+@router.post(
+    "/sessions/{session_id}/transactions",
+    response_model=SessionTransactionResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def record_transaction(
+    session_id: str,
+    transaction_data: SessionTransactionCreate,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Record a purchase, refund or other transaction made through a chat session."""
+    ChatHistoryService(db).get_session(session_id, _user_id(current_user))
+    return SessionTransactionService(db).record_transaction(session_id, transaction_data)
+
+@router.get("/sessions/{session_id}/transactions", response_model=SessionTransactionPage)
+async def get_transactions(
+    session_id: str,
+    start: Optional[datetime] = Query(None, description="Range start (defaults to 30 days before end)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (defaults to now)"),
+    before: Optional[str] = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Number of transactions per page"),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Get a session's transactions in a time range, newest first."""
+    ChatHistoryService(db).get_session(session_id, _user_id(current_user))
+    transactions, next_cursor = SessionTransactionService(db).get_transactions(
+        session_id, start=start, end=end, before=before, limit=limit
+    )
+    return SessionTransactionPage(
+        transactions=transactions,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None
+    )
+
+@router.get("/sessions/{session_id}/transactions/summary", response_model=LedgerSummaryResponse)
+async def get_transaction_summary(
+    session_id: str,
+    start: Optional[datetime] = Query(None, description="Range start (defaults to 30 days before end)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (defaults to now)"),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Count and total amount per transaction type and status in a time range."""
+    ChatHistoryService(db).get_session(session_id, _user_id(current_user))
+    start, end, rows = SessionTransactionService(db).summarize(session_id, start=start, end=end)
+    return LedgerSummaryResponse(
+        session_id=session_id,
+        start=start,
+        end=end,
+        rows=[LedgerSummaryRow(**row) for row in rows]
+    )
+
+@router.post("/sessions/{session_id}/stream")
+async def stream_reply(
+    session_id: str,
+    prompt: ChatPrompt,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Stream the assistant's reply as server-sent events."""
+    chat_session = ChatHistoryService(db).get_session(session_id, _user_id(current_user))
+    stream_service = ChatStreamService(db)
+
+    async def event_stream():
+        async for event in stream_service.stream_reply(chat_session, prompt.content):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/sessions/{session_id}/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    session_id: str,
+    token: Optional[str] = Query(None, description="Access token for sessions owned by a user"),
+    db: Session = Depends(get_db)
+):
+    """Stream assistant replies over a WebSocket, one {"content": ...} message per turn."""
+    try:
+        user_id = verify_token(token, "access").get("sub") if token else None
+        chat_session = ChatHistoryService(db).get_session(session_id, user_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    stream_service = ChatStreamService(db)
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            content = str(data.get("content", "")).strip()
+            if not content:
+                await websocket.send_json({"type": "error", "detail": "Message content is required"})
+                continue
+
+            async for event in stream_service.stream_reply(chat_session, content):
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,97 @@
+import sys
+from fastapi import APIRouter, Response
+from app.core.admission import admission_controller
+from app.core.db import MeasuredQueuePool, get_engine, replica_router
+from app.core.metrics import CONTENT_TYPE, registry
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.facet_service import facet_cache
+from app.services.single_flight import single_flight
+from app.services.telemetry_writer import telemetry_writer
+
+router = APIRouter(tags=["metrics"])
+
+# Everything below reads counters the components keep anyway, once per scrape
+
+@registry.register_collector
+def collect_caches():
+    counts = {
+        "catalog_snapshot": (catalog_snapshot.hits, catalog_snapshot.misses),
+        "facets": (facet_cache.hits, facet_cache.misses),
+    }
+    # The response cache loads with the first chat request; until then it has no lookups
+    response_cache = sys.modules.get("app.services.response_cache")
+    if response_cache is not None:
+        counts["chat_responses"] = (response_cache.cache_stats.hits, response_cache.cache_stats.misses)
+    yield "cache_hits_total", "counter", "Cache lookups that were served from the cache.", [
+        ({"cache": cache}, hits) for cache, (hits, _) in counts.items()
+    ]
+    yield "cache_misses_total", "counter", "Cache lookups that fell through to the source.", [
+        ({"cache": cache}, misses) for cache, (_, misses) in counts.items()
+    ]
+    yield "cache_hit_ratio", "gauge", "Hits over lookups since the worker started.", [
+        ({"cache": cache}, hits / (hits + misses) if hits + misses else 0.0)
+        for cache, (hits, misses) in counts.items()
+    ]
+    yield "single_flight_calls_total", "counter", "Coalesced catalog reads, executed or joined.", [
+        ({"outcome": "executed"}, single_flight.executed),
+        ({"outcome": "coalesced"}, single_flight.coalesced),
+    ]
+
+@registry.register_collector
+def collect_pools():
+    pools = [("primary", get_engine().pool)]
+    pools += [
+        (f"replica{index}", replica.engine.pool)
+        for index, replica in enumerate(replica_router.replicas) if replica.engine is not None
+    ]
+    # Only QueuePools report sizes; SQLite's pools do not
+    pools = [(name, pool) for name, pool in pools if hasattr(pool, "checkedout")]
+    yield "db_pool_size", "gauge", "Configured connections kept in the pool.", [
+        ({"pool": name}, pool.size()) for name, pool in pools
+    ]
+    yield "db_pool_checked_out", "gauge", "Connections currently checked out.", [
+        ({"pool": name}, pool.checkedout()) for name, pool in pools
+    ]
+    yield "db_pool_overflow", "gauge", "Connections open beyond the pool size.", [
+        ({"pool": name}, pool.overflow()) for name, pool in pools
+    ]
+    measured = [(name, pool) for name, pool in pools if isinstance(pool, MeasuredQueuePool)]
+    yield "db_pool_checkouts_total", "counter", "Connection checkouts.", [
+        ({"pool": name}, pool.checkouts) for name, pool in measured
+    ]
+    yield "db_pool_wait_seconds_total", "counter", "Time checkouts spent waiting for a connection.", [
+        ({"pool": name}, pool.wait_seconds) for name, pool in measured
+    ]
+    yield "db_replica_healthy", "gauge", "Whether a replica passed its last health check.", [
+        ({"pool": f"replica{index}"}, int(replica.healthy)) for index, replica in enumerate(replica_router.replicas)
+    ]
+
+@registry.register_collector
+def collect_admission():
+    stats = admission_controller.stats()
+    yield "admission_event_loop_lag_seconds", "gauge", "Smoothed event-loop lag seen by admission control.", [
+        ({}, stats["loop_lag_ms"] / 1000)
+    ]
+    yield "admission_pool_wait_seconds", "gauge", "Smoothed mean pool checkout wait seen by admission control.", [
+        ({}, stats["pool_wait_ms"] / 1000)
+    ]
+    yield "admission_admitted_total", "counter", "Requests admitted, by admission class.", [
+        ({"class": name}, counts["admitted"]) for name, counts in stats["classes"].items()
+    ]
+    yield "admission_shed_total", "counter", "Requests rejected with 503, by admission class and reason.", [
+        ({"class": name, "reason": reason}, count)
+        for name, counts in stats["classes"].items() for reason, count in counts["shed"].items()
+    ]
+
+@registry.register_collector
+def collect_telemetry():
+    stats = telemetry_writer.stats()
+    yield "telemetry_pending_rows", "gauge", "Chat telemetry rows waiting to be flushed.", [({}, stats["pending"])]
+    yield "telemetry_rows_total", "counter", "Chat telemetry rows by outcome.", [
+        ({"outcome": outcome}, stats[outcome]) for outcome in ("flushed", "dropped", "failed")
+    ]
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """This worker's metrics in the Prometheus text exposition format."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
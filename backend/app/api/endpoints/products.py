@@ -1,15 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from app.core.db import get_db
+from typing import Optional, List, Union
+from app.core.db import get_db, get_read_db
+from app.core.dependencies import get_current_user_optional, require_admin_token
+from app.models.orm_models import User
 from app.services.product_service import ProductService
+from app.services.wishlist_service import WishlistService
+from app.services.facet_service import FacetService
+from app.services.listing_serializer import dumps, parse_fields, render_page
+from app.services.trending_service import TrendingService, trending_counter
+from app.core.config import settings
 from app.schemas.product import (
     ProductCreate, ProductUpdate, ProductResponse, 
-    ProductListResponse
+    ProductListResponse, ProductCompactListResponse, TrendingProductsResponse,
+    ProductBulkUpdate, ProductBulkUpdateResponse
 )
+from app.schemas.recommendation import SimilarProductsResponse, ScoredProduct
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Read endpoints are plain functions: their queries block, so FastAPI runs them in
+# its threadpool, off the event loop, where identical concurrent reads coalesce
+# (see single_flight)
+
+def _render_products(
+    db: Session,
+    current_user: Optional[User],
+    products: List[dict],
+    total: int,
+    page: int,
+    page_size: int,
+    facets: Optional[dict] = None
+) -> Response:
+    """Encode a page of product rows, flagging wishlist members for a signed-in user."""
+    if current_user:
+        products = WishlistService(db).annotate_rows(current_user.id, products)
+    return render_page("products", products, total, page, page_size, facets)
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
@@ -19,8 +46,8 @@ async def create_product(
     product_service = ProductService(db)
     return product_service.create_product(product_data)
 
-@router.get("/", response_model=ProductListResponse)
-async def get_products(
+@router.get("/", response_model=Union[ProductListResponse, ProductCompactListResponse])
+def get_products(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
     limit: Optional[int] = Query(None, ge=1, le=100, description="Number of items per page"),
@@ -31,41 +58,130 @@ async def get_products(
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
     brand: Optional[str] = Query(None, description="Filter by brand"),
     in_stock_only: bool = Query(False, description="Show only products in stock"),
-    db: Session = Depends(get_db)
+    mode: str = Query(
+        "default",
+        pattern="^(default|hybrid)$",
+        description="hybrid: rank `search` results by combined keyword and semantic relevance"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, e.g. `name,price,brand,thumbnail`; `id` is always included"
+    ),
+    facets: bool = Query(
+        False,
+        description="Also return brand, category, price bucket and stock counts for the current filters; "
+                    "in hybrid mode, for the products the search matched"
+    ),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_db)
 ):
     """Get products with filtering and pagination."""
     product_service = ProductService(db)
+    selected = parse_fields(fields)
     if limit is None:
         limit = page_size
-    products, total = product_service.get_products(
-        skip=skip,
-        limit=limit,
-        category_id=category_id,
-        search=search,
-        min_price=min_price,
-        max_price=max_price,
-        brand=brand,
-        in_stock_only=in_stock_only
-    )
-    
-    total_pages = (total + page_size - 1) // page_size
+    matched_ids = None
+    if mode == "hybrid" and search:
+        matched_ids = product_service.rank_products_hybrid(
+            search=search,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            brand=brand,
+            in_stock_only=in_stock_only
+        )
+        skip = skip or 0
+        products = product_service.get_product_rows_by_ids(matched_ids[skip:skip + limit], selected)
+        total = len(matched_ids)
+    else:
+        products, total = product_service.get_product_rows(
+            skip=skip,
+            limit=limit,
+            category_id=category_id,
+            search=search,
+            min_price=min_price,
+            max_price=max_price,
+            brand=brand,
+            in_stock_only=in_stock_only,
+            fields=selected
+        )
     
-    return ProductListResponse(
-        products=products,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    facet_counts = None
+    if facets:
+        # In hybrid mode, counted over the ranked matches so they agree with `total`
+        facet_counts = FacetService(db).get_facets(
+            category_id=category_id,
+            search=search,
+            min_price=min_price,
+            max_price=max_price,
+            brand=brand,
+            in_stock_only=in_stock_only,
+            product_ids=matched_ids
+        )
+    return _render_products(db, current_user, products, total, page, page_size, facet_counts)
+
+@router.patch("/bulk", response_model=ProductBulkUpdateResponse, dependencies=[Depends(require_admin_token)])
+def bulk_update_products(
+    update_data: ProductBulkUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update price and/or stock of many products in one transaction, with a result per item."""
+    product_service = ProductService(db)
+    result = product_service.bulk_update_products(update_data.items)
+    return Response(content=dumps(result), media_type="application/json")
+
+@router.get("/trending", response_model=TrendingProductsResponse)
+def get_trending_products(
+    category_id: Optional[str] = Query(None, description="Only products in this category"),
+    limit: int = Query(20, ge=1, le=100, description="Number of products"),
+    db: Session = Depends(get_read_db)
+):
+    """Most viewed products over the last `trending_window_minutes`, from in-memory counters."""
+    products = TrendingService(db).get_trending(category_id, limit)
+    body = {
+        "products": products,
+        "category_id": category_id,
+        "window_minutes": settings.trending_window_minutes,
+    }
+    return Response(content=dumps(body), media_type="application/json")
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(
+def get_product(
     product_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a product by ID."""
     product_service = ProductService(db)
-    return product_service.get_product(product_id)
+    product = product_service.get_product_data(product_id)
+    if settings.trending_enabled:
+        trending_counter.record_view(product_id, product.get("category_id"))
+    return Response(content=dumps(product), media_type="application/json")
+
+@router.get("/{product_id}/similar", response_model=SimilarProductsResponse)
+def get_similar_products(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=50, description="Number of similar products"),
+    method: str = Query(
+        "collaborative",
+        pattern="^(collaborative|content)$",
+        description="collaborative: co-interacted by the same users; content: similar text and attributes"
+    ),
+    db: Session = Depends(get_read_db)
+):
+    """Get products similar to a product."""
+    # 404 for an unknown product rather than an empty list; served from the snapshot when mapped
+    ProductService(db).get_product_data(product_id)
+    # The similarity engines pull in numpy/scipy; import them on first use
+    if method == "content":
+        from app.services.content_similarity import ContentSimilarityService
+        items = ContentSimilarityService(db).get_similar_products(product_id, limit)
+    else:
+        from app.services.recommendation_service import RecommendationService
+        items = RecommendationService(db).get_similar_products(product_id, limit)
+    return SimilarProductsResponse(
+        product_id=product_id,
+        items=[ScoredProduct(product_id=item_id, score=score) for item_id, score in items]
+    )
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
@@ -87,55 +203,39 @@ async def delete_product(
     product_service.delete_product(product_id)
 
 @router.get("/category/{category_id}", response_model=ProductListResponse)
-async def get_products_by_category(
+def get_products_by_category(
     category_id: str,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_db)
 ):
     """Get products by category."""
     product_service = ProductService(db)
     
     skip = (page - 1) * page_size
-    products, total = product_service.get_products_by_category(
+    products, total = product_service.get_product_rows(
         category_id=category_id,
         skip=skip,
         limit=page_size
     )
-    
-    total_pages = (total + page_size - 1) // page_size
-    
-    return ProductListResponse(
-        products=products,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    return _render_products(db, current_user, products, total, page, page_size)
 
 @router.get("/search/{search_term}", response_model=ProductListResponse)
-async def search_products(
+def search_products(
     search_term: str,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_db)
 ):
     """Search products by name, description, or brand."""
     product_service = ProductService(db)
     
     skip = (page - 1) * page_size
-    products, total = product_service.search_products(
-        search_term=search_term,
+    products, total = product_service.get_product_rows(
+        search=search_term,
         skip=skip,
         limit=page_size
     )
-    
-    total_pages = (total + page_size - 1) // page_size
-    
-    return ProductListResponse(
-        products=products,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    return _render_products(db, current_user, products, total, page, page_size)
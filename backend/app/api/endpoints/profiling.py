@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import List
+from app.core.dependencies import require_admin_token
+from app.core.profiling import allocation_tracer, request_profiler, sampling_profiler
+from app.schemas.profiling import AllocationSnapshotResponse, RequestCaptureResponse, SamplerStatusResponse
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["profiling"],
+    dependencies=[Depends(require_admin_token)]
+)
+
+# Everything here profiles the worker that serves the call, not the whole deployment
+
+@router.post("/sampler", response_model=SamplerStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_sampler(
+    seconds: float = Query(10, gt=0, description="How long to sample (capped by PROFILING_MAX_SAMPLE_SECONDS)"),
+    interval_ms: float = Query(5, ge=1, le=1000, description="Time between samples")
+):
+    """Sample every thread's stack for a while; fetch the result from /sampler/folded."""
+    if not sampling_profiler.start(seconds, interval_ms):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A sampling run is already in progress"
+        )
+    return sampling_profiler.status()
+
+@router.get("/sampler", response_model=SamplerStatusResponse)
+async def get_sampler_status():
+    """Whether a sampling run is in progress and how many samples the last one took."""
+    return sampling_profiler.status()
+
+@router.delete("/sampler", response_model=SamplerStatusResponse)
+async def stop_sampler():
+    """End the current sampling run early, keeping what it sampled."""
+    sampling_profiler.stop()
+    return sampling_profiler.status()
+
+@router.get("/sampler/folded")
+async def get_sampler_stacks():
+    """The last run's stacks in folded format, for flamegraph.pl, speedscope or inferno."""
+    return Response(sampling_profiler.folded(), media_type="text/plain")
+
+@router.get("/requests", response_model=List[RequestCaptureResponse])
+async def list_request_captures():
+    """Requests profiled with the X-Profile-Token header, newest first."""
+    return request_profiler.list()
+
+@router.get("/requests/{capture_id}")
+async def get_request_capture(
+    capture_id: str,
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$", description="pstats sort key"),
+    limit: int = Query(50, ge=1, le=1000, description="Number of functions to list")
+):
+    """A profiled request's cProfile stats as pstats text."""
+    capture = request_profiler.get(capture_id)
+    if capture is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Capture not found"
+        )
+    return Response(capture.stats(sort, limit), media_type="text/plain")
+
+@router.post("/tracemalloc", status_code=status.HTTP_204_NO_CONTENT)
+async def start_tracemalloc(
+    frames: int = Query(1, ge=1, le=50, description="Frames kept per allocation traceback")
+):
+    """Start tracing allocations. Tracing slows the worker down until it is stopped."""
+    allocation_tracer.start(frames)
+
+@router.delete("/tracemalloc", status_code=status.HTTP_204_NO_CONTENT)
+async def stop_tracemalloc():
+    """Stop tracing allocations and drop the traces."""
+    allocation_tracer.stop()
+
+@router.post("/tracemalloc/snapshot", response_model=AllocationSnapshotResponse)
+async def take_tracemalloc_snapshot(
+    limit: int = Query(25, ge=1, le=500, description="Number of allocation sites to list")
+):
+    """Top allocation sites, and the largest changes since the previous snapshot."""
+    if not allocation_tracer.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Allocation tracing is not running"
+        )
+    return allocation_tracer.snapshot(limit)
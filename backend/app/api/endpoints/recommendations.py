@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.core.db import get_db
+from app.core.dependencies import get_current_user
+from app.models.orm_models import User
+from app.schemas.recommendation import RecommendationResponse, ScoredProduct
+
+router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+
+@router.get("/me", response_model=RecommendationResponse)
+async def get_my_recommendations(
+    limit: int = Query(10, ge=1, le=50, description="Number of recommendations"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get collaborative-filtering recommendations for the current user."""
+    from app.services.recommendation_service import RecommendationService
+    recommendation_service = RecommendationService(db)
+    items, source = recommendation_service.get_user_recommendations(current_user.id, limit)
+    return RecommendationResponse(
+        user_id=current_user.id,
+        source=source,
+        items=[ScoredProduct(product_id=product_id, score=score) for product_id, score in items]
+    )
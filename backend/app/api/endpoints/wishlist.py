@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.core.db import get_db
+from app.core.dependencies import get_current_user
+from app.models.orm_models import User
+from app.services.wishlist_service import WishlistService
+from app.schemas.product import ProductResponse, ProductListResponse
+from app.schemas.wishlist import (
+    WishlistItemStatus, WishlistCheckRequest, WishlistCheckResponse
+)
+
+router = APIRouter(prefix="/wishlist", tags=["wishlist"])
+
+@router.get("/", response_model=ProductListResponse)
+async def get_wishlist(
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get products in the current user's wishlist."""
+    wishlist_service = WishlistService(db)
+
+    skip = (page - 1) * page_size
+    products, total = wishlist_service.get_wishlist(
+        user_id=current_user.id,
+        skip=skip,
+        limit=page_size
+    )
+
+    total_pages = (total + page_size - 1) // page_size
+
+    return ProductListResponse(
+        products=[
+            ProductResponse.model_validate(product).model_copy(update={"in_wishlist": True})
+            for product in products
+        ],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages
+    )
+
+@router.put("/{product_id}", response_model=WishlistItemStatus)
+async def add_to_wishlist(
+    product_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a product to the current user's wishlist (idempotent)."""
+    wishlist_service = WishlistService(db)
+    changed = wishlist_service.add_item(current_user.id, product_id)
+    return WishlistItemStatus(product_id=product_id, in_wishlist=True, changed=changed)
+
+@router.delete("/{product_id}", response_model=WishlistItemStatus)
+async def remove_from_wishlist(
+    product_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a product from the current user's wishlist (idempotent)."""
+    wishlist_service = WishlistService(db)
+    changed = wishlist_service.remove_item(current_user.id, product_id)
+    return WishlistItemStatus(product_id=product_id, in_wishlist=False, changed=changed)
+
+@router.post("/check", response_model=WishlistCheckResponse)
+async def check_wishlist(
+    check_data: WishlistCheckRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Return which of the given products are in the current user's wishlist."""
+    wishlist_service = WishlistService(db)
+    member_ids = wishlist_service.get_member_ids(current_user.id, check_data.product_ids)
+    return WishlistCheckResponse(
+        product_ids=[
+            product_id for product_id in dict.fromkeys(check_data.product_ids)
+            if product_id in member_ids
+        ]
+    )
@@ -0,0 +1,213 @@
+"""
+Admission control and load shedding.
+
+Past capacity a worker that keeps accepting requests only queues them: on
+the event loop, in the threadpool and in front of the database pool, until
+every request is slow. `AdmissionControlMiddleware` instead rejects work it
+cannot serve promptly with 503 and `Retry-After`, so admitted requests keep
+their latency and clients back off.
+
+Requests are sorted into route classes by method and path. Each class has
+its own concurrency limit (`admission_class_limits`) and may only fill a
+share of the worker-wide `admission_max_in_flight`, so the remaining slots
+stay free for higher priorities: checkout and auth may use every slot,
+browse/search only three quarters of them. Two load signals, sampled on
+the event loop every `SAMPLE_INTERVAL_SECONDS`, shed by priority before
+the limits are even reached:
+
+- event-loop lag: how late a timer fires, i.e. how long the loop was busy
+- pool wait: the mean time database checkouts waited for a connection
+
+Past `admission_max_loop_lag_ms` or `admission_max_pool_wait_ms` browse
+requests are rejected; past twice either threshold, everything but
+critical requests. Admission runs on the event loop only, so its counters
+need no lock. It is enabled by `start()` in the application lifespan, and
+websockets and the docs are never shed.
+"""
+import asyncio
+import re
+from typing import Dict, Optional
+import orjson
+from app.core.config import settings
+from app.core.db import MeasuredQueuePool, get_engine
+
+SAMPLE_INTERVAL_SECONDS = 0.1
+# Weight of the newest sample in the smoothed load signals
+SMOOTHING = 0.5
+
+# class -> (priority, share of admission_max_in_flight it may fill)
+ROUTE_CLASSES = {
+    "critical": (2, 1.0),
+    "standard": (1, 0.9),
+    "stream": (1, 0.9),
+    "browse": (0, 0.75),
+}
+
+# First match wins; method None matches any method
+_ROUTE_RULES = [
+    (None, re.compile(r"^/(auth|checkout|orders)(/|$)"), "critical"),
+    ("POST", re.compile(r"^/chat/sessions/[^/]+/transactions$"), "critical"),
+    (None, re.compile(r"^/chat/sessions/[^/]+/stream$"), "stream"),
+    ("GET", re.compile(r"^/(products|categories|recommendations)(/|$)"), "browse"),
+]
+_EXEMPT_PATHS = {"/", "/openapi.json", "/metrics"}
+_EXEMPT_PREFIXES = ("/docs", "/redoc")
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The admission class of a request, or None if it is never shed."""
+    if path in _EXEMPT_PATHS or path.startswith(_EXEMPT_PREFIXES):
+        return None
+    for rule_method, pattern, name in _ROUTE_RULES:
+        if (rule_method is None or rule_method == method) and pattern.match(path):
+            return name
+    return "standard"
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int,
+        class_limits: Dict[str, int],
+        max_loop_lag_ms: float,
+        max_pool_wait_ms: float,
+        retry_after_seconds: int
+    ):
+        unknown = set(class_limits) - set(ROUTE_CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown admission classes: {', '.join(sorted(unknown))}")
+        self.max_in_flight = max_in_flight
+        self.class_limits = {name: class_limits.get(name, max_in_flight) for name in ROUTE_CLASSES}
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.retry_after_seconds = retry_after_seconds
+        self.enabled = False
+        self.total_in_flight = 0
+        self.in_flight = dict.fromkeys(ROUTE_CLASSES, 0)
+        self.admitted = dict.fromkeys(ROUTE_CLASSES, 0)
+        self.shed: Dict[str, Dict[str, int]] = {name: {} for name in ROUTE_CLASSES}
+        self.loop_lag_ms = 0.0
+        self.pool_wait_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._pool_seen = (0, 0.0)
+
+    def start(self):
+        """Begin sampling load signals on the running event loop and enforcing limits."""
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+            lag_ms = max(loop.time() - scheduled - SAMPLE_INTERVAL_SECONDS, 0.0) * 1000
+            self.loop_lag_ms += SMOOTHING * (lag_ms - self.loop_lag_ms)
+            self.pool_wait_ms += SMOOTHING * (self._pool_wait_sample() - self.pool_wait_ms)
+
+    def _pool_wait_sample(self) -> float:
+        """Mean checkout wait in ms since the previous sample; 0 without checkouts."""
+        pool = get_engine().pool
+        if not isinstance(pool, MeasuredQueuePool):
+            return 0.0
+        checkouts, wait_seconds = pool.checkouts, pool.wait_seconds
+        previous_checkouts, previous_wait = self._pool_seen
+        self._pool_seen = (checkouts, wait_seconds)
+        if checkouts <= previous_checkouts:
+            return 0.0
+        return (wait_seconds - previous_wait) / (checkouts - previous_checkouts) * 1000
+
+    def overload_level(self) -> int:
+        """0 normal, 1 over a signal threshold, 2 over twice a threshold."""
+        pressure = max(self.loop_lag_ms / self.max_loop_lag_ms, self.pool_wait_ms / self.max_pool_wait_ms)
+        return 2 if pressure >= 2 else 1 if pressure >= 1 else 0
+
+    def try_admit(self, name: str) -> Optional[str]:
+        """Count the request in and return None, or return why it is shed."""
+        priority, share = ROUTE_CLASSES[name]
+        if self.in_flight[name] >= self.class_limits[name]:
+            reason = "class_limit"
+        elif self.total_in_flight >= self.max_in_flight * share:
+            reason = "worker_limit"
+        elif priority < self.overload_level():
+            reason = "overload"
+        else:
+            self.in_flight[name] += 1
+            self.total_in_flight += 1
+            self.admitted[name] += 1
+            return None
+        self.shed[name][reason] = self.shed[name].get(reason, 0) + 1
+        return reason
+
+    def release(self, name: str):
+        self.in_flight[name] -= 1
+        self.total_in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.total_in_flight,
+            "loop_lag_ms": round(self.loop_lag_ms, 3),
+            "pool_wait_ms": round(self.pool_wait_ms, 3),
+            "overload_level": self.overload_level(),
+            "classes": {
+                name: {
+                    "in_flight": self.in_flight[name],
+                    "limit": self.class_limits[name],
+                    "admitted": self.admitted[name],
+                    "shed": dict(self.shed[name]),
+                }
+                for name in ROUTE_CLASSES
+            },
+        }
+
+
+admission_controller = AdmissionController(
+    max_in_flight=settings.admission_max_in_flight,
+    class_limits=settings.admission_class_limits,
+    max_loop_lag_ms=settings.admission_max_loop_lag_ms,
+    max_pool_wait_ms=settings.admission_max_pool_wait_ms,
+    retry_after_seconds=settings.admission_retry_after_seconds
+)
+
+
+class AdmissionControlMiddleware:
+    """Reject requests over their class's limits with 503 before they queue."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        controller = admission_controller
+        if scope["type"] != "http" or not controller.enabled:
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = controller.try_admit(name)
+        if reason is not None:
+            body = orjson.dumps({"detail": "Server is overloaded, retry later", "reason": reason})
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(controller.retry_after_seconds).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(name)
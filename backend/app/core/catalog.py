@@ -0,0 +1,118 @@
+"""
+Catalog version tracking and change notifications.
+
+Every committed product or category write is published here. Publishing bumps
+the catalog version, so that caches holding catalog-derived data (prices,
+stock, names) can tell when an entry was computed against an older catalog,
+and calls the registered listeners so in-memory indexes can update the
+changed entity instead of rebuilding.
+
+Writes made by other workers arrive through the invalidation bus
+(`app.core.invalidation`), which republishes them here with `remote=True`.
+
+Indexes whose product documents embed the category name re-index a
+category's products when it is renamed; `CategoryRenames` tells renames
+from other category writes and runs those reloads on its own thread, since
+listeners are called on the request that made the write.
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_version = 0
+_lock = threading.Lock()
+_listeners: List[Tuple[Callable[[str, str, Optional[Any]], None], str]] = []
+
+ORIGINS = ("any", "local", "remote")
+
+
+def get_catalog_version() -> int:
+    """Get the current catalog version."""
+    return _version
+
+
+def bump_catalog_version() -> int:
+    """Mark the catalog as changed and return the new version."""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def subscribe(listener: Callable[[str, str, Optional[Any]], None], origin: str = "any"):
+    """Register a listener called as listener(kind, entity_id, entity).
+
+    `kind` is "product" or "category"; `entity` is the committed ORM object,
+    or None when it was deleted. `origin` narrows the listener to writes made
+    by this process ("local") or by other workers ("remote").
+    """
+    if origin not in ORIGINS:
+        raise ValueError(f"Unknown origin: {origin}")
+    _listeners.append((listener, origin))
+
+
+def publish_change(kind: str, entity_id: str, entity: Optional[Any] = None, remote: bool = False) -> int:
+    """Publish a committed catalog write. Returns the new catalog version."""
+    return publish_changes(kind, {entity_id: entity}, remote=remote)
+
+
+def publish_changes(kind: str, entities: Dict[str, Optional[Any]], remote: bool = False) -> int:
+    """Publish a batch of committed writes to one kind, bumping the version once. Returns the new version.
+
+    `entities` maps each entity ID to its committed ORM object, or None if it was deleted.
+    """
+    version = bump_catalog_version()
+    skip = "local" if remote else "remote"
+    for listener, origin in _listeners:
+        if origin == skip:
+            continue
+        for entity_id, entity in entities.items():
+            try:
+                listener(kind, entity_id, entity)
+            except Exception:
+                # A broken index must not fail the write that already committed
+                logger.exception("Catalog listener failed for %s %s", kind, entity_id)
+    return version
+
+
+class CategoryRenames:
+    """Category names as an index last saw them; `reindex(category_id)` runs after each rename.
+
+    Re-indexes run one at a time on a daemon thread, in the order the renames
+    were published, so the last reload reads the latest name.
+    """
+
+    def __init__(self, reindex: Callable[[str], None], name: str):
+        self._reindex = reindex
+        self._thread_name = name
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def reset(self, names: Dict[str, str]):
+        """Record the names an index was just built with."""
+        with self._lock:
+            self._names = dict(names)
+
+    def changed(self, category_id: str, name: str):
+        """Note a committed category write, queueing a re-index if it renamed the category."""
+        with self._lock:
+            if self._names.get(category_id) == name:
+                return
+            self._names[category_id] = name
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._thread_name, daemon=True)
+                self._thread.start()
+        self._queue.put(category_id)
+
+    def _run(self):
+        while True:
+            category_id = self._queue.get()
+            try:
+                self._reindex(category_id)
+            except Exception:
+                logger.exception("Re-indexing renamed category %s failed", category_id)
@@ -11,6 +11,12 @@ class Settings:
     def __init__(self):
         # Database configuration
         self.database_url: str = self._get_database_url()
+        self.database_replica_urls: list = [
+            url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+        ]
+        self.replica_max_lag_seconds: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+        self.replica_health_check_interval_seconds: float = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL_SECONDS", "10"))
+        self.replica_read_delay_seconds: float = float(os.getenv("REPLICA_READ_DELAY_SECONDS", "5"))
         
         # Application settings
         self.app_name: str = "AI E-commerce Backend"
@@ -22,6 +28,119 @@ class Settings:
         self.jwt_access_token_expire_minutes: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
         self.jwt_refresh_token_expire_days: int = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", "7"))
         
+        # Chat settings
+        self.chat_recent_messages: int = int(os.getenv("CHAT_RECENT_MESSAGES", "20"))
+        self.chat_recent_sessions: int = int(os.getenv("CHAT_RECENT_SESSIONS", "1000"))
+        self.chat_context_products: int = int(os.getenv("CHAT_CONTEXT_PRODUCTS", "5"))
+        self.chat_context_max_tokens: int = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "300"))
+        
+        # LLM settings
+        self.llm_provider: str = os.getenv("LLM_PROVIDER", "fake")
+        self.fake_llm_token_delay_ms: int = int(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "0"))
+        
+        # Embedding settings
+        self.embedding_model: str = os.getenv("EMBEDDING_MODEL", "hashing")
+        self.embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "256"))
+        
+        # Intent router settings
+        self.intent_router_enabled: bool = os.getenv("INTENT_ROUTER_ENABLED", "True").lower() == "true"
+        self.intent_router_max_results: int = int(os.getenv("INTENT_ROUTER_MAX_RESULTS", "5"))
+        
+        # Assistant response cache settings
+        self.response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+        self.response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+        self.response_cache_ttl_seconds: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+        self.response_cache_similarity: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.9"))
+        
+        # Recommendation settings
+        self.recommendation_artifact_dir: str = os.getenv("RECOMMENDATION_ARTIFACT_DIR", "artifacts/recommendations")
+        self.recommendation_top_k: int = int(os.getenv("RECOMMENDATION_TOP_K", "20"))
+        self.preload_recommendations: bool = os.getenv("PRELOAD_RECOMMENDATIONS", "True").lower() == "true"
+        
+        # Hybrid search settings
+        self.hybrid_search_alpha: float = float(os.getenv("HYBRID_SEARCH_ALPHA", "0.5"))
+        self.hybrid_search_min_similarity: float = float(os.getenv("HYBRID_SEARCH_MIN_SIMILARITY", "0.3"))
+        self.hybrid_search_candidates: int = int(os.getenv("HYBRID_SEARCH_CANDIDATES", "200"))
+        self.hybrid_search_nprobe: int = int(os.getenv("HYBRID_SEARCH_NPROBE", "8"))
+        
+        # Catalog snapshot settings
+        self.catalog_snapshot_enabled: bool = os.getenv("CATALOG_SNAPSHOT_ENABLED", "True").lower() == "true"
+        self.catalog_snapshot_path: str = os.getenv("CATALOG_SNAPSHOT_PATH", "artifacts/catalog/catalog.snap")
+        self.catalog_snapshot_check_interval_ms: int = int(os.getenv("CATALOG_SNAPSHOT_CHECK_INTERVAL_MS", "500"))
+        self.catalog_snapshot_rebuild_delay_ms: int = int(os.getenv("CATALOG_SNAPSHOT_REBUILD_DELAY_MS", "200"))
+        self.catalog_snapshot_max_age_seconds: int = int(os.getenv("CATALOG_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+        
+        # Invalidation bus settings
+        self.invalidation_bus_enabled: bool = os.getenv("INVALIDATION_BUS_ENABLED", "True").lower() == "true"
+        self.invalidation_channel: str = os.getenv("INVALIDATION_CHANNEL", "change_events")
+        self.invalidation_reconnect_delay_seconds: float = float(os.getenv("INVALIDATION_RECONNECT_DELAY_SECONDS", "1"))
+        self.invalidation_retention_hours: int = int(os.getenv("INVALIDATION_RETENTION_HOURS", "24"))
+        
+        # Request coalescing settings
+        self.single_flight_enabled: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "True").lower() == "true"
+        self.single_flight_max_tracked_keys: int = int(os.getenv("SINGLE_FLIGHT_MAX_TRACKED_KEYS", "1000"))
+        
+        # Admission control settings. Limits are per worker and stay under its database
+        # pool (5 + 10 overflow); see benchmarks/admission_load_test.py for how they were
+        # measured. Browse gets a third of the slots, so critical requests always find one
+        self.admission_control_enabled: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"
+        self.admission_max_in_flight: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "12"))
+        self.admission_class_limits: dict = {
+            name.strip(): int(limit)
+            for name, limit in (
+                item.split("=") for item in
+                os.getenv("ADMISSION_CLASS_LIMITS", "critical=12,standard=8,stream=4,browse=4").split(",")
+                if item.strip()
+            )
+        }
+        self.admission_max_loop_lag_ms: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "100"))
+        self.admission_max_pool_wait_ms: float = float(os.getenv("ADMISSION_MAX_POOL_WAIT_MS", "50"))
+        self.admission_retry_after_seconds: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+        
+        # Metrics settings
+        self.metrics_enabled: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+        
+        # Profiling settings; the surface is only mounted when enabled and an admin token is set
+        self.admin_token: str = os.getenv("ADMIN_TOKEN", "")
+        self.profiling_enabled: bool = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+        self.profiling_max_captures: int = int(os.getenv("PROFILING_MAX_CAPTURES", "20"))
+        self.profiling_max_sample_seconds: int = int(os.getenv("PROFILING_MAX_SAMPLE_SECONDS", "120"))
+        
+        # Bulk update settings
+        self.bulk_update_max_items: int = int(os.getenv("BULK_UPDATE_MAX_ITEMS", "5000"))
+        
+        # Trending settings
+        self.trending_enabled: bool = os.getenv("TRENDING_ENABLED", "True").lower() == "true"
+        self.trending_window_minutes: int = int(os.getenv("TRENDING_WINDOW_MINUTES", "60"))
+        self.trending_top_k: int = int(os.getenv("TRENDING_TOP_K", "50"))
+        self.trending_refresh_seconds: float = float(os.getenv("TRENDING_REFRESH_SECONDS", "5"))
+        self.trending_flush_interval_seconds: float = float(os.getenv("TRENDING_FLUSH_INTERVAL_SECONDS", "30"))
+        self.trending_retention_hours: int = int(os.getenv("TRENDING_RETENTION_HOURS", "48"))
+        
+        # Facet settings
+        self.facet_price_buckets: list = [
+            int(edge) for edge in os.getenv("FACET_PRICE_BUCKETS", "0,25,50,100,250,500,1000").split(",")
+        ]
+        self.facet_max_brands: int = int(os.getenv("FACET_MAX_BRANDS", "20"))
+        self.facet_cache_enabled: bool = os.getenv("FACET_CACHE_ENABLED", "True").lower() == "true"
+        self.facet_cache_ttl_seconds: int = int(os.getenv("FACET_CACHE_TTL_SECONDS", "60"))
+        self.facet_cache_max_entries: int = int(os.getenv("FACET_CACHE_MAX_ENTRIES", "1000"))
+        
+        # Telemetry write-behind settings
+        self.telemetry_write_behind: bool = os.getenv("TELEMETRY_WRITE_BEHIND", "True").lower() == "true"
+        self.telemetry_max_pending: int = int(os.getenv("TELEMETRY_MAX_PENDING", "10000"))
+        self.telemetry_flush_interval_ms: int = int(os.getenv("TELEMETRY_FLUSH_INTERVAL_MS", "200"))
+        self.telemetry_batch_size: int = int(os.getenv("TELEMETRY_BATCH_SIZE", "500"))
+        self.telemetry_backpressure: str = os.getenv("TELEMETRY_BACKPRESSURE", "sync")
+        
+        # Partition maintenance settings
+        self.partition_premake_months: int = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+        self.chat_messages_retention_months: int = int(os.getenv("CHAT_MESSAGES_RETENTION_MONTHS", "12"))
+        self.session_transactions_retention_months: int = int(os.getenv("SESSION_TRANSACTIONS_RETENTION_MONTHS", "24"))
+        
+        # Analytics settings
+        self.analytics_rollup_lag_seconds: int = int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "60"))
+        
         # CORS settings
         self.cors_origins: list = [
             "http://localhost:3000",
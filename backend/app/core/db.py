@@ -1,15 +1,224 @@
 """
 Database connection and session management.
+
+The engine is created on first use (normally by the application lifespan)
+rather than at import time, so importing the app stays cheap.
+
+Read-only catalog endpoints take their session from `get_read_db`, which
+binds it to a read replica (DATABASE_REPLICA_URLS) when one is healthy and
+within `replica_max_lag_seconds` of the primary, and to the primary
+otherwise. Everything else, writes included, uses `get_db` and the primary.
+A client that wrote within `replica_read_delay_seconds` (tracked with the
+`last_write` cookie set by `ReadYourWritesMiddleware`) keeps reading from the
+primary, so it sees its own writes.
+
+The primary's pool records how long checkouts wait for a connection
+(`MeasuredQueuePool`), which admission control reads as a load signal.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import threading
+import time
+from functools import lru_cache
+from http.cookies import SimpleCookie
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings
 
-# Create database engine
-engine = create_engine(settings.database_url)
+logger = logging.getLogger(__name__)
+
+LAST_WRITE_COOKIE = "last_write"
+CONSISTENCY_HEADER = "X-Read-Consistency"
+
+# Replay lag in seconds; 0 on a primary or a caught-up standby, NULL if unknown
+REPLICA_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+class MeasuredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free (or new) connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.checkouts += 1
+            self.wait_seconds += time.perf_counter() - start
+
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """Get the database engine, creating it on first use."""
+    if settings.database_url.startswith("sqlite"):
+        # SQLite picks its own pool class
+        return create_engine(settings.database_url)
+    return create_engine(settings.database_url, poolclass=MeasuredQueuePool)
+
+# Session factory; bound to the engine when a session is created
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+def SessionLocal() -> Session:
+    """Create a database session."""
+    return _session_factory(bind=get_engine())
+
+def __getattr__(name: str):
+    # Keep `from app.core.db import engine` working without building the engine at import
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine: Optional[Engine] = None
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+
+class ReplicaRouter:
+    """Round-robin over replicas that passed their last health check."""
+
+    def __init__(self, urls: List[str], max_lag_seconds: float, check_interval_seconds: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._next = 0
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _engine(self, replica: Replica) -> Engine:
+        if replica.engine is None:
+            replica.engine = create_engine(
+                replica.url, pool_pre_ping=True, connect_args={"connect_timeout": 2}
+            )
+
+            # A replica that drops connections leaves the rotation until its next check passes
+            @event.listens_for(replica.engine, "handle_error")
+            def on_error(context):
+                if context.is_disconnect:
+                    replica.healthy, replica.error = False, "disconnected"
+                    replica.checked_at = time.monotonic()
+        return replica.engine
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def check(self, replica: Replica):
+        """Measure a replica's lag and mark it usable or not."""
+        try:
+            with self._engine(replica).connect() as conn:
+                lag = conn.execute(REPLICA_LAG_SQL).scalar()
+            replica.lag = None if lag is None else float(lag)
+            replica.healthy = replica.lag is not None and replica.lag <= self.max_lag_seconds
+            replica.error = None if replica.healthy else "lagging"
+        except Exception as exc:
+            replica.healthy, replica.lag, replica.error = False, None, type(exc).__name__
+        if not replica.healthy:
+            logger.warning("Replica %d unusable (%s, lag=%s)", self.replicas.index(replica), replica.error, replica.lag)
+        replica.checked_at = time.monotonic()
+
+    def _refresh(self, replica: Replica):
+        # One request re-checks a stale replica; concurrent ones use the last result
+        if time.monotonic() - replica.checked_at < self.check_interval_seconds:
+            return
+        if replica.lock.acquire(blocking=False):
+            try:
+                if time.monotonic() - replica.checked_at >= self.check_interval_seconds:
+                    self.check(replica)
+            finally:
+                replica.lock.release()
+
+    def pick(self) -> Optional[Engine]:
+        """A healthy replica's engine, or None to fall back to the primary."""
+        count = len(self.replicas)
+        for offset in range(count):
+            replica = self.replicas[(self._next + offset) % count]
+            self._refresh(replica)
+            if replica.healthy:
+                self._next = (self._next + offset + 1) % count
+                self.replica_reads += 1
+                return replica.engine
+        self.primary_reads += 1
+        return None
+
+    def status(self) -> dict:
+        return {
+            "replicas": [
+                {"index": index, "healthy": replica.healthy, "lag_seconds": replica.lag, "error": replica.error}
+                for index, replica in enumerate(self.replicas)
+            ],
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+
+replica_router = ReplicaRouter(
+    settings.database_replica_urls,
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    check_interval_seconds=settings.replica_health_check_interval_seconds
+)
+
+def wrote_recently(request: Request) -> bool:
+    """Whether this client asked for, or needs, reads from the primary."""
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "primary":
+        return True
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < settings.replica_read_delay_seconds
+
+def ReadSessionLocal(prefer_primary: bool = False) -> Session:
+    """Create a read-only session on a replica when one is usable, else on the primary."""
+    engine = None
+    if replica_router.enabled and not prefer_primary:
+        engine = replica_router.pick()
+    return _session_factory(bind=engine or get_engine())
+
+
+class ReadYourWritesMiddleware:
+    """Stamp clients that made a successful write so their next reads go to the primary.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streamed chat replies pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_router.enabled or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[LAST_WRITE_COOKIE] = f"{time.time():.3f}"
+                cookie[LAST_WRITE_COOKIE].update({
+                    "max-age": max(int(settings.replica_read_delay_seconds), 1),
+                    "path": "/", "httponly": True, "samesite": "lax",
+                })
+                header = cookie.output(header="").strip().encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", header)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
 
 def get_db():
     """Get database session."""
@@ -18,3 +227,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Get a session for read-only endpoints, routed to a replica when possible."""
+    db = ReadSessionLocal(prefer_primary=wrote_recently(request))
+    try:
+        yield db
+    finally:
+        db.close()
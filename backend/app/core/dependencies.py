@@ -1,6 +1,9 @@
+import hmac
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.db import get_db
 from app.core.security import verify_token
 from app.models.orm_models import User
@@ -8,11 +11,16 @@ from app.services.auth_service import AuthService
 
 security = HTTPBearer()
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get current authenticated user."""
+    """Get current authenticated user.
+
+    A plain function, like every dependency that queries the database, so
+    FastAPI runs it in the threadpool and a slow checkout cannot stall the
+    event loop (and admission control with it).
+    """
     token = credentials.credentials
     payload = verify_token(token, "access")
     
@@ -30,4 +38,25 @@ async def get_current_user(
             detail="User not found"
         )
     
-    return user
\ No newline at end of file
+    return user
+
+optional_security = HTTPBearer(auto_error=False)
+
+def get_current_user_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> Optional[User]:
+    """Get current user if a bearer token is present, otherwise None."""
+    if credentials is None:
+        return None
+    return get_current_user(credentials, db)
+
+admin_token_header = APIKeyHeader(name="X-Admin-Token", auto_error=False)
+
+async def require_admin_token(token: Optional[str] = Depends(admin_token_header)):
+    """Allow only callers presenting ADMIN_TOKEN; the admin surface is unusable while it is unset."""
+    if not settings.admin_token or token is None or not hmac.compare_digest(token, settings.admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
@@ -0,0 +1,264 @@
+"""
+Cross-worker invalidation bus.
+
+Each API worker keeps in-memory state derived from products and categories:
+search and similarity indexes, the summary and facet caches, and the
+catalog version that cached responses are stamped with. A write only updates
+the worker that handled it, so the services also record every write with
+`record_change` before committing. One statement appends a compact event
+(kind, entity ID, originating worker) to the `change_events` outbox and
+`pg_notify`s it on `invalidation_channel`. Both belong to the write's
+transaction: an event exists exactly when the write committed, and the
+notification is only delivered on commit.
+
+`invalidation_listener` runs in every worker, LISTENing on a dedicated
+connection and applying other workers' events as they arrive, typically a
+few milliseconds after the commit. Catalog events are republished through
+`publish_changes(..., remote=True)` with the entities reloaded (one query per
+kind per batch of notifications), so every catalog listener and
+version-stamped cache reacts as it does to a local write. Notifications sent while the listener
+is disconnected are lost, so after reconnecting it replays the outbox from
+the last event it applied; applying an event twice is harmless. Events older
+than `invalidation_retention_hours` are pruned.
+
+On SQLite, or with INVALIDATION_BUS_ENABLED=false for a single worker,
+nothing is recorded and no listener runs: the in-process publish that
+follows each commit is the whole mechanism.
+"""
+import logging
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload
+from app.core.catalog import publish_changes
+from app.core.config import settings
+from app.core.db import SessionLocal, get_engine
+from app.models.orm_models import Category, Product
+
+logger = logging.getLogger(__name__)
+
+CATALOG_MODELS = {"product": Product, "category": Category}
+
+# Appends to the outbox and notifies in one round trip; the payload is "id|origin|kind|entity_id"
+_RECORD_SQL = text(
+    "WITH event AS ("
+    "INSERT INTO change_events (kind, entity_id, origin, created_at) "
+    "VALUES (:kind, :entity_id, :origin, timezone('utc', now())) RETURNING id"
+    ") SELECT pg_notify(:channel, id || '|' || :origin || '|' || :kind || '|' || :entity_id) FROM event"
+)
+
+# The same for many entities of one kind, still one round trip
+_RECORD_MANY_SQL = text(
+    "WITH event AS ("
+    "INSERT INTO change_events (kind, entity_id, origin, created_at) "
+    "SELECT :kind, entity_id, :origin, timezone('utc', now()) FROM unnest(CAST(:entity_ids AS text[])) AS entity_id "
+    "RETURNING id, entity_id"
+    ") SELECT pg_notify(:channel, id || '|' || :origin || '|' || :kind || '|' || entity_id) FROM event"
+)
+
+# Outbox IDs are taken at insert but committed in any order, so a replay
+# starts this many IDs before the newest event already applied
+REPLAY_MARGIN = 1000
+PRUNE_INTERVAL_SECONDS = 3600
+
+_worker_pid: Optional[int] = None
+_worker_id: Optional[str] = None
+
+
+def worker_id() -> str:
+    """Origin tag for this process's events; a forked worker gets its own."""
+    global _worker_pid, _worker_id
+    pid = os.getpid()
+    if pid != _worker_pid:
+        _worker_pid, _worker_id = pid, f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _worker_id
+
+
+def bus_enabled(db: Session) -> bool:
+    return settings.invalidation_bus_enabled and db.get_bind().dialect.name == "postgresql"
+
+
+def record_change(db: Session, kind: str, entity_id: str):
+    """Add a change event to the session's transaction. Call before committing the write."""
+    if bus_enabled(db):
+        db.execute(_RECORD_SQL, {
+            "kind": kind, "entity_id": entity_id, "origin": worker_id(), "channel": settings.invalidation_channel
+        })
+
+
+def record_changes(db: Session, kind: str, entity_ids: Sequence[str]):
+    """Add change events for many entities of one kind in one statement. Call before committing."""
+    if entity_ids and bus_enabled(db):
+        db.execute(_RECORD_MANY_SQL, {
+            "kind": kind, "entity_ids": list(entity_ids), "origin": worker_id(),
+            "channel": settings.invalidation_channel
+        })
+
+
+def _parse(payload: str) -> Tuple[int, str, str, str]:
+    event_id, origin, kind, entity_id = payload.split("|", 3)
+    return int(event_id), origin, kind, entity_id
+
+
+class InvalidationListener:
+    """Applies change events from other workers as their notifications arrive."""
+
+    def __init__(self, channel: str, reconnect_delay_seconds: float, retention_hours: int):
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay_seconds
+        self.retention_hours = retention_hours
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_id: Optional[int] = None
+        self._pruned_at = 0.0
+        self.connected = False
+        self.received = 0
+        self.applied = 0
+        self.replayed = 0
+        self.reconnects = 0
+        self.last_apply_ms = 0.0
+
+    def start(self):
+        if not settings.invalidation_bus_enabled or get_engine().dialect.name != "postgresql":
+            logger.info("Invalidation bus disabled; changes are only published in-process")
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            connection = None
+            try:
+                raw = get_engine().raw_connection()
+                connection = raw.driver_connection
+                # Held for the process lifetime, so it leaves the pool
+                raw.detach()
+                connection.autocommit = True
+                self._subscribe(connection)
+                self.connected = True
+                self._listen(connection)
+            except Exception as exc:
+                if self._running:
+                    logger.warning("Invalidation listener disconnected: %s", exc)
+            finally:
+                self.connected = False
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+            if self._running:
+                self.reconnects += 1
+                time.sleep(self.reconnect_delay)
+
+    def _subscribe(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+            if self._last_id is None:
+                # First connection: nothing before now needs replaying
+                cursor.execute("SELECT coalesce(max(id), 0) FROM change_events")
+                self._last_id = cursor.fetchone()[0]
+                return
+            cursor.execute(
+                "SELECT id, origin, kind, entity_id FROM change_events WHERE id > %s ORDER BY id",
+                (self._last_id - REPLAY_MARGIN,)
+            )
+            events = cursor.fetchall()
+        self.replayed += len(events)
+        self._apply(events)
+
+    def _listen(self, connection):
+        while self._running:
+            self._prune(connection)
+            if select.select([connection], [], [], 1.0) == ([], [], []):
+                continue
+            connection.poll()
+            if not connection.notifies:
+                continue
+            events = [_parse(notify.payload) for notify in connection.notifies]
+            connection.notifies.clear()
+            self.received += len(events)
+            self._apply(events)
+
+    def _apply(self, events: Sequence[Tuple[int, str, str, str]]):
+        if not events:
+            return
+        start = time.perf_counter()
+        me = worker_id()
+        # A burst of writes to one entity is applied once
+        changed: Dict[str, Dict[str, None]] = defaultdict(dict)
+        for event_id, origin, kind, entity_id in events:
+            # Kinds this version does not know (left by an older one in the outbox) are ignored
+            if origin != me and kind in CATALOG_MODELS:
+                changed[kind][entity_id] = None
+
+        entities = self._load(changed)
+        for kind, ids in changed.items():
+            # One catalog version bump per kind per batch
+            publish_changes(kind, {entity_id: entities.get((kind, entity_id)) for entity_id in ids}, remote=True)
+            self.applied += len(ids)
+        self._last_id = max(self._last_id or 0, max(event[0] for event in events))
+        if changed:
+            self.last_apply_ms = (time.perf_counter() - start) * 1000
+
+    def _load(self, ids_by_kind: Dict[str, Dict[str, None]]) -> dict:
+        """Current committed entities by (kind, id); deleted ones are absent."""
+        if not ids_by_kind:
+            return {}
+        db = SessionLocal()
+        try:
+            entities = {}
+            for kind, ids in ids_by_kind.items():
+                model = CATALOG_MODELS[kind]
+                query = db.query(model).filter(model.id.in_(list(ids)))
+                if model is Product:
+                    # Index listeners read the category name after the session closes
+                    query = query.options(selectinload(Product.category))
+                for entity in query:
+                    entities[(kind, entity.id)] = entity
+            return entities
+        finally:
+            db.close()
+
+    def _prune(self, connection):
+        if time.monotonic() - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM change_events WHERE created_at < timezone('utc', now()) - make_interval(hours => %s)",
+                (self.retention_hours,)
+            )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._running,
+            "connected": self.connected,
+            "worker": worker_id(),
+            "last_event_id": self._last_id,
+            "received": self.received,
+            "applied": self.applied,
+            "replayed": self.replayed,
+            "reconnects": self.reconnects,
+            "last_apply_ms": round(self.last_apply_ms, 3),
+        }
+
+
+invalidation_listener = InvalidationListener(
+    channel=settings.invalidation_channel,
+    reconnect_delay_seconds=settings.invalidation_reconnect_delay_seconds,
+    retention_hours=settings.invalidation_retention_hours
+)
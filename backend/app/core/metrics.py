@@ -0,0 +1,371 @@
+"""
+Prometheus-style metrics, exported in the text exposition format at `/metrics`.
+
+Counters, gauges and histograms keep one shard of values per thread, and a
+thread only ever writes its own shard, so recording a sample takes no lock:
+a dict lookup, a bisect and two in-place additions. A scrape sums the
+shards; it may see a sample half-recorded (bucket counted, sum not yet),
+which is harmless for monitoring. Locks are only taken when a label set or
+a thread is seen for the first time.
+
+What is recorded where:
+
+- `MetricsMiddleware`: requests per method, route template and status,
+  latency per route template, and requests in flight per admission class
+- SQLAlchemy engine events: statements and their duration per service
+  method; `instrumented` service classes name the method running on this
+  thread (or task), anything else is counted as "other"
+- `app.core.security`: password hashing and verification time
+
+Values that already exist elsewhere (cache hit counts, pool state, admission
+and coalescing counters) are read at scrape time by collectors registered
+with `registry.register_collector`, so they cost nothing per request.
+"""
+import contextvars
+import functools
+import inspect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.profiling import profiled
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; +Inf is implied
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """Per-thread value lists of a fixed width, summed on read."""
+
+    __slots__ = ("_width", "_shards", "_lock")
+
+    def __init__(self, width: int):
+        self._width = width
+        self._shards: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def shard(self) -> list:
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(threading.get_ident(), [0] * self._width)
+        return shard
+
+    def total(self) -> list:
+        with self._lock:
+            shards = list(self._shards.values())
+        totals = [0] * self._width
+        for shard in shards:
+            for index, value in enumerate(shard):
+                totals[index] += value
+        return totals
+
+
+class _CounterChild:
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values = _Sharded(1)
+
+    def inc(self, amount: float = 1):
+        self._values.shard()[0] += amount
+
+    def dec(self, amount: float = 1):
+        self._values.shard()[0] -= amount
+
+    def value(self) -> float:
+        return self._values.total()[0]
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_values")
+
+    def __init__(self, bounds: Sequence[float]):
+        self._bounds = bounds
+        # One count per bucket (the last is +Inf), then the sum
+        self._values = _Sharded(len(bounds) + 2)
+
+    def observe(self, value: float):
+        shard = self._values.shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Cumulative bucket counts (the last is the total count) and the sum."""
+        totals = self._values.total()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1]
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child holding one label combination's value."""
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, values)), child) for values, child in sorted(items)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._render_samples()
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value())}" for labels, child in self._items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    """A value that goes up and down; shards hold per-thread deltas."""
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for labels, child in self._items():
+            cumulative, total = child.snapshot()
+            for bound, count in zip((*self.buckets, math.inf), cumulative):
+                bucket_labels = {**labels, "le": _format_value(bound)}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collect: Callable[[], Iterable[tuple]]):
+        """Add a function called on every scrape that yields (name, type, help, samples)."""
+        with self._lock:
+            self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        for collect in collectors:
+            for name, kind, help, samples in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code.",
+    ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time from receiving a request to finishing its response.",
+    ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being served, by admission class.", ("class",)
+)
+db_queries = registry.counter(
+    "db_queries_total", "SQL statements executed, by the service method that issued them.", ("operation",)
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time, by the service method that issued it.",
+    ("operation",), QUERY_BUCKETS
+)
+password_hash_duration = registry.histogram(
+    "auth_password_hash_seconds", "Time spent hashing or verifying a password.", ("operation",), HASH_BUCKETS
+)
+
+
+# Service method running in the current thread or task
+_operation: contextvars.ContextVar[str] = contextvars.ContextVar("db_operation", default="other")
+
+
+def instrumented(cls):
+    """Attribute the SQL statements issued by a service class's public methods to `Class.method`."""
+    for name, method in list(vars(cls).items()):
+        if (
+            name.startswith("_") or not inspect.isfunction(method)
+            or inspect.iscoroutinefunction(method) or inspect.isgeneratorfunction(method)
+            or inspect.isasyncgenfunction(method)
+        ):
+            continue
+        setattr(cls, name, _with_operation(method, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _with_operation(method, operation: str):
+    if settings.profiling_enabled:
+        # Lets a profiled request's cProfile follow it into the threadpool
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            token = _operation.set(operation)
+            try:
+                return profiled(method, *args, **kwargs)
+            finally:
+                _operation.reset(token)
+        return wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        token = _operation.set(operation)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _operation.reset(token)
+    return wrapper
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    operation = _operation.get()
+    db_queries.labels(operation).inc()
+    db_query_duration.labels(operation).observe(time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_query_error(context):
+    # A failed statement never reaches after_cursor_execute
+    connection = context.connection
+    if connection is not None:
+        started = connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """Count and time every HTTP request by its route template; a streamed reply is timed to its end."""
+
+    def __init__(self, app, classify: Callable[[str, str], Optional[str]]):
+        self.app = app
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = http_requests_in_flight.labels(self.classify(method, scope["path"]) or "exempt")
+        in_flight.inc()
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router fills in the matched route; requests that never reached
+            # it (404s, requests shed by admission control) share one label
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration.labels(method, route).observe(time.perf_counter() - start)
+            http_requests.labels(method, route, str(status_code)).inc()
+            in_flight.dec()
@@ -0,0 +1,313 @@
+"""
+On-demand profiling of a live worker.
+
+Three tools, all behind the admin token and all off unless
+`profiling_enabled` is set (nothing below is installed otherwise):
+
+- `SamplingProfiler`: a background thread that samples every thread's stack
+  with `sys._current_frames()` for a fixed number of seconds and folds them
+  into "frame;frame;frame count" lines, the input format of flamegraph.pl,
+  speedscope and inferno. The sampled threads run unmodified.
+- `RequestProfiler`: a request carrying `X-Profile-Token` is run under
+  cProfile and its stats are kept, under the ID returned in `X-Profile-Id`,
+  for the last `profiling_max_captures` captures. The profiler is enabled on
+  the event loop thread; read endpoints run in the threadpool, so calls to
+  `instrumented` service methods made on behalf of the request enable one
+  there too (from Python 3.12 one cProfile sees every thread, and the extra
+  one is skipped). One request is profiled at a time; the loop thread's
+  profile also contains whatever other requests ran on the loop meanwhile.
+- `AllocationTracer`: `tracemalloc` started on demand, with snapshots
+  compared against the previous one to list the lines whose allocations grew.
+
+Profiles only ever cover the worker that served the admin request.
+"""
+import contextvars
+import cProfile
+import hmac
+import io
+import itertools
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Callable, Optional
+from app.core.config import settings
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+_TOKEN_HEADER_KEY = PROFILE_TOKEN_HEADER.lower().encode()
+_ID_HEADER_KEY = PROFILE_ID_HEADER.lower().encode()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples all thread stacks every `interval` seconds for `seconds` seconds."""
+
+    def __init__(self, max_seconds: int):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.seconds = 0.0
+        self.interval = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval_ms: float) -> bool:
+        """Start a run, discarding the previous one's stacks. False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self.seconds = min(seconds, self.max_seconds)
+            self.interval = interval_ms / 1000
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """The last run's stacks in folded format, most frequent first."""
+        stacks = self._stacks.copy()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": len(self._stacks),
+        }
+
+
+class _Capture:
+    def __init__(self, capture_id: str, method: str, path: str):
+        self.id = capture_id
+        self.method = method
+        self.path = path
+        self.loop_thread = threading.get_ident()
+        self.profilers = [cProfile.Profile()]
+        self._threads = set()
+        self.duration_ms = 0.0
+        self.status_code: Optional[int] = None
+
+    def run_in_thread(self, fn: Callable, *args, **kwargs):
+        """Run a call made for this request on another thread under that thread's own profiler."""
+        ident = threading.get_ident()
+        if ident == self.loop_thread or ident in self._threads:
+            # Already profiled: the loop thread, or a service method calling another
+            return fn(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # From 3.12 the loop thread's profiler already sees this thread
+            return fn(*args, **kwargs)
+        self._threads.add(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            self._threads.discard(ident)
+            self.profilers.append(profiler)
+
+    def stats(self, sort: str, limit: int) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(self.profilers[0], stream=output)
+        for profiler in self.profilers[1:]:
+            stats.add(profiler)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+# The capture of the request being served in this context, if it is profiled
+_current_capture: contextvars.ContextVar[Optional[_Capture]] = contextvars.ContextVar("profile_capture", default=None)
+
+
+def profiled(fn: Callable, *args, **kwargs):
+    """Call fn, under the current request's profiler when the request is being profiled."""
+    capture = _current_capture.get()
+    if capture is None:
+        return fn(*args, **kwargs)
+    return capture.run_in_thread(fn, *args, **kwargs)
+
+
+class RequestProfiler:
+    def __init__(self, max_captures: int):
+        self.max_captures = max_captures
+        self._captures: "OrderedDict[str, _Capture]" = OrderedDict()
+        self._active = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def begin(self, method: str, path: str) -> Optional[_Capture]:
+        """Start profiling a request, or None while another request is being profiled."""
+        if not self._active.acquire(blocking=False):
+            return None
+        capture = _Capture(f"{os.getpid()}-{next(self._ids)}", method, path)
+        try:
+            capture.profilers[0].enable()
+        except ValueError:
+            # Something else (a debugger, a cProfile run) holds the profiling hook
+            self._active.release()
+            return None
+        return capture
+
+    def end(self, capture: _Capture, duration_ms: float, status_code: Optional[int]):
+        capture.profilers[0].disable()
+        capture.duration_ms = duration_ms
+        capture.status_code = status_code
+        self._captures[capture.id] = capture
+        while len(self._captures) > self.max_captures:
+            self._captures.popitem(last=False)
+        self._active.release()
+
+    def get(self, capture_id: str) -> Optional[_Capture]:
+        return self._captures.get(capture_id)
+
+    def list(self) -> list:
+        return [
+            {
+                "id": capture.id,
+                "method": capture.method,
+                "path": capture.path,
+                "status_code": capture.status_code,
+                "duration_ms": round(capture.duration_ms, 3),
+                "threads": len(capture.profilers),
+            }
+            for capture in reversed(self._captures.values())
+        ]
+
+
+class AllocationTracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._previous = None
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+    def snapshot(self, limit: int) -> dict:
+        """Top allocation sites now, and the largest changes since the previous snapshot."""
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, linecache.__file__),
+            ))
+            previous, self._previous = self._previous, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"location": _location(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ],
+            "diff": None,
+        }
+        if previous is not None:
+            result["diff"] = [
+                {
+                    "location": _location(stat.traceback),
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in snapshot.compare_to(previous, "lineno")[:limit]
+            ]
+        return result
+
+
+def _location(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+sampling_profiler = SamplingProfiler(settings.profiling_max_sample_seconds)
+request_profiler = RequestProfiler(settings.profiling_max_captures)
+allocation_tracer = AllocationTracer()
+
+
+class RequestProfilingMiddleware:
+    """Profile requests that carry the admin token in `X-Profile-Token`."""
+
+    def __init__(self, app, token: str):
+        self.app = app
+        self.token = token.encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        presented = next((value for name, value in scope["headers"] if name == _TOKEN_HEADER_KEY), None)
+        if presented is None or not hmac.compare_digest(presented, self.token):
+            await self.app(scope, receive, send)
+            return
+
+        capture = request_profiler.begin(scope["method"], scope["path"])
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+        status_code = None
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (_ID_HEADER_KEY, capture.id.encode())]}
+            await send(message)
+
+        context_token = _current_capture.set(capture)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current_capture.reset(context_token)
+            request_profiler.end(capture, (time.perf_counter() - start) * 1000, status_code)
@@ -1,12 +1,23 @@
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Union
-from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings 
+from app.core.metrics import password_hash_duration
 
-# password hashing - use argon2 which doesn't have the 72-byte limitation
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# passlib and python-jose are imported on first use (or by the app lifespan)
+# rather than at import time, to keep them off the cold-start path
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Password hashing context - argon2, which doesn't have the 72-byte limitation."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["argon2"], deprecated="auto")
+
+def _jwt():
+    from jose import jwt
+    return jwt
 
 # JWT settings
 SECRET_KEY = settings.secret_key
@@ -16,11 +27,19 @@ REFRESH_TOKEN_EXPIRE_DAYS = settings.jwt_refresh_token_expire_days
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    start = time.perf_counter()
+    try:
+        return get_pwd_context().verify(plain_password, hashed_password)
+    finally:
+        password_hash_duration.labels("verify").observe(time.perf_counter() - start)
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return get_pwd_context().hash(password)
+    finally:
+        password_hash_duration.labels("hash").observe(time.perf_counter() - start)
     
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token."""
@@ -31,7 +50,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def create_refresh_token(data: dict):
@@ -39,15 +58,16 @@ def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 
 def verify_token(token: str, token_type: str = "access") -> dict:
     """Verify and decode JWT token."""
+    from jose import JWTError
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _jwt().decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("type") != token_type:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
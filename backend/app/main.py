@@ -1,9 +1,75 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, products, categories
+from sqlalchemy.orm import configure_mappers
+from app.api.endpoints import auth, products, categories, wishlist, chat, recommendations, analytics, metrics, profiling
 from app.core.config import settings
+from app.core.admission import AdmissionControlMiddleware, admission_controller, route_class
+from app.core.db import ReadYourWritesMiddleware, get_engine
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import RequestProfilingMiddleware, sampling_profiler, allocation_tracer
+from app.core.security import get_pwd_context
+from app.services.telemetry_writer import telemetry_writer
+from app.core.invalidation import invalidation_listener
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.trending_service import trending_counter
+import logging
+import time
 
-app = FastAPI(title=settings.app_name)
+logger = logging.getLogger(__name__)
+
+def load_recommendations():
+    """Memory-map the recommendation artifact, if one has been built."""
+    from app.services.recommendation_service import load_similarity_index
+    load_similarity_index()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize heavy resources once, before serving requests, instead of at import time.
+
+    Per-phase timings are kept in `app.state.startup_timings` (milliseconds).
+    """
+    phases = [
+        ("database engine", get_engine),
+        ("orm mappers", configure_mappers),
+        ("password hashing", get_pwd_context),
+    ]
+    if settings.preload_recommendations:
+        phases.append(("recommendation artifact", load_recommendations))
+    if settings.telemetry_write_behind:
+        phases.append(("telemetry writer", telemetry_writer.start))
+    if settings.catalog_snapshot_enabled:
+        phases.append(("catalog snapshot", catalog_snapshot.start))
+    if settings.invalidation_bus_enabled:
+        phases.append(("invalidation listener", invalidation_listener.start))
+    if settings.admission_control_enabled:
+        phases.append(("admission control", admission_controller.start))
+    if settings.trending_enabled:
+        phases.append(("trending counters", trending_counter.start))
+
+    timings = {}
+    for name, initialize in phases:
+        start = time.perf_counter()
+        initialize()
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    app.state.startup_timings = timings
+    logger.info("Startup phases (ms): %s", timings)
+
+    yield
+
+    sampling_profiler.stop()
+    allocation_tracer.stop()
+    trending_counter.stop()
+    # Flush queued telemetry before the process exits
+    admission_controller.stop()
+    invalidation_listener.stop()
+    catalog_snapshot.stop()
+    telemetry_writer.stop()
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+
+# Shed requests past capacity with 503; added first so rejections still get CORS headers
+app.add_middleware(AdmissionControlMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -14,11 +80,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route a client's reads to the primary for a short while after it writes
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Admin-only profiling; nothing is installed unless it is switched on
+profiling_enabled = settings.profiling_enabled and bool(settings.admin_token)
+if settings.profiling_enabled and not settings.admin_token:
+    logger.warning("PROFILING_ENABLED is set without ADMIN_TOKEN; profiling stays off")
+if profiling_enabled:
+    app.add_middleware(RequestProfilingMiddleware, token=settings.admin_token)
+
+# Outermost, so shed requests and CORS preflights are counted and timed too
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, classify=route_class)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(products.router)
 app.include_router(categories.router)
+app.include_router(wishlist.router)
+app.include_router(chat.router)
+app.include_router(recommendations.router)
+app.include_router(analytics.router)
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
+if profiling_enabled:
+    app.include_router(profiling.router)
 
 @app.get("/")
 async def root():
-    return {"message": "AI E-commerce API"}
\ No newline at end of file
+    return {"message": "AI E-commerce API"}
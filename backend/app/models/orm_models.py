@@ -2,9 +2,10 @@ from datetime import datetime
 from enum import Enum
 from decimal import Decimal
 from sqlalchemy import (
-    Column, String, Integer, DateTime, ForeignKey, Boolean,
+    Column, String, Integer, BigInteger, Date, DateTime, ForeignKey, Boolean,
     Enum as PgEnum, JSON, Numeric, UniqueConstraint, Index, ARRAY
 )
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -229,6 +230,7 @@ class Product(Base):
     images = Column(ARRAY(String))
     tags = Column(ARRAY(String))
     stock = Column(Integer, default=0)
+    summary = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -374,6 +376,7 @@ class ChatSession(Base):
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
+    # Range partitioned by month on created_at, which is therefore part of the key
     id = Column(String, primary_key=True)
     session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"))
     role = Column(PgEnum(MessageRole))
@@ -388,24 +391,27 @@ class ChatMessage(Base):
     action_type = Column(PgEnum(ActionType))
     action_data = Column(JSON)
     response_time = Column(Integer)
+    first_token_time = Column(Integer)
     token_count = Column(Integer)
     cost = Column(Numeric(10, 6))
     feedback_rating = Column(Integer)
     feedback_note = Column(String)
     is_processed = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     session = relationship("ChatSession", back_populates="messages")
 
     __table_args__ = (
-        Index("idx_msg_session", "session_id"),
+        Index("idx_msg_session_created", "session_id", "created_at"),
         Index("idx_msg_created", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 
 class SessionTransaction(Base):
     __tablename__ = "session_transactions"
 
+    # Range partitioned by month on created_at, which is therefore part of the key
     id = Column(String, primary_key=True)
     session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"))
     product_id = Column(String, ForeignKey("products.id"), nullable=True)
@@ -413,11 +419,25 @@ class SessionTransaction(Base):
     amount = Column(Numeric(10, 2))
     status = Column(PgEnum(TransactionStatus), default=TransactionStatus.COMPLETED)
     tx_metadata = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     session = relationship("ChatSession", back_populates="transactions")
     product = relationship("Product")
 
+    __table_args__ = (
+        Index("idx_tx_session_created", "session_id", "created_at"),
+        Index("idx_tx_created", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# Partitioned tables need a partition before they accept rows; monthly ones are
+# added by the partition maintenance job (app/services/partition_service.py)
+for _table in (ChatMessage.__table__, SessionTransaction.__table__):
+    event.listen(_table, "after_create", DDL(
+        f"CREATE TABLE IF NOT EXISTS {_table.name}_default PARTITION OF {_table.name} DEFAULT"
+    ))
+
 
 class UserFeedback(Base):
     __tablename__ = "user_feedback"
@@ -429,4 +449,59 @@ class UserFeedback(Base):
     category = Column(PgEnum(FeedbackType))
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    session = relationship("ChatSession", back_populates="feedback")
\ No newline at end of file
+    session = relationship("ChatSession", back_populates="feedback")
+
+
+# ======================================================
+# ANALYTICS ROLLUPS
+# ======================================================
+
+class ChatRollup(Base):
+    __tablename__ = "chat_rollups"
+
+    day = Column(Date, primary_key=True)
+    provider = Column(String, primary_key=True)
+    system_type = Column(PgEnum(AISystemType), primary_key=True)
+    message_count = Column(Integer, default=0)
+    token_count = Column(BigInteger, default=0)
+    cost = Column(Numeric(14, 6), default=0)
+    latency_sketch = Column(JSON)
+    first_token_sketch = Column(JSON)
+    feedback_count = Column(Integer, default=0)
+    feedback_sum = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    processed_until = Column(DateTime, nullable=False)
+
+
+class ProductViewCount(Base):
+    """Product detail views per minute, flushed in batches from the in-memory trending counters."""
+    __tablename__ = "product_view_counts"
+
+    minute = Column(DateTime, primary_key=True)
+    product_id = Column(String, primary_key=True)
+    category_id = Column(String)
+    views = Column(Integer, nullable=False, default=0)
+
+
+# ======================================================
+# CHANGE EVENTS (invalidation outbox)
+# ======================================================
+
+class ChangeEvent(Base):
+    __tablename__ = "change_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    entity_id = Column(String, nullable=False)
+    origin = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_change_events_created", "created_at"),
+    )
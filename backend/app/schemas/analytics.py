@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import date
+from decimal import Decimal
+from app.models.orm_models import AISystemType
+
+class ChatRollupResponse(BaseModel):
+    day: Optional[date] = None
+    provider: str
+    system_type: AISystemType
+    message_count: int
+    token_count: int
+    cost: Decimal
+    latency_p50: Optional[float] = None
+    latency_p95: Optional[float] = None
+    latency_p99: Optional[float] = None
+    first_token_p50: Optional[float] = None
+    first_token_p95: Optional[float] = None
+    feedback_count: int
+    feedback_avg: Optional[float] = None
+
+class ChatAnalyticsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    granularity: str
+    rows: List[ChatRollupResponse]
+
+class CoalescedKeyResponse(BaseModel):
+    key: str
+    executed: int
+    coalesced: int
+    max_waiters: int
+
+class CoalescingStatsResponse(BaseModel):
+    executed: int
+    coalesced: int
+    in_flight: int
+    keys: List[CoalescedKeyResponse]
+
+class AdmissionClassResponse(BaseModel):
+    in_flight: int
+    limit: int
+    admitted: int
+    shed: Dict[str, int]
+
+class AdmissionStatsResponse(BaseModel):
+    enabled: bool
+    in_flight: int
+    loop_lag_ms: float
+    pool_wait_ms: float
+    overload_level: int
+    classes: Dict[str, AdmissionClassResponse]
@@ -0,0 +1,114 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Dict
+from datetime import datetime
+from decimal import Decimal
+from app.models.orm_models import (
+    AISystemType, ChatType, LLMProvider, MessageRole, ContentType, ActionType,
+    TransactionType, TransactionStatus
+)
+
+class ChatSessionCreate(BaseModel):
+    session_name: Optional[str] = Field(None, max_length=200)
+    system_type: AISystemType = AISystemType.GENERAL_LLM
+    chat_type: ChatType = ChatType.TEXT
+    llm_preference: Optional[LLMProvider] = None
+    device_info: Optional[Dict[str, Any]] = None
+
+class ChatSessionResponse(BaseModel):
+    id: str
+    user_id: Optional[str]
+    session_name: Optional[str]
+    system_type: Optional[AISystemType]
+    chat_type: Optional[ChatType]
+    llm_preference: Optional[LLMProvider]
+    created_at: datetime
+    last_used_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class ChatMessageCreate(BaseModel):
+    role: MessageRole
+    content: str = Field(..., max_length=20000)
+    content_type: ContentType = ContentType.TEXT
+    model_used: Optional[str] = None
+    action_type: Optional[ActionType] = None
+    action_data: Optional[Dict[str, Any]] = None
+    response_time: Optional[int] = Field(None, ge=0)
+    first_token_time: Optional[int] = Field(None, ge=0)
+    token_count: Optional[int] = Field(None, ge=0)
+    cost: Optional[Decimal] = Field(None, ge=0)
+
+class ChatMessageAppend(BaseModel):
+    messages: List[ChatMessageCreate] = Field(..., min_length=1, max_length=50)
+
+class ChatMessageResponse(BaseModel):
+    id: str
+    session_id: str
+    role: MessageRole
+    content: Optional[str]
+    content_type: Optional[ContentType]
+    model_used: Optional[str]
+    action_type: Optional[ActionType]
+    action_data: Optional[Dict[str, Any]]
+    response_time: Optional[int]
+    first_token_time: Optional[int]
+    token_count: Optional[int]
+    cost: Optional[Decimal]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChatMessagePage(BaseModel):
+    messages: List[ChatMessageResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+class ChatPrompt(BaseModel):
+    content: str = Field(..., min_length=1, max_length=4000)
+
+class ChatCacheStatsResponse(BaseModel):
+    session_id: str
+    hits: int
+    misses: int
+    hit_rate: float
+    saved_cost: Decimal
+    saved_time_ms: int
+
+class SessionTransactionCreate(BaseModel):
+    product_id: Optional[str] = None
+    type: TransactionType
+    amount: Optional[Decimal] = None
+    status: TransactionStatus = TransactionStatus.COMPLETED
+    tx_metadata: Optional[Dict[str, Any]] = None
+
+class SessionTransactionResponse(BaseModel):
+    id: str
+    session_id: str
+    product_id: Optional[str]
+    type: TransactionType
+    amount: Optional[Decimal]
+    status: TransactionStatus
+    tx_metadata: Optional[Dict[str, Any]]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class SessionTransactionPage(BaseModel):
+    transactions: List[SessionTransactionResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+class LedgerSummaryRow(BaseModel):
+    type: TransactionType
+    status: TransactionStatus
+    count: int
+    amount: Decimal
+
+class LedgerSummaryResponse(BaseModel):
+    session_id: str
+    start: datetime
+    end: datetime
+    rows: List[LedgerSummaryRow]
@@ -49,21 +49,94 @@ class ProductUpdate(BaseModel):
     tags: Optional[List[str]] = None
     stock: Optional[int] = Field(None, ge=0)
 
+class ProductBulkUpdateItem(BaseModel):
+    """A partial update; fields left out (or null) keep their current value."""
+    id: str
+    price: Optional[Decimal] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+
+class ProductBulkUpdate(BaseModel):
+    items: List[ProductBulkUpdateItem] = Field(..., min_length=1)
+
+class ProductBulkUpdateResult(BaseModel):
+    id: str
+    status: str = Field(..., description="updated, not_found, or unchanged when the item set no field on an existing product")
+    price: Optional[Decimal] = None
+    stock: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+class ProductBulkUpdateResponse(BaseModel):
+    updated: int
+    not_found: int
+    results: List[ProductBulkUpdateResult]
+
 class ProductResponse(ProductBase):
     id: str
     created_at: datetime
     updated_at: datetime
     category: Optional[CategoryResponse] = None
+    in_wishlist: Optional[bool] = None
     
     class Config:
         from_attributes = True
 
+class FacetValue(BaseModel):
+    value: Optional[str] = None
+    label: Optional[str] = None
+    count: int
+
+class PriceBucket(BaseModel):
+    min: Decimal
+    max: Optional[Decimal] = None
+    count: int
+
+class ProductFacets(BaseModel):
+    brands: List[FacetValue]
+    categories: List[FacetValue]
+    price: List[PriceBucket]
+    in_stock: int
+    out_of_stock: int
+
 class ProductListResponse(BaseModel):
     products: List[ProductResponse]
     total: int
     page: int
     page_size: int
     total_pages: int
+    facets: Optional[ProductFacets] = Field(None, description="Only returned when requested with `facets=true`")
+
+class ProductCompactResponse(BaseModel):
+    """A listing row narrowed with `fields`; only the requested fields are present."""
+    id: str
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[Decimal] = None
+    category_id: Optional[str] = None
+    brand: Optional[str] = None
+    images: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    stock: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    thumbnail: Optional[str] = None
+    category: Optional[CategoryResponse] = None
+    in_wishlist: Optional[bool] = None
+
+class ProductCompactListResponse(BaseModel):
+    products: List[ProductCompactResponse]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+    facets: Optional[ProductFacets] = Field(None, description="Only returned when requested with `facets=true`")
+
+class TrendingProductResponse(ProductResponse):
+    views: int = Field(..., description="Detail views in the trending window, across all workers")
+
+class TrendingProductsResponse(BaseModel):
+    products: List[TrendingProductResponse]
+    category_id: Optional[str] = None
+    window_minutes: int
 
 class CategoryListResponse(BaseModel):
     categories: List[CategoryResponse]
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SamplerStatusResponse(BaseModel):
+    running: bool
+    started_at: Optional[float] = None
+    seconds: float
+    interval_ms: float
+    samples: int
+    stacks: int
+
+class RequestCaptureResponse(BaseModel):
+    id: str
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    duration_ms: float
+    threads: int
+
+class AllocationSiteResponse(BaseModel):
+    location: str
+    size_bytes: int
+    count: int
+
+class AllocationDiffResponse(BaseModel):
+    location: str
+    size_bytes: int
+    size_diff_bytes: int
+    count_diff: int
+
+class AllocationSnapshotResponse(BaseModel):
+    traced_bytes: int
+    peak_bytes: int
+    top: List[AllocationSiteResponse]
+    diff: Optional[List[AllocationDiffResponse]] = None
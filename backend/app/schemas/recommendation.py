@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+class ScoredProduct(BaseModel):
+    product_id: str
+    score: float
+
+class SimilarProductsResponse(BaseModel):
+    product_id: str
+    items: List[ScoredProduct]
+
+class RecommendationResponse(BaseModel):
+    user_id: str
+    source: str
+    items: List[ScoredProduct]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class WishlistItemStatus(BaseModel):
+    product_id: str
+    in_wishlist: bool
+    changed: bool
+
+class WishlistCheckRequest(BaseModel):
+    product_ids: List[str] = Field(..., max_length=100)
+
+class WishlistCheckResponse(BaseModel):
+    product_ids: List[str]
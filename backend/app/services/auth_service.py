@@ -1,10 +1,12 @@
 from sqlalchemy.orm import Session
 from app.models.orm_models import User, Credential, Session as UserSession, Token as UserToken, TokenType
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.core.metrics import instrumented
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
 import uuid
 
+@instrumented
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
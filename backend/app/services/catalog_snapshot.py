@@ -0,0 +1,533 @@
+"""
+Immutable, memory-mapped catalog snapshot shared by all workers.
+
+Products and categories are written column by column into one file: fixed
+width columns as packed int arrays, strings as an offsets array plus a UTF-8
+blob, nullable columns with a byte mask. Rows are sorted by ID, so a lookup
+is a binary search over the mapped ID column. Every worker maps the same file
+read-only; the page cache holds one copy however many workers there are, and
+nothing is decoded until a row is read.
+
+Publishing writes a new file next to the current one and renames it into
+place under a Postgres advisory lock, so builds from different workers are
+serialized and the newest always wins. A build that gets the lock after
+another worker published a file read after its triggering write skips
+itself, so a burst of writes across workers costs one or two builds rather
+than one per worker. Workers notice a new file with a
+throttled `stat` and remap it; readers holding the old map keep a consistent
+view until they drop it.
+
+A worker that commits a catalog write stops serving from the snapshot until
+its own rebuild (debounced by `catalog_snapshot_rebuild_delay_ms`) has been
+published, so it never reads its own write stale. When the invalidation bus
+reports a write from another worker, the mapped file is likewise bypassed
+until a newer one (that worker's rebuild) is mapped. Lookups that miss fall
+back to the database. Snapshots older than `catalog_snapshot_max_age_seconds`
+are rebuilt to pick up writes that bypassed the services; every worker
+notices the age, but only the one that gets the lock without waiting
+rebuilds and the others map its file.
+"""
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import BigInteger, String, case, cast, func, select, text
+from sqlalchemy.orm import Session
+from app.core.catalog import get_catalog_version, subscribe
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.orm_models import Category, Product
+from app.services.listing_serializer import CATEGORY_FIELDS, PRODUCT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CATSNAP1"
+_HEADER_LENGTH = struct.Struct("<I")
+_EPOCH = datetime(1970, 1, 1)
+_NULL_INT = -(2 ** 63)
+# pg_advisory_xact_lock key serializing snapshot publication across workers
+_PUBLISH_LOCK = 0x43415453
+
+
+def _epoch_micros(column):
+    """Exact microseconds since the epoch for a timestamp column, computed in SQL."""
+    whole_seconds = cast(func.extract("epoch", func.date_trunc("second", column)), BigInteger)
+    micros = cast(func.extract("microseconds", column), BigInteger) % 1000000
+    return func.coalesce(whole_seconds * 1000000 + micros, _NULL_INT)
+
+
+class _ColumnWriter:
+    def __init__(self):
+        self.sections: Dict[str, dict] = {}
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def _add(self, name: str, typecode: str, data: bytes):
+        self.sections[name] = {"offset": self.size, "length": len(data), "type": typecode}
+        self.chunks.append(data)
+        self.size += len(data)
+        padding = -self.size % 8
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.size += padding
+
+    def ints(self, name: str, typecode: str, values):
+        self._add(name, typecode, array(typecode, values).tobytes())
+
+    def strings(self, name: str, values: Sequence[Optional[str]]):
+        offsets = array("q", [0])
+        blob = bytearray()
+        for value in values:
+            if value is not None:
+                blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        self._add(f"{name}.offsets", "q", offsets.tobytes())
+        self._add(f"{name}.data", "B", bytes(blob))
+        if any(value is None for value in values):
+            self._add(f"{name}.nulls", "B", bytes(value is None for value in values))
+
+    def write(self, path: str, meta: dict):
+        header = json.dumps({**meta, "sections": self.sections}).encode("utf-8")
+        header += b" " * (-(len(MAGIC) + _HEADER_LENGTH.size + len(header)) % 8)
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for chunk in self.chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class _StringColumn:
+    """Sequence view over a mapped string column; decodes one value per access."""
+
+    def __init__(self, offsets: memoryview, data: memoryview, nulls: Optional[memoryview]):
+        self.offsets = offsets
+        self.data = data
+        self.nulls = nulls
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if self.nulls is not None and self.nulls[row]:
+            return None
+        return str(self.data[self.offsets[row]:self.offsets[row + 1]], "utf-8")
+
+
+class CatalogSnapshot:
+    """Read-only view over one mapped snapshot file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header_length, = _HEADER_LENGTH.unpack_from(view, len(MAGIC))
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        self.meta = json.loads(bytes(view[start:start + header_length]))
+        body = view[start + header_length:]
+
+        sections = self.meta["sections"]
+
+        def column(name: str) -> Optional[memoryview]:
+            section = sections.get(name)
+            if section is None:
+                return None
+            return body[section["offset"]:section["offset"] + section["length"]].cast(section["type"])
+
+        def strings(name: str) -> _StringColumn:
+            return _StringColumn(column(f"{name}.offsets"), column(f"{name}.data"), column(f"{name}.nulls"))
+
+        self.generation: int = self.meta["generation"]
+        self.catalog_version: int = self.meta.get("catalog_version", 0)
+        self.built_at: float = self.meta["built_at"]
+        self.product_count: int = self.meta["products"]
+        self.category_count: int = self.meta["categories"]
+
+        self._products = {
+            "id": strings("product.id"), "name": strings("product.name"),
+            "description": strings("product.description"), "brand": strings("product.brand"),
+            "images": strings("product.images"), "tags": strings("product.tags"),
+        }
+        self._product_price = column("product.price")
+        self._product_stock = column("product.stock")
+        self._product_category = column("product.category")
+        self._product_created = column("product.created_at")
+        self._product_updated = column("product.updated_at")
+
+        self._categories = {
+            "id": strings("category.id"), "name": strings("category.name"),
+            "description": strings("category.description"), "parent_id": strings("category.parent_id"),
+        }
+        self._category_active = column("category.is_active")
+        self._category_created = column("category.created_at")
+        self._category_updated = column("category.updated_at")
+
+    @staticmethod
+    def _datetime(micros: int) -> Optional[datetime]:
+        return None if micros == _NULL_INT else _EPOCH + timedelta(microseconds=micros)
+
+    @staticmethod
+    def _find(ids: _StringColumn, entity_id: str) -> Optional[int]:
+        row = bisect.bisect_left(ids, entity_id)
+        if row < len(ids) and ids[row] == entity_id:
+            return row
+        return None
+
+    def _category(self, row: int) -> dict:
+        active = self._category_active[row]
+        values = {
+            "name": self._categories["name"][row],
+            "description": self._categories["description"][row],
+            "parent_id": self._categories["parent_id"][row],
+            "is_active": None if active == 2 else bool(active),
+            "id": self._categories["id"][row],
+            "created_at": self._datetime(self._category_created[row]),
+            "updated_at": self._datetime(self._category_updated[row]),
+        }
+        return {name: values[name] for name in CATEGORY_FIELDS}
+
+    def _product(self, row: int) -> dict:
+        price = self._product_price[row]
+        stock = self._product_stock[row]
+        images = self._products["images"][row]
+        tags = self._products["tags"][row]
+        values = {
+            "name": self._products["name"][row],
+            "description": self._products["description"][row],
+            "price": None if price == _NULL_INT else Decimal(price).scaleb(-2),
+            "brand": self._products["brand"][row],
+            "images": None if images is None else json.loads(images),
+            "tags": None if tags is None else json.loads(tags),
+            "stock": None if stock == _NULL_INT else stock,
+            "id": self._products["id"][row],
+            "created_at": self._datetime(self._product_created[row]),
+            "updated_at": self._datetime(self._product_updated[row]),
+        }
+        category_row = self._product_category[row]
+        category = self._category(category_row) if category_row >= 0 else None
+        values["category_id"] = category["id"] if category else None
+        product = {name: values[name] for name in PRODUCT_FIELDS}
+        product["category"] = category
+        product["in_wishlist"] = None
+        return product
+
+    def get_product(self, product_id: str) -> Optional[dict]:
+        """The product as listing_serializer.product_row would build it, or None if absent."""
+        row = self._find(self._products["id"], product_id)
+        return None if row is None else self._product(row)
+
+    def get_category(self, category_id: str) -> Optional[dict]:
+        row = self._find(self._categories["id"], category_id)
+        return None if row is None else self._category(row)
+
+    def get_categories(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        parent_id: Optional[str] = None,
+        search: Optional[str] = None,
+        active_only: bool = True
+    ) -> Tuple[List[dict], int]:
+        """Same filters as CategoryService.get_categories, ordered by ID."""
+        search = search.lower() if search else None
+        names, descriptions = self._categories["name"], self._categories["description"]
+        parents = self._categories["parent_id"]
+        rows = []
+        for row in range(self.category_count):
+            if active_only and self._category_active[row] != 1:
+                continue
+            if parent_id is not None and parents[row] != parent_id:
+                continue
+            if search and search not in (names[row] or "").lower() and search not in (descriptions[row] or "").lower():
+                continue
+            rows.append(row)
+        return [self._category(row) for row in rows[skip:skip + limit]], len(rows)
+
+
+def build_snapshot(
+    db: Session,
+    path: str,
+    catalog_version: int = 0,
+    not_before: Optional[float] = None,
+    wait: bool = True
+) -> Optional[dict]:
+    """Read the catalog and publish a new snapshot file at `path`. Returns its metadata.
+
+    When the published file was read at or after `not_before` (a wall-clock
+    time) it is kept and its metadata is returned with `skipped` set. With
+    `wait=False` the build is abandoned, returning None, if another worker
+    holds the publish lock.
+    """
+    # Serializes builds across workers, so the file renamed into place last is the newest
+    if wait:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PUBLISH_LOCK})
+    elif not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _PUBLISH_LOCK}).scalar():
+        db.rollback()
+        return None
+    try:
+        published = None
+        if os.path.exists(path):
+            try:
+                published = CatalogSnapshot(path)
+            except Exception:
+                logger.warning("Replacing unreadable catalog snapshot %s", path)
+        if published is not None and not_before is not None and published.built_at >= not_before:
+            db.commit()
+            return {
+                "generation": published.generation,
+                "catalog_version": published.catalog_version,
+                "built_at": published.built_at,
+                "products": published.product_count,
+                "categories": published.category_count,
+                "skipped": True,
+            }
+
+        # Taken before the first read, so the file holds every write committed before this time
+        built_at = time.time()
+        # Values come back already encoded (cents, epoch microseconds, JSON text) so no per-row
+        # type processing runs in Python. Rows are sorted here rather than by ORDER BY because
+        # lookups bisect in code point order, not the database collation.
+        categories = sorted(db.execute(select(
+            Category.id, Category.name, Category.description, Category.parent_id,
+            case((Category.is_active.is_(None), 2), (Category.is_active, 1), else_=0),
+            _epoch_micros(Category.created_at), _epoch_micros(Category.updated_at)
+        )).all())
+        products = sorted(db.execute(select(
+            Product.id, Product.name, Product.description,
+            func.coalesce(cast(Product.price * 100, BigInteger), _NULL_INT), Product.category_id, Product.brand,
+            cast(func.array_to_json(Product.images), String), cast(func.array_to_json(Product.tags), String),
+            func.coalesce(cast(Product.stock, BigInteger), _NULL_INT),
+            _epoch_micros(Product.created_at), _epoch_micros(Product.updated_at)
+        )).all())
+
+        category_rows = {row[0]: index for index, row in enumerate(categories)}
+        columns = list(zip(*categories)) or [()] * 7
+        writer = _ColumnWriter()
+        writer.strings("category.id", columns[0])
+        writer.strings("category.name", columns[1])
+        writer.strings("category.description", columns[2])
+        writer.strings("category.parent_id", columns[3])
+        writer.ints("category.is_active", "B", columns[4])
+        writer.ints("category.created_at", "q", columns[5])
+        writer.ints("category.updated_at", "q", columns[6])
+
+        columns = list(zip(*products)) or [()] * 11
+        writer.strings("product.id", columns[0])
+        writer.strings("product.name", columns[1])
+        writer.strings("product.description", columns[2])
+        writer.ints("product.price", "q", columns[3])
+        writer.ints("product.category", "i", [category_rows.get(category_id, -1) for category_id in columns[4]])
+        writer.strings("product.brand", columns[5])
+        writer.strings("product.images", columns[6])
+        writer.strings("product.tags", columns[7])
+        writer.ints("product.stock", "q", columns[8])
+        writer.ints("product.created_at", "q", columns[9])
+        writer.ints("product.updated_at", "q", columns[10])
+
+        meta = {
+            "generation": (published.generation if published is not None else 0) + 1,
+            "catalog_version": catalog_version,
+            "built_at": built_at,
+            "products": len(products),
+            "categories": len(categories),
+        }
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        writer.write(tmp_path, meta)
+        os.replace(tmp_path, path)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {**meta, "bytes": writer.size}
+
+
+class CatalogSnapshotManager:
+    """Keeps this worker's mapping of the snapshot current and rebuilds it after local writes."""
+
+    def __init__(self, path: str, check_interval_ms: int, rebuild_delay_ms: int, max_age_seconds: int):
+        self.path = path
+        self.check_interval = check_interval_ms / 1000
+        self.rebuild_delay = rebuild_delay_ms / 1000
+        self.max_age_seconds = max_age_seconds
+        self.enabled = False
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._file_id = None
+        self._checked_at = 0.0
+        self._writes = 0
+        self._written_at = 0.0
+        self._fresh_writes = 0
+        self._remote_written_at = 0.0
+        self._lock = threading.Lock()
+        self._rebuild_timer: Optional[threading.Timer] = None
+        self._building = False
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+
+    def start(self):
+        """Map the published snapshot, building one in the background if there is none."""
+        self.enabled = True
+        self._fresh_writes = self._writes
+        self._remap()
+        if self._snapshot is None:
+            self.schedule_rebuild(0)
+
+    def stop(self):
+        self.enabled = False
+        with self._lock:
+            if self._rebuild_timer is not None:
+                self._rebuild_timer.cancel()
+                self._rebuild_timer = None
+
+    def _remap(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id == self._file_id:
+            return
+        try:
+            snapshot = CatalogSnapshot(self.path)
+        except Exception:
+            logger.exception("Could not map catalog snapshot %s", self.path)
+            return
+        # A plain reference swap: readers keep whichever map they already hold
+        self._snapshot, self._file_id = snapshot, file_id
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """The snapshot to serve reads from, or None to read from the database."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._remap()
+            snapshot = self._snapshot
+            if snapshot is not None and time.time() - snapshot.built_at > self.max_age_seconds:
+                self.schedule_rebuild(0, refresh=True)
+        if self._stale():
+            return None
+        return self._snapshot
+
+    def _stale(self) -> bool:
+        # This worker wrote since the last build it published, or another worker
+        # wrote and no snapshot read after that write has been mapped yet
+        snapshot = self._snapshot
+        remote_stale = snapshot is not None and snapshot.built_at < self._remote_written_at
+        return self._fresh_writes < self._writes or remote_stale
+
+    def schedule_rebuild(self, delay: Optional[float] = None, refresh: bool = False):
+        """Rebuild after `delay` seconds. A `refresh` (max-age) rebuild gives way to any concurrent build."""
+        with self._lock:
+            if not self.enabled or self._rebuild_timer is not None:
+                return
+            self._rebuild_timer = threading.Timer(
+                self.rebuild_delay if delay is None else delay, self._rebuild, kwargs={"refresh": refresh}
+            )
+            self._rebuild_timer.daemon = True
+            self._rebuild_timer.start()
+
+    def _rebuild(self, refresh: bool = False):
+        with self._lock:
+            self._rebuild_timer = None
+            if self._building:
+                return
+            self._building = True
+        # Read in this order so `written_at` is no older than any write counted in `writes`
+        writes = self._writes
+        not_before = self._written_at
+        if refresh:
+            not_before = max(not_before, time.time() - self.max_age_seconds)
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            meta = build_snapshot(db, self.path, get_catalog_version(), not_before=not_before, wait=not refresh)
+            if meta is not None:
+                # Built here or by another worker, the mapped file now holds these writes
+                self._remap()
+                self._fresh_writes = max(self._fresh_writes, writes)
+                if not meta.get("skipped"):
+                    self.builds += 1
+                    self.last_build_ms = (time.perf_counter() - start) * 1000
+        except Exception:
+            logger.exception("Catalog snapshot rebuild failed")
+        finally:
+            db.close()
+            with self._lock:
+                self._building = False
+        if self._writes > self._fresh_writes:
+            # Writes landed while building
+            self.schedule_rebuild()
+
+    def on_catalog_change(self, kind: str, entity_id: str, entity):
+        # Called after the commit, so a file read from now on holds this write
+        self._written_at = time.time()
+        self._writes += 1
+        if self.enabled:
+            self.schedule_rebuild()
+
+    def on_remote_change(self, kind: str, entity_id: str, entity):
+        # Heard after the remote commit, so a snapshot built from now on holds it.
+        # The writing worker publishes that rebuild; look for it on the next read
+        self._remote_written_at = time.time()
+        self._checked_at = 0.0
+
+    def get_product(self, product_id: str) -> Optional[dict]:
+        snapshot = self.current()
+        product = snapshot.get_product(product_id) if snapshot is not None else None
+        if product is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return product
+
+    def get_category(self, category_id: str) -> Optional[dict]:
+        snapshot = self.current()
+        category = snapshot.get_category(category_id) if snapshot is not None else None
+        if category is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return category
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "generation": snapshot.generation if snapshot else None,
+            "products": snapshot.product_count if snapshot else 0,
+            "categories": snapshot.category_count if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.built_at, 3) if snapshot else None,
+            "stale": self._stale(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "builds": self.builds,
+            "last_build_ms": round(self.last_build_ms, 3),
+        }
+
+
+catalog_snapshot = CatalogSnapshotManager(
+    path=settings.catalog_snapshot_path,
+    check_interval_ms=settings.catalog_snapshot_check_interval_ms,
+    rebuild_delay_ms=settings.catalog_snapshot_rebuild_delay_ms,
+    max_age_seconds=settings.catalog_snapshot_max_age_seconds
+)
+
+subscribe(catalog_snapshot.on_catalog_change, origin="local")
+subscribe(catalog_snapshot.on_remote_change, origin="remote")
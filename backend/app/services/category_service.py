@@ -1,11 +1,19 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_, select
 from app.models.orm_models import Category, Product
 from app.schemas.product import CategoryCreate, CategoryUpdate
+from app.core.catalog import publish_change
+from app.core.invalidation import record_change
+from app.core.metrics import instrumented
+from app.services.listing_serializer import category_row, select_categories
+from app.services.product_service import ProductService
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.single_flight import coalesced
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import uuid
 
+@instrumented
 class CategoryService:
     def __init__(self, db: Session):
         self.db = db
@@ -35,8 +43,10 @@ class CategoryService:
         )
         
         self.db.add(category)
+        record_change(self.db, "category", category.id)
         self.db.commit()
         self.db.refresh(category)
+        publish_change("category", category.id, category)
         return category
 
     def get_category(self, category_id: str) -> Category:
@@ -49,6 +59,20 @@ class CategoryService:
             )
         return category
 
+    @coalesced("category")
+    def get_category_data(self, category_id: str) -> dict:
+        """A category as a response-ready dict, from the catalog snapshot when it has it."""
+        category = catalog_snapshot.get_category(category_id)
+        if category is not None:
+            return category
+        row = self.db.execute(select_categories().where(Category.id == category_id)).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found"
+            )
+        return category_row(row)
+
     def get_categories(
         self, 
         skip: int = 0, 
@@ -58,21 +82,7 @@ class CategoryService:
         active_only: bool = True
     ) -> tuple[List[Category], int]:
         """Get categories with filtering and pagination."""
-        query = self.db.query(Category)
-        
-        # Apply filters
-        if parent_id is not None:
-            query = query.filter(Category.parent_id == parent_id)
-        
-        if search:
-            search_filter = or_(
-                Category.name.ilike(f"%{search}%"),
-                Category.description.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
-        
-        if active_only:
-            query = query.filter(Category.is_active == True)
+        query = self.db.query(Category).filter(*self._filters(parent_id, search, active_only))
         
         # Get total count
         total = query.count()
@@ -81,6 +91,41 @@ class CategoryService:
         categories = query.offset(skip).limit(limit).all()
         
         return categories, total
+
+    @coalesced("category_rows")
+    def get_category_rows(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        parent_id: Optional[str] = None,
+        search: Optional[str] = None,
+        active_only: bool = True
+    ) -> tuple[List[dict], int]:
+        """Same page as get_categories, as response-ready dicts from the catalog snapshot or one projected query."""
+        snapshot = catalog_snapshot.current()
+        if snapshot is not None:
+            return snapshot.get_categories(skip, limit, parent_id, search, active_only)
+
+        filters = self._filters(parent_id, search, active_only)
+        total = self.db.execute(select(func.count()).select_from(Category).where(*filters)).scalar_one()
+        rows = self.db.execute(select_categories().where(*filters).offset(skip).limit(limit))
+        return [category_row(row) for row in rows], total
+
+    @staticmethod
+    def _filters(parent_id: Optional[str], search: Optional[str], active_only: bool) -> list:
+        filters = []
+        if parent_id is not None:
+            filters.append(Category.parent_id == parent_id)
+        
+        if search:
+            filters.append(or_(
+                Category.name.ilike(f"%{search}%"),
+                Category.description.ilike(f"%{search}%")
+            ))
+        
+        if active_only:
+            filters.append(Category.is_active == True)
+        return filters
         
     def update_category(self, category_id: str, category_data: CategoryUpdate) -> Category:
         """Update a category."""
@@ -116,9 +161,11 @@ class CategoryService:
         update_data = category_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(category, field, value)
+        record_change(self.db, "category", category.id)
         
         self.db.commit()
         self.db.refresh(category)
+        publish_change("category", category.id, category)
         return category
 
     def delete_category(self, category_id: str) -> bool:
@@ -142,7 +189,9 @@ class CategoryService:
             )
         
         self.db.delete(category)
+        record_change(self.db, "category", category_id)
         self.db.commit()
+        publish_change("category", category_id)
         return True
 
     def get_category_with_products(self, category_id: str, skip: int = 0, limit: int = 20) -> tuple[Category, List[Product], int]:
@@ -155,3 +204,15 @@ class CategoryService:
         products = products_query.offset(skip).limit(limit).all()
         
         return category, products, total_products
+
+    @coalesced("category_product_rows")
+    def get_category_product_rows(
+        self,
+        category_id: str,
+        skip: int = 0,
+        limit: int = 20,
+        fields: Optional[Sequence[str]] = None
+    ) -> tuple[List[dict], int]:
+        """Products in a category as response-ready dicts; 404 if the category does not exist."""
+        self.get_category(category_id)
+        return ProductService(self.db).get_product_rows(skip=skip, limit=limit, category_id=category_id, fields=fields)
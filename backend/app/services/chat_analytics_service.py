@@ -0,0 +1,212 @@
+"""
+Daily chat analytics rollups.
+
+`run_rollup` folds assistant messages and session feedback created since the
+last run into one `chat_rollups` row per (day, provider, system type): counts,
+token and cost sums, feedback sums and mergeable latency sketches. Grouping
+and sketch bucketing happen in SQL, so a run reads only new rows and returns
+only aggregates. Reports read the rollup table alone.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import instrumented
+from app.models.orm_models import (
+    AISystemType, ChatMessage, ChatRollup, ChatSession, MessageRole, RollupWatermark, UserFeedback
+)
+from app.services.latency_sketch import LatencySketch, bucket_expression
+
+WATERMARK = "chat_rollups"
+
+RollupKey = Tuple[date, str, AISystemType]
+
+
+def _new_rollup() -> dict:
+    return {
+        "message_count": 0, "token_count": 0, "cost": Decimal("0"),
+        "latency": LatencySketch(), "first_token": LatencySketch(),
+        "feedback_count": 0, "feedback_sum": 0,
+    }
+
+
+@instrumented
+class ChatAnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _dimensions(created_at):
+        return (
+            func.date(created_at),
+            func.coalesce(cast(ChatSession.llm_preference, String), "DEFAULT"),
+            func.coalesce(ChatSession.system_type, AISystemType.GENERAL_LLM),
+        )
+
+    def _lock_watermark(self) -> RollupWatermark:
+        """Lock the watermark row so concurrent runs cannot double count."""
+        self.db.execute(
+            insert(RollupWatermark)
+            .values(name=WATERMARK, processed_until=datetime.min)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        watermark = self.db.execute(
+            select(RollupWatermark).where(RollupWatermark.name == WATERMARK).with_for_update()
+        ).scalar_one()
+        return watermark
+
+    def _collect_messages(self, rollups: Dict[RollupKey, dict], since: datetime, until: datetime):
+        dimensions = self._dimensions(ChatMessage.created_at)
+        window = (
+            ChatMessage.role == MessageRole.SYSTEM,
+            ChatMessage.created_at > since,
+            ChatMessage.created_at <= until,
+        )
+
+        totals = self.db.execute(
+            select(
+                *dimensions, func.count(),
+                func.coalesce(func.sum(ChatMessage.token_count), 0),
+                func.coalesce(func.sum(ChatMessage.cost), 0)
+            )
+            .join(ChatSession, ChatMessage.session_id == ChatSession.id)
+            .where(*window)
+            .group_by(*dimensions)
+        )
+        for day, provider, system_type, count, tokens, cost in totals:
+            rollup = rollups[(day, provider, system_type)]
+            rollup["message_count"] += count
+            rollup["token_count"] += int(tokens)
+            rollup["cost"] += Decimal(cost)
+
+        for column, sketch in ((ChatMessage.response_time, "latency"), (ChatMessage.first_token_time, "first_token")):
+            bucket = bucket_expression(column)
+            buckets = self.db.execute(
+                select(*dimensions, bucket, func.count())
+                .join(ChatSession, ChatMessage.session_id == ChatSession.id)
+                .where(*window, column.isnot(None))
+                .group_by(*dimensions, bucket)
+            )
+            for day, provider, system_type, key, count in buckets:
+                rollups[(day, provider, system_type)][sketch].add_bucket(key, count)
+
+    def _collect_feedback(self, rollups: Dict[RollupKey, dict], since: datetime, until: datetime):
+        dimensions = self._dimensions(UserFeedback.created_at)
+        rows = self.db.execute(
+            select(*dimensions, func.count(), func.coalesce(func.sum(UserFeedback.rating), 0))
+            .join(ChatSession, UserFeedback.session_id == ChatSession.id)
+            .where(
+                UserFeedback.created_at > since,
+                UserFeedback.created_at <= until,
+                UserFeedback.rating.isnot(None)
+            )
+            .group_by(*dimensions)
+        )
+        for day, provider, system_type, count, rating_sum in rows:
+            rollup = rollups[(day, provider, system_type)]
+            rollup["feedback_count"] += count
+            rollup["feedback_sum"] += int(rating_sum)
+
+    def _merge(self, rollups: Dict[RollupKey, dict]):
+        """Add the new aggregates into the stored rollup rows."""
+        days = {key[0] for key in rollups}
+        existing = {
+            (row.day, row.provider, row.system_type): row
+            for row in self.db.execute(
+                select(ChatRollup).where(ChatRollup.day.in_(days)).with_for_update()
+            ).scalars()
+        }
+        for key, rollup in rollups.items():
+            row = existing.get(key)
+            if row is None:
+                row = ChatRollup(
+                    day=key[0], provider=key[1], system_type=key[2],
+                    message_count=0, token_count=0, cost=Decimal("0"),
+                    latency_sketch={}, first_token_sketch={}, feedback_count=0, feedback_sum=0
+                )
+                self.db.add(row)
+            row.message_count += rollup["message_count"]
+            row.token_count += rollup["token_count"]
+            row.cost += rollup["cost"]
+            row.feedback_count += rollup["feedback_count"]
+            row.feedback_sum += rollup["feedback_sum"]
+            row.latency_sketch = LatencySketch(row.latency_sketch).merge(rollup["latency"]).to_dict()
+            row.first_token_sketch = LatencySketch(row.first_token_sketch).merge(rollup["first_token"]).to_dict()
+
+    def run_rollup(self, until: Optional[datetime] = None) -> dict:
+        """Fold rows created since the previous run into the rollups, in one transaction.
+
+        Rows newer than `analytics_rollup_lag_seconds` are left for the next run so
+        that transactions still in flight are not skipped by the watermark.
+        """
+        until = until or datetime.utcnow() - timedelta(seconds=settings.analytics_rollup_lag_seconds)
+        try:
+            watermark = self._lock_watermark()
+            since = watermark.processed_until
+            if until <= since:
+                self.db.rollback()
+                return {"since": since, "until": since, "rollups": 0}
+
+            rollups: Dict[RollupKey, dict] = defaultdict(_new_rollup)
+            self._collect_messages(rollups, since, until)
+            self._collect_feedback(rollups, since, until)
+            self._merge(rollups)
+            watermark.processed_until = until
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return {"since": since, "until": until, "rollups": len(rollups)}
+
+    def get_rollups(
+        self,
+        start: date,
+        end: date,
+        provider: Optional[str] = None,
+        system_type: Optional[AISystemType] = None,
+        per_day: bool = True
+    ) -> List[dict]:
+        """Report rows from the rollup table, per day or merged over the whole range."""
+        query = select(ChatRollup).where(ChatRollup.day >= start, ChatRollup.day <= end)
+        if provider:
+            query = query.where(ChatRollup.provider == provider)
+        if system_type:
+            query = query.where(ChatRollup.system_type == system_type)
+        rows = self.db.execute(query.order_by(ChatRollup.day, ChatRollup.provider, ChatRollup.system_type)).scalars()
+
+        groups: Dict[tuple, dict] = {}
+        for row in rows:
+            key = (row.day if per_day else None, row.provider, row.system_type)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = _new_rollup()
+            group["message_count"] += row.message_count
+            group["token_count"] += row.token_count
+            group["cost"] += row.cost
+            group["feedback_count"] += row.feedback_count
+            group["feedback_sum"] += row.feedback_sum
+            group["latency"].merge(LatencySketch(row.latency_sketch))
+            group["first_token"].merge(LatencySketch(row.first_token_sketch))
+
+        return [
+            {
+                "day": day,
+                "provider": provider,
+                "system_type": system_type,
+                "message_count": group["message_count"],
+                "token_count": group["token_count"],
+                "cost": group["cost"],
+                "latency_p50": group["latency"].quantile(0.5),
+                "latency_p95": group["latency"].quantile(0.95),
+                "latency_p99": group["latency"].quantile(0.99),
+                "first_token_p50": group["first_token"].quantile(0.5),
+                "first_token_p95": group["first_token"].quantile(0.95),
+                "feedback_count": group["feedback_count"],
+                "feedback_avg": group["feedback_sum"] / group["feedback_count"] if group["feedback_count"] else None,
+            }
+            for (day, provider, system_type), group in groups.items()
+        ]
@@ -0,0 +1,236 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from app.models.orm_models import ChatSession, ChatMessage
+from app.schemas.chat import ChatSessionCreate, ChatMessageCreate
+from app.core.config import settings
+from app.core.metrics import instrumented
+from app.services.telemetry_writer import telemetry_writer, write_batch
+from fastapi import HTTPException, status
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import List, Optional
+import base64
+import threading
+import uuid
+
+
+class RecentMessageCache:
+    """Bounded per-session cache of the latest turns, used for prompt assembly.
+
+    Holds at most `max_sessions` sessions (least recently used are evicted) and
+    at most `max_messages` turns per session. The cache is per process and other
+    workers may append to the same session, so `get_recent_turns` checks an
+    entry against the session's newest stored message before using it.
+    """
+
+    def __init__(self, max_sessions: int, max_messages: int):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[List[dict]]:
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(turns)
+
+    def set(self, session_id: str, turns: List[dict]):
+        with self._lock:
+            self._sessions[session_id] = deque(turns, maxlen=self.max_messages)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def extend(self, session_id: str, turns: List[dict]):
+        """Append turns to a cached session. Sessions not in the cache are left alone."""
+        with self._lock:
+            cached = self._sessions.get(session_id)
+            if cached is not None:
+                cached.extend(turns)
+                self._sessions.move_to_end(session_id)
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+recent_messages = RecentMessageCache(
+    max_sessions=settings.chat_recent_sessions,
+    max_messages=settings.chat_recent_messages
+)
+
+
+def encode_cursor(created_at: datetime, message_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), message_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _to_turn(message: dict) -> dict:
+    return {
+        "id": message["id"],
+        "role": message["role"],
+        "content": message["content"],
+        "created_at": message["created_at"],
+    }
+
+
+def _session_messages(chat_session: ChatSession) -> list:
+    """WHERE clauses for a session's messages.
+
+    No message predates its session, so bounding created_at by the session's
+    creation limits the scan to the monthly partitions from then on.
+    """
+    return [ChatMessage.session_id == chat_session.id, ChatMessage.created_at >= chat_session.created_at]
+
+
+@instrumented
+class ChatHistoryService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_session(self, session_data: ChatSessionCreate, user_id: Optional[str] = None) -> ChatSession:
+        """Create a new chat session."""
+        chat_session = ChatSession(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            **session_data.dict()
+        )
+
+        self.db.add(chat_session)
+        self.db.commit()
+        self.db.refresh(chat_session)
+        recent_messages.set(chat_session.id, [])
+        return chat_session
+
+    def get_session(self, session_id: str, user_id: Optional[str] = None) -> ChatSession:
+        """Get a chat session by ID. Sessions owned by another user are reported as missing."""
+        chat_session = self.db.query(ChatSession).filter(ChatSession.id == session_id).first()
+        if not chat_session or (chat_session.user_id and chat_session.user_id != user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat session not found"
+            )
+        return chat_session
+
+    def get_messages(
+        self,
+        chat_session: ChatSession,
+        before: Optional[str] = None,
+        limit: int = 20
+    ) -> tuple[List[ChatMessage], Optional[str]]:
+        """Get a page of messages, newest page first.
+
+        Uses keyset pagination on (created_at, id) over the (session_id, created_at)
+        index, so every page is an index range scan regardless of history length.
+        Messages within the page are returned oldest first; the returned cursor
+        points at the next (older) page, or is None when there is nothing older.
+        """
+        telemetry_writer.flush_session(chat_session.id)
+        query = self.db.query(ChatMessage).filter(*_session_messages(chat_session))
+
+        if before:
+            created_at, message_id = decode_cursor(before)
+            query = query.filter(
+                tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(created_at, message_id)
+            )
+
+        rows = query.order_by(
+            ChatMessage.created_at.desc(), ChatMessage.id.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        rows.reverse()
+        return rows, next_cursor
+
+    def append_messages(
+        self,
+        session_id: str,
+        messages: List[ChatMessageCreate],
+        write_behind: bool = True
+    ) -> List[dict]:
+        """Append several turns to a session.
+
+        By default rows go through the telemetry write-behind buffer, which inserts
+        them with multi-row INSERTs off the request path; with `write_behind=False`
+        they are committed before returning. The recent-turns cache is updated
+        immediately either way so the next prompt sees them.
+        """
+        now = datetime.utcnow()
+
+        # Spread timestamps by a microsecond so turns keep their order in the index
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "created_at": now + timedelta(microseconds=i),
+                "is_processed": True,
+                **message.dict()
+            }
+            for i, message in enumerate(messages)
+        ]
+
+        if write_behind:
+            telemetry_writer.submit(self.db, {ChatMessage: rows}, session_id=session_id, touched_at=now)
+        else:
+            write_batch(self.db, {ChatMessage: rows}, {session_id: now}, settings.telemetry_batch_size)
+        recent_messages.extend(session_id, [_to_turn(row) for row in rows])
+        return rows
+
+    def get_recent_turns(self, chat_session: ChatSession) -> List[dict]:
+        """Get the latest turns for prompt assembly, from the cache when possible.
+
+        A cached entry is used while the newest stored message is one of its turns
+        (or nothing is stored yet, its turns all being queued here); one index probe.
+        Otherwise another worker appended to the session and the turns are reloaded.
+        """
+        session_id = chat_session.id
+        turns = recent_messages.get(session_id)
+        if turns is not None:
+            latest = self.db.query(ChatMessage.id).filter(
+                *_session_messages(chat_session)
+            ).order_by(
+                ChatMessage.created_at.desc(), ChatMessage.id.desc()
+            ).limit(1).scalar()
+            if latest is None or any(turn["id"] == latest for turn in turns):
+                return turns
+            # This worker's queued turns must be stored before reloading replaces the entry
+            telemetry_writer.flush_session(session_id)
+
+        rows = self.db.query(
+            ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at
+        ).filter(
+            *_session_messages(chat_session)
+        ).order_by(
+            ChatMessage.created_at.desc(), ChatMessage.id.desc()
+        ).limit(recent_messages.max_messages).all()
+
+        turns = [_to_turn(row._mapping) for row in reversed(rows)]
+        recent_messages.set(session_id, turns)
+        return turns
+
+    def delete_session(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        """Delete a chat session and its messages."""
+        chat_session = self.get_session(session_id, user_id)
+        telemetry_writer.flush_session(session_id)
+        self.db.delete(chat_session)
+        self.db.commit()
+        recent_messages.discard(session_id)
+        return True
@@ -0,0 +1,192 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.models.orm_models import ChatSession, MessageRole, ActionType, Product
+from app.schemas.chat import ChatMessageCreate
+from app.services.chat_history_service import ChatHistoryService
+from app.services.intent_router import intent_router
+from app.services.llm_provider import LLMClient, get_llm_client
+from app.services.product_service import ProductService
+from app.services.prompt_context import PromptContextBuilder
+from app.core.catalog import get_catalog_version
+from app.core.config import settings
+from app.core.metrics import instrumented
+from decimal import Decimal
+from typing import AsyncIterator, List, Optional
+import time
+
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+@instrumented
+class ChatStreamService:
+    def __init__(self, db: Session, llm_client: Optional[LLMClient] = None):
+        self.db = db
+        self.history = ChatHistoryService(db)
+        self.llm_client = llm_client
+
+    def build_context(self, content: str) -> Optional[dict]:
+        """System message with summaries of the products most relevant to the message."""
+        if settings.chat_context_products <= 0:
+            return None
+        from app.services.content_similarity import ContentSimilarityService
+        candidates = ContentSimilarityService(self.db).search(content, settings.chat_context_products)
+        context = PromptContextBuilder(self.db).build(
+            [product_id for product_id, _ in candidates], settings.chat_context_max_tokens
+        )
+        if not context.product_ids:
+            return None
+        return {"role": "system", "content": context.text}
+
+    def build_messages(
+        self,
+        chat_session: ChatSession,
+        content: str,
+        turns: Optional[List[dict]] = None
+    ) -> List[dict]:
+        """Build the provider prompt from catalog context, recent turns and the new user message."""
+        if turns is None:
+            turns = self.history.get_recent_turns(chat_session)
+        context = self.build_context(content)
+        messages = [context] if context else []
+        messages += [
+            {
+                "role": "user" if turn["role"] == MessageRole.USER else "assistant",
+                "content": turn["content"]
+            }
+            for turn in turns
+        ]
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    async def _replay(self, tokens: List[str]) -> AsyncIterator[str]:
+        for token in tokens:
+            yield token
+
+    @staticmethod
+    def format_products(products: List[Product], total: int) -> List[str]:
+        """Render a direct catalog answer as one token per line."""
+        lines = [f"I found {total} matching product{'s' if total != 1 else ''}. Here are the top results:\n"]
+        for product in products:
+            brand = f" by {product.brand}" if product.brand else ""
+            price = f"${product.price:.2f}" if product.price is not None else "price n/a"
+            lines.append(f"- {product.name}{brand}: {price}\n")
+        return lines
+
+    async def stream_reply(self, chat_session: ChatSession, content: str) -> AsyncIterator[dict]:
+        """Stream an assistant reply as events, then persist both turns.
+
+        Yields {"type": "token"} events as the provider produces them and a final
+        {"type": "done"} event carrying the stored message ID and timings.
+        Time-to-first-token and total response time are measured from the moment
+        the request reaches this service. Plain product searches recognised by the
+        intent router are answered from the catalog, and replies found in the
+        response cache are replayed; both skip the provider and are stored at zero cost.
+        Only a session's opening turn uses the response cache: later replies depend
+        on the session's own history and are never shared with other sessions.
+        """
+        from app.services.response_cache import response_cache, cache_stats
+
+        start = time.perf_counter()
+        catalog_version = get_catalog_version()
+
+        # Plain product searches are answered straight from the catalog
+        decision, products = None, []
+        if settings.intent_router_enabled:
+            intent_router.refresh(self.db)
+            decision = intent_router.route(content)
+            if decision.is_direct:
+                products, total = ProductService(self.db).get_products(
+                    limit=settings.intent_router_max_results, **decision.filters
+                )
+
+        turns = None if products else self.history.get_recent_turns(chat_session)
+        cacheable = settings.response_cache_enabled and not products and not turns
+        cached, similarity = None, 0.0
+        if cacheable:
+            cached, similarity = response_cache.get(content, catalog_version)
+
+        if products:
+            client = None
+            messages = []
+            token_source = self._replay(self.format_products(products, total))
+        elif cached:
+            client = None
+            messages = []
+            token_source = self._replay(cached.tokens)
+        else:
+            client = self.llm_client or get_llm_client(chat_session.llm_preference)
+            messages = self.build_messages(chat_session, content, turns)
+            token_source = client.stream(messages)
+
+        first_token_time = None
+        tokens = []
+        async for token in token_source:
+            if first_token_time is None:
+                first_token_time = _elapsed_ms(start)
+            tokens.append(token)
+            yield {"type": "token", "content": token}
+
+        response_time = _elapsed_ms(start)
+
+        action_type = ActionType.GENERAL_QUERY
+        if products:
+            model_used = "intent-router"
+            token_count = 0
+            cost = Decimal("0")
+            action_type = decision.action_type
+            action_data = {**decision.as_action_data(), "product_ids": [product.id for product in products]}
+        elif cached:
+            model_used = cached.model
+            token_count = 0
+            cost = Decimal("0")
+            action_data = {"cache_hit": True, "similarity": round(similarity, 4)}
+            cache_stats.record_hit(chat_session.id, cached.cost, cached.response_time - response_time)
+        else:
+            model_used = client.model
+            prompt_tokens = sum(client.count_tokens(message["content"]) for message in messages)
+            token_count = prompt_tokens + len(tokens)
+            cost = client.cost(token_count)
+            action_data = None
+            if cacheable:
+                cache_stats.record_miss(chat_session.id)
+                response_cache.put(
+                    content, tokens, catalog_version,
+                    model=model_used,
+                    cost=cost,
+                    response_time=response_time,
+                    token_count=token_count
+                )
+
+        if decision is not None and not products:
+            # A direct search with no results falls back to the provider
+            route = "fallback" if decision.is_direct else "llm"
+            action_data = {**(action_data or {}), "route": route, "routing_us": decision.latency_us}
+
+        # Off the event loop: with the "block" or "sync" backpressure policy a full
+        # telemetry buffer makes this wait for a flush or write inline
+        rows = await run_in_threadpool(self.history.append_messages, chat_session.id, [
+            ChatMessageCreate(role=MessageRole.USER, content=content),
+            ChatMessageCreate(
+                role=MessageRole.SYSTEM,
+                content="".join(tokens),
+                model_used=model_used,
+                action_type=action_type,
+                action_data=action_data,
+                response_time=response_time,
+                first_token_time=first_token_time,
+                token_count=token_count,
+                cost=cost
+            ),
+        ])
+
+        yield {
+            "type": "done",
+            "message_id": rows[-1]["id"],
+            "cached": cached is not None,
+            "routed": bool(products),
+            "first_token_time": first_token_time,
+            "response_time": response_time,
+            "token_count": token_count,
+        }
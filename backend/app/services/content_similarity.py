@@ -0,0 +1,299 @@
+"""
+Content-based product similarity over a sparse TF-IDF matrix.
+
+Each product becomes a document from its name, description, brand, tags and
+category name. Raw term counts are kept in a CSR matrix; TF-IDF weights are
+derived from it with vectorized operations, so a catalog write only has to
+re-tokenize the changed product. Queries, including batches of free-text
+queries, are answered with one sparse matrix product.
+"""
+import re
+import threading
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.catalog import CategoryRenames, subscribe
+from app.core.db import SessionLocal
+from app.core.metrics import instrumented
+from app.models.orm_models import Category, Product
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with", "your", "you",
+}
+
+# Rebuild the count matrix once this share of its rows belongs to deleted or replaced products
+COMPACT_RATIO = 0.2
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOP_WORDS]
+
+
+def product_document(
+    name: Optional[str],
+    description: Optional[str],
+    brand: Optional[str],
+    tags: Optional[List[str]],
+    category_name: Optional[str]
+) -> str:
+    """Text used to represent a product. Name and brand are repeated to weight them up."""
+    parts = [name, name, brand, brand, category_name, " ".join(tags or []), description]
+    return " ".join(part for part in parts if part)
+
+
+class ContentSimilarityEngine:
+    """Incrementally maintained TF-IDF index over product documents."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vocabulary: Dict[str, int] = {}
+        self._counts = sp.csr_matrix((0, 0), dtype=np.float32)
+        self._row_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._pending: Dict[str, Optional[str]] = {}
+        self._tfidf: Optional[sp.csr_matrix] = None
+        self._idf: Optional[np.ndarray] = None
+        self.built = False
+
+    def _term_ids(self, text: str, grow: bool) -> List[int]:
+        if grow:
+            vocabulary = self._vocabulary
+            return [vocabulary.setdefault(token, len(vocabulary)) for token in tokenize(text)]
+        return [self._vocabulary[token] for token in tokenize(text) if token in self._vocabulary]
+
+    def _count_matrix(self, texts: Iterable[str], grow: bool) -> sp.csr_matrix:
+        indptr = [0]
+        indices: List[int] = []
+        for text in texts:
+            indices.extend(self._term_ids(text, grow))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.float32)
+        counts = sp.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self._vocabulary))
+        )
+        counts.sum_duplicates()
+        return counts
+
+    def build(self, documents: Iterable[Tuple[str, str]]):
+        """Build the index from scratch from (product_id, text) pairs."""
+        documents = list(documents)
+        with self._lock:
+            self._vocabulary = {}
+            self._counts = self._count_matrix((text for _, text in documents), grow=True)
+            self._row_ids = [product_id for product_id, _ in documents]
+            self._rows = {product_id: row for row, product_id in enumerate(self._row_ids)}
+            self._pending = {}
+            self._reweight()
+            self.built = True
+
+    def upsert(self, product_id: str, text: str):
+        """Queue a product to be (re)indexed before the next query."""
+        with self._lock:
+            self._pending[product_id] = text
+            self._tfidf = None
+
+    def remove(self, product_id: str):
+        """Queue a product to be dropped before the next query."""
+        with self._lock:
+            self._pending[product_id] = None
+            self._tfidf = None
+
+    def _apply_pending(self):
+        pending, self._pending = self._pending, {}
+
+        # Replaced and deleted products leave a dead row behind
+        dead = [self._rows.pop(product_id) for product_id in pending if product_id in self._rows]
+        for row in dead:
+            self._row_ids[row] = None
+
+        upserts = [(product_id, text) for product_id, text in pending.items() if text is not None]
+        if upserts:
+            new_counts = self._count_matrix((text for _, text in upserts), grow=True)
+            width = len(self._vocabulary)
+            base = sp.csr_matrix(
+                (self._counts.data, self._counts.indices, self._counts.indptr),
+                shape=(self._counts.shape[0], width)
+            )
+            self._counts = sp.vstack([base, new_counts], format="csr")
+            for product_id, _ in upserts:
+                self._rows[product_id] = len(self._row_ids)
+                self._row_ids.append(product_id)
+
+        if dead:
+            if self._dead_ratio() > COMPACT_RATIO:
+                self._compact()
+            else:
+                # Zero the dead rows in place; _reweight drops the explicit zeros
+                for row in dead:
+                    self._counts.data[self._counts.indptr[row]:self._counts.indptr[row + 1]] = 0
+
+    def _dead_ratio(self) -> float:
+        return 1 - len(self._rows) / max(len(self._row_ids), 1)
+
+    def _compact(self):
+        live = [row for row, product_id in enumerate(self._row_ids) if product_id is not None]
+        self._counts = self._counts[live]
+        self._counts.eliminate_zeros()
+        self._row_ids = [self._row_ids[row] for row in live]
+        self._rows = {product_id: row for row, product_id in enumerate(self._row_ids)}
+
+    def _reweight(self):
+        """Derive the L2-normalized TF-IDF matrix from raw counts (sublinear tf, smoothed idf)."""
+        counts = self._counts
+        counts.eliminate_zeros()
+        n_docs = max(len(self._rows), 1)
+        df = np.bincount(counts.indices, minlength=counts.shape[1]).astype(np.float32)
+        self._idf = np.log((1 + n_docs) / (1 + df)).astype(np.float32) + 1.0
+
+        tfidf = counts.copy()
+        tfidf.data = (1.0 + np.log(tfidf.data)) * self._idf[tfidf.indices]
+        self._tfidf = self._normalize(tfidf)
+
+    @staticmethod
+    def _normalize(matrix: sp.csr_matrix) -> sp.csr_matrix:
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms).dot(matrix), dtype=np.float32)
+
+    def _matrix(self) -> sp.csr_matrix:
+        if self._pending:
+            self._apply_pending()
+        if self._tfidf is None:
+            self._reweight()
+        return self._tfidf
+
+    def vectorize(self, texts: List[str]) -> sp.csr_matrix:
+        """TF-IDF vectors for free text, using the current vocabulary and idf."""
+        with self._lock:
+            matrix = self._matrix()
+            counts = self._count_matrix(texts, grow=False)
+            counts = sp.csr_matrix(
+                (counts.data, counts.indices, counts.indptr),
+                shape=(counts.shape[0], matrix.shape[1])
+            )
+            counts.data = (1.0 + np.log(counts.data)) * self._idf[counts.indices]
+            return self._normalize(counts)
+
+    def _top_k(self, queries: sp.csr_matrix, k: int, exclude_rows: Optional[List[int]] = None) -> List[List[Tuple[str, float]]]:
+        """Rank all products for each query row.
+
+        Scores are computed as one sparse x dense product, which costs
+        O(nnz x batch) whatever the vocabulary overlap, then ranked with a
+        vectorized partial sort.
+        """
+        matrix = self._matrix()
+        if queries.shape[0] == 0 or matrix.shape[0] == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        scores = np.ascontiguousarray((matrix @ queries.T.toarray()).T)
+        if exclude_rows is not None:
+            scores[np.arange(len(exclude_rows)), exclude_rows] = 0
+
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1).tolist()
+        top_scores = np.take_along_axis(top_scores, order, axis=1).tolist()
+
+        return [
+            [
+                (self._row_ids[col], score)
+                for col, score in zip(cols, vals)
+                if score > 0 and self._row_ids[col] is not None
+            ]
+            for cols, vals in zip(top, top_scores)
+        ]
+
+    def similar(self, product_ids: List[str], k: int = 10) -> List[List[Tuple[str, float]]]:
+        """Top-k most similar products for each product, in one batched product."""
+        with self._lock:
+            matrix = self._matrix()
+            rows = [self._rows.get(product_id) for product_id in product_ids]
+            known = [row for row in rows if row is not None]
+            found = iter(self._top_k(matrix[known], k, exclude_rows=known))
+            return [next(found) if row is not None else [] for row in rows]
+
+    def search(self, texts: List[str], k: int = 10) -> List[List[Tuple[str, float]]]:
+        """Top-k products for each free-text query, in one batched product."""
+        with self._lock:
+            return self._top_k(self.vectorize(texts), k)
+
+
+content_index = ContentSimilarityEngine()
+
+
+def load_product_documents(db: Session, category_id: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Load (product_id, text) pairs for the catalog, or one category, with one projected query."""
+    query = select(
+        Product.id, Product.name, Product.description, Product.brand,
+        Product.tags, Category.name
+    ).outerjoin(Category, Product.category_id == Category.id)
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    return [
+        (product_id, product_document(name, description, brand, tags, category_name))
+        for product_id, name, description, brand, tags, category_name in db.execute(query)
+    ]
+
+
+def ensure_content_index(db: Session) -> ContentSimilarityEngine:
+    """Build the index on first use."""
+    if not content_index.built:
+        with content_index._lock:
+            if not content_index.built:
+                # Names first: a rename in between only re-indexes that category once more
+                _category_renames.reset(dict(db.execute(select(Category.id, Category.name)).all()))
+                content_index.build(load_product_documents(db))
+    return content_index
+
+
+def _reindex_category(category_id: str):
+    db = SessionLocal()
+    try:
+        for product_id, text in load_product_documents(db, category_id=category_id):
+            content_index.upsert(product_id, text)
+    finally:
+        db.close()
+
+
+_category_renames = CategoryRenames(_reindex_category, "content-category-reindex")
+
+
+def _on_catalog_change(kind: str, entity_id: str, entity):
+    if not content_index.built:
+        return
+    if kind == "product":
+        if entity is None:
+            content_index.remove(entity_id)
+        else:
+            category_name = entity.category.name if entity.category else None
+            content_index.upsert(entity_id, product_document(
+                entity.name, entity.description, entity.brand, entity.tags, category_name
+            ))
+    elif kind == "category" and entity is not None:
+        # Only a rename changes product text; a deleted category has no products left
+        _category_renames.changed(entity_id, entity.name)
+
+
+subscribe(_on_catalog_change)
+
+
+@instrumented
+class ContentSimilarityService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_similar_products(self, product_id: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Products with the most similar name, description, brand, tags and category."""
+        return ensure_content_index(self.db).similar([product_id], limit)[0]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Products ranked by TF-IDF cosine similarity to free text."""
+        return ensure_content_index(self.db).search([query], limit)[0]
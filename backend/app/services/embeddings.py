@@ -0,0 +1,72 @@
+"""
+Text embedding models.
+
+`HashingEmbedder` is a local stand-in for a hosted embedding model: it hashes
+word and character-trigram features into a fixed number of buckets, so it needs
+no model files or network calls and is deterministic across processes.
+Other models register with `register_embedder`.
+"""
+import re
+import zlib
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List
+from app.core.config import settings
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class Embedder(ABC):
+    """Base class for embedding models."""
+
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an L2-normalized float32 array of shape (len(texts), dim)."""
+
+
+class HashingEmbedder(Embedder):
+    """Feature-hashing embedder over words and character trigrams."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        features = list(words)
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+_embedders: Dict[str, Callable[[], Embedder]] = {}
+_instances: Dict[str, Embedder] = {}
+
+
+def register_embedder(name: str, factory: Callable[[], Embedder]):
+    """Register an embedding model factory under a name."""
+    _embedders[name] = factory
+
+
+def get_embedder(name: str = None) -> Embedder:
+    """Get the shared instance of an embedding model (the configured one by default)."""
+    name = name or settings.embedding_model
+    if name not in _instances:
+        _instances[name] = _embedders[name]()
+    return _instances[name]
+
+
+register_embedder("hashing", lambda: HashingEmbedder(settings.embedding_dim))
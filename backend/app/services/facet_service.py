@@ -0,0 +1,163 @@
+"""
+Facet counts for product listings.
+
+Brand, category, price-bucket and in-stock counts for a filter set come from
+a single `GROUPING SETS` query over the same WHERE clauses as the listing, so
+asking for facets costs one extra grouped scan instead of one per facet.
+`GROUPING()` tells the sets apart, which keeps a real NULL brand distinct
+from "not grouped by brand".
+
+Unfiltered and category-only views are the bulk of facet traffic and change
+only with the catalog, so their results are kept in `facet_cache`, stamped
+with the catalog version they were computed under (writes made by other
+workers bump it through the invalidation bus) and a TTL, which bounds the
+staleness left by writes that bypass the services.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+from sqlalchemy import case, func, literal, select, tuple_
+from sqlalchemy.orm import Session
+from app.core.catalog import get_catalog_version
+from app.core.config import settings
+from app.core.metrics import instrumented
+from app.models.orm_models import Category, Product
+from app.services.product_service import product_filters
+
+# GROUPING(brand, category_id, bucket, in_stock) has a bit set for every
+# argument that is not part of the row's grouping set
+_BRAND_SET, _CATEGORY_SET, _PRICE_SET, _STOCK_SET = 0b0111, 0b1011, 0b1101, 0b1110
+
+
+def price_bucket_expression(edges: Sequence[int]):
+    """Index of the [edges[i], edges[i + 1]) bucket a price falls in; the last bucket is open-ended."""
+    whens = [(Product.price.is_(None), None)]
+    whens += [(Product.price < edge, literal(index)) for index, edge in enumerate(edges[1:])]
+    return case(*whens, else_=literal(len(edges) - 1))
+
+
+class FacetCache:
+    """Facets for unfiltered / category-only views, keyed by category ID ("" for all)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != get_catalog_version() or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, facets: dict, catalog_version: int):
+        with self._lock:
+            self._entries[key] = (catalog_version, time.monotonic() + self.ttl_seconds, facets)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+facet_cache = FacetCache(settings.facet_cache_max_entries, settings.facet_cache_ttl_seconds)
+
+
+@instrumented
+class FacetService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_facets(
+        self,
+        category_id: Optional[str] = None,
+        search: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        brand: Optional[str] = None,
+        in_stock_only: bool = False,
+        product_ids: Optional[Sequence[str]] = None
+    ) -> dict:
+        """Facet counts for the products matching a listing's filters.
+
+        `product_ids`, the matches of a hybrid search, replaces the filters:
+        its semantic matches need not contain the keywords.
+        """
+        if product_ids is not None:
+            return self._compute([Product.id.in_(list(product_ids))])
+        cacheable = settings.facet_cache_enabled and not (
+            search or brand or in_stock_only or min_price is not None or max_price is not None
+        )
+        if cacheable:
+            facets = facet_cache.get(category_id or "")
+            if facets is not None:
+                return facets
+
+        catalog_version = get_catalog_version()
+        facets = self._compute(product_filters(category_id, search, min_price, max_price, brand, in_stock_only))
+        if cacheable:
+            facet_cache.put(category_id or "", facets, catalog_version)
+        return facets
+
+    def _compute(self, filters: list) -> dict:
+        edges = settings.facet_price_buckets
+        bucket = price_bucket_expression(edges)
+        in_stock = func.coalesce(Product.stock, 0) > 0
+        grouping = func.grouping(Product.brand, Product.category_id, bucket, in_stock)
+
+        rows = self.db.execute(
+            select(Product.brand, Product.category_id, Category.name, bucket, in_stock, grouping, func.count())
+            .outerjoin(Category, Product.category_id == Category.id)
+            .where(*filters)
+            .group_by(func.grouping_sets(
+                tuple_(Product.brand),
+                tuple_(Product.category_id, Category.name),
+                tuple_(bucket),
+                tuple_(in_stock)
+            ))
+        )
+
+        brands: List[dict] = []
+        categories: List[dict] = []
+        price_counts = [0] * len(edges)
+        stock = {True: 0, False: 0}
+        for brand, category_id, category_name, bucket_index, is_in_stock, grouping_set, count in rows:
+            if grouping_set == _BRAND_SET:
+                brands.append({"value": brand, "label": brand, "count": count})
+            elif grouping_set == _CATEGORY_SET:
+                categories.append({"value": category_id, "label": category_name, "count": count})
+            elif grouping_set == _PRICE_SET:
+                if bucket_index is not None:
+                    price_counts[bucket_index] = count
+            elif grouping_set == _STOCK_SET:
+                stock[bool(is_in_stock)] = count
+
+        def by_count(facet: dict):
+            return -facet["count"], facet["label"] is None, facet["label"] or ""
+
+        brands.sort(key=by_count)
+        categories.sort(key=by_count)
+        return {
+            "brands": brands[:settings.facet_max_brands],
+            "categories": categories,
+            "price": [
+                {"min": edge, "max": edges[index + 1] if index + 1 < len(edges) else None, "count": price_counts[index]}
+                for index, edge in enumerate(edges)
+            ],
+            "in_stock": stock[True],
+            "out_of_stock": stock[False],
+        }
@@ -0,0 +1,413 @@
+"""
+Hybrid lexical + vector product search.
+
+Every product is a row in one index that holds, row-aligned:
+
+* BM25 term weights in a sparse matrix, so the lexical score for a query is
+  one sparse x dense product;
+* an L2-normalized float32 embedding in a contiguous matrix, searched through
+  an inverted-file (IVF) approximate nearest neighbor index;
+* the attributes `get_products` filters on (category, brand, price, stock) as
+  flat arrays, so filters become a boolean mask applied to both retrievers in
+  the same pass.
+
+Candidates from both retrievers are fused as
+``alpha * bm25 / max(bm25) + (1 - alpha) * cosine``. Catalog writes append the
+changed row and mark the old one dead; the index compacts itself once enough
+rows are dead.
+"""
+import threading
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.catalog import CategoryRenames, subscribe
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.metrics import instrumented
+from app.models.orm_models import Category, Product
+from app.services.content_similarity import COMPACT_RATIO, product_document, tokenize
+from app.services.embeddings import Embedder, get_embedder
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE = 50000
+
+
+def train_ivf(embeddings: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids for the IVF coarse quantizer."""
+    rng = np.random.default_rng(seed)
+    sample = embeddings
+    if len(sample) > KMEANS_SAMPLE:
+        sample = embeddings[rng.choice(len(embeddings), KMEANS_SAMPLE, replace=False)]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[assignment == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+
+    return centroids.astype(np.float32)
+
+
+class HybridSearchIndex:
+    """Row-aligned BM25, embedding and attribute arrays with an IVF index."""
+
+    def __init__(self, embedder: Optional[Embedder] = None):
+        self._embedder = embedder
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Optional[dict]] = {}
+        self.built = False
+        self._reset()
+
+    def _reset(self):
+        self._vocabulary: Dict[str, int] = {}
+        self._row_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._counts = sp.csr_matrix((0, 0), dtype=np.float32)
+        self._bm25: Optional[sp.csr_matrix] = None
+        self._embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._price = np.zeros(0, dtype=np.float64)
+        self._stock = np.zeros(0, dtype=np.int64)
+        self._category_codes = np.zeros(0, dtype=np.int32)
+        self._brand_codes = np.zeros(0, dtype=np.int32)
+        self._categories: Dict[Optional[str], int] = {}
+        self._brands: Dict[Optional[str], int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._list_order = np.zeros(0, dtype=np.int64)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._indexed_rows = 0
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def _code(self, codes: Dict[Optional[str], int], value: Optional[str]) -> int:
+        return codes.setdefault(value, len(codes))
+
+    def _append(self, products: List[dict]):
+        """Append rows for products given as dicts of id, text, category_id, brand, price, stock."""
+        if not products:
+            return
+        vocabulary = self._vocabulary
+        indptr = [0]
+        indices: List[int] = []
+        for product in products:
+            indices.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokenize(product["text"]))
+            indptr.append(len(indices))
+
+        new_counts = sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(products), len(vocabulary))
+        )
+        new_counts.sum_duplicates()
+        base = sp.csr_matrix(
+            (self._counts.data, self._counts.indices, self._counts.indptr),
+            shape=(self._counts.shape[0], len(vocabulary))
+        )
+        self._counts = sp.vstack([base, new_counts], format="csr")
+
+        embeddings = self.embedder.embed([product["text"] for product in products])
+        self._embeddings = embeddings if not len(self._embeddings) else np.vstack([self._embeddings, embeddings])
+
+        self._alive = np.concatenate([self._alive, np.ones(len(products), dtype=bool)])
+        self._price = np.concatenate([self._price, [
+            float(product["price"]) if product["price"] is not None else np.nan for product in products
+        ]])
+        self._stock = np.concatenate([self._stock, [product["stock"] or 0 for product in products]])
+        self._category_codes = np.concatenate([self._category_codes, np.array(
+            [self._code(self._categories, product["category_id"]) for product in products], dtype=np.int32
+        )])
+        self._brand_codes = np.concatenate([self._brand_codes, np.array(
+            [self._code(self._brands, product["brand"].lower() if product["brand"] else None) for product in products],
+            dtype=np.int32
+        )])
+
+        for product in products:
+            self._rows[product["id"]] = len(self._row_ids)
+            self._row_ids.append(product["id"])
+        self._bm25 = None
+
+    def _train(self):
+        """(Re)train the IVF lists over all current rows."""
+        n = len(self._row_ids)
+        self._indexed_rows = n
+        if n == 0:
+            self._centroids = None
+            return
+        n_lists = int(min(max(np.sqrt(n), 1), 1024))
+        self._centroids = train_ivf(self._embeddings, n_lists)
+        assignment = np.argmax(self._embeddings @ self._centroids.T, axis=1)
+        self._list_order = np.argsort(assignment, kind="stable")
+        self._list_offsets = np.searchsorted(assignment[self._list_order], np.arange(n_lists + 1))
+
+    def build(self, products: List[dict]):
+        """Build the index from scratch."""
+        with self._lock:
+            self._reset()
+            self._pending = {}
+            self._append(products)
+            self._train()
+            self.built = True
+
+    def upsert(self, product: dict):
+        with self._lock:
+            self._pending[product["id"]] = product
+
+    def remove(self, product_id: str):
+        with self._lock:
+            self._pending[product_id] = None
+
+    def _apply_pending(self):
+        pending, self._pending = self._pending, {}
+        self._bm25 = None
+        for product_id in pending:
+            row = self._rows.pop(product_id, None)
+            if row is not None:
+                self._alive[row] = False
+                self._row_ids[row] = None
+        self._append([product for product in pending.values() if product is not None])
+
+        dead = len(self._row_ids) - len(self._rows)
+        unindexed = len(self._row_ids) - self._indexed_rows
+        if dead > COMPACT_RATIO * len(self._row_ids) or unindexed > COMPACT_RATIO * max(self._indexed_rows, 1):
+            self._compact()
+
+    def _compact(self):
+        live = np.flatnonzero(self._alive)
+        self._counts = self._counts[live]
+        self._embeddings = np.ascontiguousarray(self._embeddings[live])
+        self._alive = self._alive[live]
+        self._price = self._price[live]
+        self._stock = self._stock[live]
+        self._category_codes = self._category_codes[live]
+        self._brand_codes = self._brand_codes[live]
+        self._row_ids = [self._row_ids[row] for row in live.tolist()]
+        self._rows = {product_id: row for row, product_id in enumerate(self._row_ids)}
+        self._bm25 = None
+        self._train()
+
+    def _bm25_matrix(self) -> sp.csr_matrix:
+        if self._bm25 is None:
+            counts = self._counts
+            rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+            doc_lengths = np.asarray(counts.sum(axis=1)).ravel()
+            avg_length = doc_lengths[self._alive].mean() if self._alive.any() else 1.0
+            n_docs = max(int(self._alive.sum()), 1)
+            df = np.bincount(counts.indices, weights=self._alive[rows], minlength=counts.shape[1])
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+            tf = counts.data
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[rows] / avg_length)
+            weights = idf[counts.indices] * tf * (BM25_K1 + 1) / (tf + norm)
+            self._bm25 = sp.csr_matrix((weights.astype(np.float32), counts.indices, counts.indptr), shape=counts.shape)
+        return self._bm25
+
+    def _filter_mask(
+        self,
+        category_id: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        brand: Optional[str],
+        in_stock_only: bool
+    ) -> np.ndarray:
+        mask = self._alive.copy()
+        if category_id:
+            code = self._categories.get(category_id)
+            if code is None:
+                return np.zeros_like(mask)
+            mask &= self._category_codes == code
+        if min_price is not None:
+            mask &= self._price >= min_price
+        if max_price is not None:
+            mask &= self._price <= max_price
+        if brand:
+            # Substring match, like the ilike filter in get_products
+            needle = brand.lower()
+            codes = [code for value, code in self._brands.items() if value and needle in value]
+            mask &= np.isin(self._brand_codes, codes)
+        if in_stock_only:
+            mask &= self._stock > 0
+        return mask
+
+    def _ann_candidates(self, query: np.ndarray, mask: np.ndarray, n: int, nprobe: int) -> np.ndarray:
+        """Approximate top-n rows by cosine: probe the nearest IVF lists plus unindexed rows."""
+        if self._centroids is None:
+            rows = np.arange(len(self._row_ids))
+        else:
+            nprobe = min(nprobe, len(self._centroids))
+            probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate(
+                [self._list_order[self._list_offsets[c]:self._list_offsets[c + 1]] for c in probes]
+                + [np.arange(self._indexed_rows, len(self._row_ids))]
+            )
+        rows = rows[mask[rows]]
+        if len(rows) > n:
+            scores = self._embeddings[rows] @ query
+            rows = rows[np.argpartition(-scores, n - 1)[:n]]
+        return rows
+
+    def search(
+        self,
+        text: str,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        brand: Optional[str] = None,
+        in_stock_only: bool = False,
+        alpha: float = 0.5,
+        min_similarity: float = 0.3,
+        candidates: int = 200,
+        nprobe: int = 8
+    ) -> List[Tuple[str, float]]:
+        """Ranked (product_id, score) pairs matching the filters."""
+        with self._lock:
+            if self._pending:
+                self._apply_pending()
+            if not self._rows:
+                return []
+
+            mask = self._filter_mask(category_id, min_price, max_price, brand, in_stock_only)
+            if not mask.any():
+                return []
+
+            # Lexical retrieval: BM25 over the filtered rows
+            terms = [self._vocabulary[token] for token in set(tokenize(text)) if token in self._vocabulary]
+            lexical = np.zeros(len(self._row_ids), dtype=np.float32)
+            if terms:
+                query_terms = np.zeros(self._counts.shape[1], dtype=np.float32)
+                query_terms[terms] = 1.0
+                lexical = self._bm25_matrix() @ query_terms
+                lexical[~mask] = 0
+            lexical_rows = np.flatnonzero(lexical > 0)
+            if len(lexical_rows) > candidates:
+                lexical_rows = lexical_rows[np.argpartition(-lexical[lexical_rows], candidates - 1)[:candidates]]
+
+            # Vector retrieval: approximate nearest neighbors over the filtered rows
+            query_vector = self.embedder.embed([text])[0]
+            vector_rows = self._ann_candidates(query_vector, mask, candidates, nprobe)
+
+            rows = np.union1d(lexical_rows, vector_rows)
+            if not len(rows):
+                return []
+            lexical_scores = lexical[rows]
+            vector_scores = np.maximum(self._embeddings[rows] @ query_vector, 0)
+
+            # Rows without any matching term need a reasonably close embedding to count
+            keep = (lexical_scores > 0) | (vector_scores >= min_similarity)
+            rows, lexical_scores, vector_scores = rows[keep], lexical_scores[keep], vector_scores[keep]
+            if not len(rows):
+                return []
+            if lexical_scores.max() > 0:
+                lexical_scores = lexical_scores / lexical_scores.max()
+
+            scores = alpha * lexical_scores + (1 - alpha) * vector_scores
+            order = np.argsort(-scores, kind="stable")
+            return [(self._row_ids[row], float(score)) for row, score in zip(rows[order].tolist(), scores[order].tolist())]
+
+
+hybrid_index = HybridSearchIndex()
+
+
+def _product_row(product_id, name, description, brand, tags, category_id, price, stock, category_name) -> dict:
+    return {
+        "id": product_id,
+        "text": product_document(name, description, brand, tags, category_name),
+        "category_id": category_id,
+        "brand": brand,
+        "price": price,
+        "stock": stock,
+    }
+
+
+def load_search_rows(db: Session, category_id: Optional[str] = None) -> List[dict]:
+    """Load everything the index needs for the catalog, or one category, with one projected query."""
+    query = select(
+        Product.id, Product.name, Product.description, Product.brand, Product.tags,
+        Product.category_id, Product.price, Product.stock, Category.name
+    ).outerjoin(Category, Product.category_id == Category.id)
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    return [_product_row(*row) for row in db.execute(query)]
+
+
+def ensure_hybrid_index(db: Session) -> HybridSearchIndex:
+    """Build the index on first use."""
+    if not hybrid_index.built:
+        with hybrid_index._lock:
+            if not hybrid_index.built:
+                # Names first: a rename in between only re-indexes that category once more
+                _category_renames.reset(dict(db.execute(select(Category.id, Category.name)).all()))
+                hybrid_index.build(load_search_rows(db))
+    return hybrid_index
+
+
+def _reindex_category(category_id: str):
+    db = SessionLocal()
+    try:
+        for row in load_search_rows(db, category_id=category_id):
+            hybrid_index.upsert(row)
+    finally:
+        db.close()
+
+
+_category_renames = CategoryRenames(_reindex_category, "hybrid-category-reindex")
+
+
+def _on_catalog_change(kind: str, entity_id: str, entity):
+    if not hybrid_index.built:
+        return
+    if kind == "product":
+        if entity is None:
+            hybrid_index.remove(entity_id)
+        else:
+            hybrid_index.upsert(_product_row(
+                entity.id, entity.name, entity.description, entity.brand, entity.tags,
+                entity.category_id, entity.price, entity.stock,
+                entity.category.name if entity.category else None
+            ))
+    elif kind == "category" and entity is not None:
+        # Only a rename changes product text; a deleted category has no products left
+        _category_renames.changed(entity_id, entity.name)
+
+
+subscribe(_on_catalog_change)
+
+
+@instrumented
+class HybridSearchService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(
+        self,
+        query: str,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        brand: Optional[str] = None,
+        in_stock_only: bool = False
+    ) -> List[Tuple[str, float]]:
+        """Rank products for a query by fused BM25 and embedding similarity."""
+        return ensure_hybrid_index(self.db).search(
+            query,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            brand=brand,
+            in_stock_only=in_stock_only,
+            alpha=settings.hybrid_search_alpha,
+            min_similarity=settings.hybrid_search_min_similarity,
+            candidates=settings.hybrid_search_candidates,
+            nprobe=settings.hybrid_search_nprobe
+        )
@@ -0,0 +1,169 @@
+"""
+Rule-based intent routing for the shopping assistant.
+
+Plain product searches ("show me Sony headphones under $200") are recognised
+with precompiled regular expressions and turned into `get_products` filters,
+so they never reach the LLM. Brand and category names come from the catalog
+and are compiled into one alternation pattern, rebuilt when the catalog
+version changes. Anything that looks like it needs reasoning (comparisons,
+advice, open questions) is sent to the LLM.
+"""
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.catalog import get_catalog_version
+from app.models.orm_models import ActionType, Category, Product
+
+_SEARCH_TRIGGERS = re.compile(
+    r"\b(show(?: me)?|find|search(?: for)?|looking for|look for|do you have|got any|"
+    r"i (?:want|need)|buy|list|browse|get me)\b"
+)
+_LLM_MARKERS = re.compile(
+    r"\b(why|how|compare|comparison|versus|vs\.?|difference|better|best|recommend|"
+    r"suggest|should i|which|worth|review|explain|help me (?:choose|decide))\b"
+)
+_BETWEEN = re.compile(r"\bbetween\s*\$?(\d+(?:\.\d+)?)\s*(?:and|to|-)\s*\$?(\d+(?:\.\d+)?)")
+_MAX_PRICE = re.compile(r"\b(?:under|below|less than|cheaper than|up to|max(?:imum)?|at most)\s*\$?(\d+(?:\.\d+)?)")
+_MIN_PRICE = re.compile(r"\b(?:over|above|more than|at least|min(?:imum)?|from)\s*\$?(\d+(?:\.\d+)?)")
+_IN_STOCK = re.compile(r"\b(in stock|available now|available)\b")
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-]*")
+_FILLER = {
+    "a", "an", "the", "me", "some", "any", "for", "with", "of", "in", "on", "please",
+    "and", "or", "that", "are", "is", "there", "to", "i", "you", "your", "have", "price",
+    "priced", "dollars", "usd", "cheap", "new", "all",
+}
+
+
+class RouteDecision:
+    __slots__ = ("route", "action_type", "filters", "latency_us")
+
+    def __init__(self, route: str, action_type: ActionType, filters: Dict, latency_us: int):
+        self.route = route
+        self.action_type = action_type
+        self.filters = filters
+        self.latency_us = latency_us
+
+    @property
+    def is_direct(self) -> bool:
+        return self.route == "direct"
+
+    def as_action_data(self) -> Dict:
+        return {"route": self.route, "filters": self.filters, "routing_us": self.latency_us}
+
+
+class IntentRouter:
+    """Keyword and regex router, with brand/category patterns compiled from the catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._brand_pattern: Optional[re.Pattern] = None
+        self._brands: Dict[str, str] = {}
+        self._category_pattern: Optional[re.Pattern] = None
+        self._categories: Dict[str, str] = {}
+
+    @staticmethod
+    def _compile(terms: List[str]) -> Optional[re.Pattern]:
+        if not terms:
+            return None
+        # Longest first so "Sony Pictures" wins over "Sony"
+        alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        return re.compile(rf"\b({alternation})\b")
+
+    def load(self, brands: List[str], categories: Dict[str, str]):
+        """Compile patterns for brand names and {category name: category id}."""
+        brand_map = {brand.lower(): brand for brand in brands if brand}
+        category_map = {name.lower(): category_id for name, category_id in categories.items()}
+        with self._lock:
+            self._brands = brand_map
+            self._brand_pattern = self._compile(list(brand_map))
+            self._categories = category_map
+            self._category_pattern = self._compile(list(category_map))
+
+    def refresh(self, db: Session):
+        """Reload catalog terms if the catalog changed since the last load."""
+        version = get_catalog_version()
+        if self._version == version:
+            return
+        brands = db.execute(select(Product.brand).where(Product.brand.isnot(None)).distinct()).scalars().all()
+        categories = dict(db.execute(select(Category.name, Category.id).where(Category.is_active == True)).all())
+        self.load(brands, categories)
+        self._version = version
+
+    def _match_category(self, text: str) -> Optional[re.Match]:
+        if self._category_pattern is None:
+            return None
+        match = self._category_pattern.search(text)
+        if match is None:
+            # Allow a plural query for a singular category name and vice versa
+            for word in _WORD.findall(text):
+                for candidate in (word.rstrip("s"), word + "s"):
+                    if candidate in self._categories:
+                        return re.search(rf"\b{re.escape(word)}\b", text)
+        return match
+
+    def route(self, text: str) -> RouteDecision:
+        """Decide whether a message can be answered with a direct catalog query."""
+        start = time.perf_counter_ns()
+        lowered = text.lower()
+        filters: Dict = {}
+        spans = []
+
+        between = _BETWEEN.search(lowered)
+        if between:
+            filters["min_price"], filters["max_price"] = float(between.group(1)), float(between.group(2))
+            spans.append(between.span())
+        else:
+            for pattern, key in ((_MAX_PRICE, "max_price"), (_MIN_PRICE, "min_price")):
+                match = pattern.search(lowered)
+                if match:
+                    filters[key] = float(match.group(1))
+                    spans.append(match.span())
+
+        in_stock = _IN_STOCK.search(lowered)
+        if in_stock:
+            filters["in_stock_only"] = True
+            spans.append(in_stock.span())
+
+        if self._brand_pattern is not None:
+            brand = self._brand_pattern.search(lowered)
+            if brand:
+                filters["brand"] = self._brands[brand.group(1)]
+                spans.append(brand.span())
+
+        category = self._match_category(lowered)
+        if category:
+            word = category.group(0)
+            filters["category_id"] = self._categories.get(word) or self._categories.get(word.rstrip("s")) \
+                or self._categories.get(word + "s")
+            spans.append(category.span())
+
+        trigger = _SEARCH_TRIGGERS.search(lowered)
+        if trigger:
+            spans.append(trigger.span())
+
+        # Whatever is left after removing recognised spans is the free-text search term
+        remaining = lowered
+        for begin, end in sorted(spans, reverse=True):
+            remaining = remaining[:begin] + " " + remaining[end:]
+        words = [word for word in _WORD.findall(remaining) if word not in _FILLER]
+        if words:
+            filters["search"] = " ".join(words)
+
+        needs_llm = _LLM_MARKERS.search(lowered) is not None
+        has_constraint = any(key in filters for key in ("brand", "category_id", "min_price", "max_price"))
+        direct = not needs_llm and (
+            (trigger is not None and "search" in filters or has_constraint)
+            and len(words) <= 4
+        )
+
+        latency_us = (time.perf_counter_ns() - start) // 1000
+        if direct:
+            return RouteDecision("direct", ActionType.SEARCH, filters, latency_us)
+        return RouteDecision("llm", ActionType.GENERAL_QUERY, {}, latency_us)
+
+
+intent_router = IntentRouter()
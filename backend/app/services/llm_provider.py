@@ -0,0 +1,74 @@
+"""
+Pluggable LLM clients for the chat assistant.
+
+Every client streams completion tokens as an async iterator. Real provider
+clients register themselves with `register_llm_client`; the deterministic
+`FakeLLMClient` is registered as "fake" and used for local runs and tests.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.models.orm_models import LLMProvider
+
+
+class LLMClient(ABC):
+    """Base class for streaming LLM clients."""
+
+    provider: LLMProvider = LLMProvider.OTHER
+    model: str = "unknown"
+    cost_per_1k_tokens: Decimal = Decimal("0")
+
+    @abstractmethod
+    def stream(self, messages: List[dict]) -> AsyncIterator[str]:
+        """Yield completion tokens for a list of {"role", "content"} messages."""
+
+    def count_tokens(self, text: str) -> int:
+        """Rough token count used for prompt accounting."""
+        return len(text.split())
+
+    def cost(self, token_count: int) -> Decimal:
+        return self.cost_per_1k_tokens * token_count / 1000
+
+
+class FakeLLMClient(LLMClient):
+    """Deterministic local stand-in that echoes the last user message back."""
+
+    provider = LLMProvider.OTHER
+    model = "fake-llm"
+
+    def __init__(self, token_delay_ms: int = 0):
+        self.token_delay = token_delay_ms / 1000
+
+    def reply_for(self, messages: List[dict]) -> str:
+        last_user = next(
+            (message["content"] for message in reversed(messages) if message["role"] == "user"),
+            ""
+        )
+        return f"Here is what I found for: {last_user}"
+
+    async def stream(self, messages: List[dict]) -> AsyncIterator[str]:
+        words = self.reply_for(messages).split(" ")
+        for i, word in enumerate(words):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
+_clients: Dict[str, Callable[[], LLMClient]] = {}
+
+
+def register_llm_client(name: str, factory: Callable[[], LLMClient]):
+    """Register a client factory under a name (usually an `LLMProvider` value)."""
+    _clients[name] = factory
+
+
+def get_llm_client(preference: Optional[LLMProvider] = None) -> LLMClient:
+    """Get the client for a session's preferred provider, or the configured default."""
+    if preference is not None and preference.value in _clients:
+        return _clients[preference.value]()
+    return _clients[settings.llm_provider]()
+
+
+register_llm_client("fake", lambda: FakeLLMClient(settings.fake_llm_token_delay_ms))
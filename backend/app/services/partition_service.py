@@ -0,0 +1,152 @@
+"""
+Monthly range partitions for append-heavy, time-queried tables.
+
+`chat_messages` and `session_transactions` are partitioned by RANGE
+(created_at), one partition per calendar month named `<table>_pYYYYMM`, plus
+a `<table>_default` partition that catches rows outside every range.
+`run_maintenance` creates the partitions for the coming months and detaches
+those that fell out of the retention window, so old data is removed with a
+metadata-only operation instead of a large DELETE.
+
+New partitions are created as standalone tables and attached afterwards;
+rows that landed in the default partition for that month are moved first, so
+attaching never fails on overlapping data.
+"""
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import instrumented
+
+PARTITIONED_TABLES = ("chat_messages", "session_transactions")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def retention_months(table: str) -> int:
+    if table == "chat_messages":
+        return settings.chat_messages_retention_months
+    return settings.session_transactions_retention_months
+
+
+@instrumented
+class PartitionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _check_table(self, table: str):
+        if table not in PARTITIONED_TABLES:
+            raise ValueError(f"{table} is not a partitioned table")
+
+    def list_partitions(self, table: str) -> Dict[date, str]:
+        """Monthly partitions currently attached to a table, keyed by month."""
+        self._check_table(table)
+        names = self.db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ), {"table": table}).scalars()
+
+        pattern = re.compile(rf"^{table}_p(\d{{4}})(\d{{2}})$")
+        partitions = {}
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return partitions
+
+    def ensure_default_partition(self, table: str):
+        self._check_table(table)
+        self.db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"
+        ))
+
+    def create_partition(self, table: str, month: date) -> Optional[str]:
+        """Create and attach the partition for a month. Returns its name, or None if it exists."""
+        self._check_table(table)
+        month = month_start(month)
+        if month in self.list_partitions(table):
+            return None
+
+        name = partition_name(table, month)
+        default = default_partition_name(table)
+        bounds = {"start": datetime.combine(month, datetime.min.time()),
+                  "end": datetime.combine(add_months(month, 1), datetime.min.time())}
+
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        self.db.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        # The CHECK constraint lets ATTACH skip scanning the new partition
+        self.db.execute(text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+            f"CHECK (created_at IS NOT NULL AND created_at >= '{bounds['start']}' AND created_at < '{bounds['end']}')"
+        ))
+        self.db.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        ))
+        self.db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+        return name
+
+    def create_partitions(self, table: str, first_month: date, last_month: date) -> List[str]:
+        """Create every missing monthly partition from first_month to last_month inclusive."""
+        created = []
+        month = month_start(first_month)
+        while month <= last_month:
+            name = self.create_partition(table, month)
+            if name:
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    def detach_partitions(self, table: str, before: date, drop: bool = False) -> List[str]:
+        """Detach (and optionally drop) partitions whose whole month is before `before`."""
+        detached = []
+        for month, name in sorted(self.list_partitions(table).items()):
+            if add_months(month, 1) > before:
+                break
+            self.db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if drop:
+                self.db.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+        return detached
+
+    def run_maintenance(self, today: Optional[date] = None, drop: bool = False) -> Dict[str, dict]:
+        """Create upcoming partitions and detach expired ones for every partitioned table."""
+        current = month_start(today or datetime.utcnow().date())
+        report = {}
+        try:
+            for table in PARTITIONED_TABLES:
+                self.ensure_default_partition(table)
+                created = self.create_partitions(
+                    table, current, add_months(current, settings.partition_premake_months)
+                )
+                detached = self.detach_partitions(
+                    table, add_months(current, -retention_months(table)), drop=drop
+                )
+                report[table] = {"created": created, "detached": detached}
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return report
@@ -1,11 +1,54 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Integer, Numeric, String, and_, cast, column, func, or_, select, update, values
 from app.models.orm_models import Product, Category
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.product import ProductBulkUpdateItem, ProductCreate, ProductUpdate
+from app.core.catalog import publish_change, publish_changes
+from app.core.config import settings
+from app.core.invalidation import record_change, record_changes
+from app.core.metrics import instrumented
+from app.services.prompt_context import summarize, summarize_product
+from app.services.listing_serializer import product_row_builder, select_products
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.single_flight import coalesced
 from fastapi import HTTPException, status
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
 import uuid
 
+def product_filters(
+    category_id: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    brand: Optional[str] = None,
+    in_stock_only: bool = False
+) -> list:
+    """WHERE clauses for the product listing filters, shared by listings and facets."""
+    filters = []
+    if category_id:
+        filters.append(Product.category_id == category_id)
+    
+    if search:
+        filters.append(or_(
+            Product.name.ilike(f"%{search}%"),
+            Product.description.ilike(f"%{search}%"),
+            Product.brand.ilike(f"%{search}%")
+        ))
+    
+    if min_price is not None:
+        filters.append(Product.price >= min_price)
+    
+    if max_price is not None:
+        filters.append(Product.price <= max_price)
+    
+    if brand:
+        filters.append(Product.brand.ilike(f"%{brand}%"))
+    
+    if in_stock_only:
+        filters.append(Product.stock > 0)
+    return filters
+
+@instrumented
 class ProductService:
     def __init__(self, db: Session):
         self.db = db
@@ -33,10 +76,13 @@ class ProductService:
             id=str(uuid.uuid4()),
             **product_data.dict()
         )
+        product.summary = summarize(product)
         
         self.db.add(product)
+        record_change(self.db, "product", product.id)
         self.db.commit()
         self.db.refresh(product)
+        publish_change("product", product.id, product)
         return product
 
     def get_product(self, product_id: str) -> Product:
@@ -49,6 +95,20 @@ class ProductService:
             )
         return product
 
+    @coalesced("product")
+    def get_product_data(self, product_id: str) -> dict:
+        """A product as a response-ready dict, from the catalog snapshot when it has it."""
+        product = catalog_snapshot.get_product(product_id)
+        if product is not None:
+            return product
+        row = self.db.execute(select_products().where(Product.id == product_id)).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return product_row_builder()(row)
+
     def get_products(
         self, 
         skip: int = 0, 
@@ -61,31 +121,9 @@ class ProductService:
         in_stock_only: bool = False
     ) -> tuple[List[Product], int]:
         """Get products with filtering and pagination."""
-        query = self.db.query(Product)
-        
-        # Apply filters
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-        
-        if search:
-            search_filter = or_(
-                Product.name.ilike(f"%{search}%"),
-                Product.description.ilike(f"%{search}%"),
-                Product.brand.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
-        
-        if min_price is not None:
-            query = query.filter(Product.price >= min_price)
-        
-        if max_price is not None:
-            query = query.filter(Product.price <= max_price)
-        
-        if brand:
-            query = query.filter(Product.brand.ilike(f"%{brand}%"))
-        
-        if in_stock_only:
-            query = query.filter(Product.stock > 0)
+        query = self.db.query(Product).filter(*product_filters(
+            category_id, search, min_price, max_price, brand, in_stock_only
+        ))
         
         # Get total count
         total = query.count()
@@ -95,6 +133,66 @@ class ProductService:
         
         return products, total
 
+    @coalesced("product_rows")
+    def get_product_rows(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        category_id: Optional[str] = None,
+        search: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        brand: Optional[str] = None,
+        in_stock_only: bool = False,
+        fields: Optional[Sequence[str]] = None
+    ) -> tuple[List[dict], int]:
+        """Same page as get_products, as response-ready dicts built from one projected query.
+
+        `fields` (see listing_serializer.parse_fields) limits the columns selected.
+        """
+        filters = product_filters(category_id, search, min_price, max_price, brand, in_stock_only)
+        total = self.db.execute(select(func.count()).select_from(Product).where(*filters)).scalar_one()
+        rows = self.db.execute(select_products(fields).where(*filters).offset(skip).limit(limit))
+        return list(map(product_row_builder(fields), rows)), total
+
+    def get_product_rows_by_ids(self, product_ids: List[str], fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """Response-ready dicts for the given product IDs, in the order the IDs were given."""
+        if not product_ids:
+            return []
+        rows = self.db.execute(select_products(fields).where(Product.id.in_(product_ids)))
+        by_id = {row["id"]: row for row in map(product_row_builder(fields), rows)}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+    def get_products_by_ids(self, product_ids: List[str]) -> List[Product]:
+        """Get products by ID in one query, in the order the IDs were given."""
+        if not product_ids:
+            return []
+        products = self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        by_id = {product.id: product for product in products}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+    def rank_products_hybrid(
+        self,
+        search: str,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        brand: Optional[str] = None,
+        in_stock_only: bool = False
+    ) -> List[str]:
+        """IDs of the products matching a hybrid search, best first."""
+        # Imported here so numpy/scipy stay off the startup path
+        from app.services.hybrid_search import HybridSearchService
+        ranked = HybridSearchService(self.db).search(
+            search,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            brand=brand,
+            in_stock_only=in_stock_only
+        )
+        return [product_id for product_id, _ in ranked]
+
     def update_product(self, product_id: str, product_data: ProductUpdate) -> Product:
         """Update a product."""
         product = self.get_product(product_id)
@@ -123,16 +221,115 @@ class ProductService:
         update_data = product_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(product, field, value)
+        product.summary = summarize(product)
+        record_change(self.db, "product", product.id)
         
         self.db.commit()
         self.db.refresh(product)
+        publish_change("product", product.id, product)
         return product
 
+    def bulk_update_products(self, items: List[ProductBulkUpdateItem]) -> dict:
+        """Apply price and stock changes to many products in one transaction.
+
+        One UPDATE ... FROM (VALUES ...) applies the changes and returns the rows
+        their summaries are rebuilt from, a second writes the summaries, and the
+        change events and the catalog publish happen once for the whole batch.
+        Items for the same product are merged, later ones winning. Results are
+        per item, in request order.
+        """
+        if len(items) > settings.bulk_update_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.bulk_update_max_items} items per request"
+            )
+
+        changes: Dict[str, dict] = {}
+        for item in items:
+            fields = {field: value for field, value in item.dict(exclude={"id"}).items() if value is not None}
+            if fields:
+                changes.setdefault(item.id, {}).update(fields)
+
+        updated = {}
+        # Ids of items with nothing to change, reported "unchanged" only if the product exists
+        requested = {item.id for item in items}
+        untouched = requested - set(changes)
+        existing = set()
+        if untouched:
+            existing = {row.id for row in self.db.query(Product.id).filter(Product.id.in_(list(untouched)))}
+        if changes:
+            now = datetime.utcnow()
+            # Row locks taken in id order, so concurrent batches over overlapping
+            # products queue behind each other instead of deadlocking
+            self.db.execute(
+                select(Product.id).where(Product.id.in_(list(changes))).order_by(Product.id).with_for_update()
+            ).all()
+            changed = values(
+                column("id", String), column("price", Numeric(10, 2)), column("stock", Integer), name="changes"
+            ).data([(product_id, fields.get("price"), fields.get("stock")) for product_id, fields in changes.items()])
+            rows = self.db.execute(
+                update(Product)
+                .where(Product.id == changed.c.id)
+                .values(
+                    # A column that is NULL in every row comes back untyped, hence the casts
+                    price=func.coalesce(cast(changed.c.price, Numeric(10, 2)), Product.price),
+                    stock=func.coalesce(cast(changed.c.stock, Integer), Product.stock),
+                    updated_at=now
+                )
+                .returning(
+                    Product.id, Product.name, Product.brand, Product.price, Product.stock,
+                    Product.tags, Product.description, Product.updated_at
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            updated = {row.id: row for row in rows}
+
+            if updated:
+                summaries = values(column("id", String), column("summary", String), name="summaries").data([
+                    (row.id, summarize_product(row.name, row.brand, row.price, row.stock, row.tags, row.description))
+                    for row in rows
+                ])
+                self.db.execute(
+                    update(Product)
+                    .where(Product.id == summaries.c.id)
+                    .values(summary=summaries.c.summary, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                record_changes(self.db, "product", list(updated))
+            self.db.commit()
+
+            if updated:
+                # Index listeners read the category name, so load it with the products
+                entities = self.db.query(Product).options(selectinload(Product.category)).filter(
+                    Product.id.in_(list(updated))
+                )
+                publish_changes("product", {product.id: product for product in entities})
+
+        results = []
+        for item in items:
+            row = updated.get(item.id)
+            if item.id in existing:
+                results.append({"id": item.id, "status": "unchanged"})
+            elif row is None:
+                results.append({"id": item.id, "status": "not_found"})
+            else:
+                results.append({
+                    "id": item.id, "status": "updated",
+                    "price": row.price, "stock": row.stock, "updated_at": row.updated_at,
+                })
+        return {
+            "updated": len(updated),
+            "not_found": len(requested - set(updated) - existing),
+            "results": results,
+        }
+
     def delete_product(self, product_id: str) -> bool:
         """Delete a product."""
         product = self.get_product(product_id)
         self.db.delete(product)
+        record_change(self.db, "product", product_id)
         self.db.commit()
+        publish_change("product", product_id)
         return True
 
     def get_products_by_category(self, category_id: str, skip: int = 0, limit: int = 20) -> tuple[List[Product], int]:
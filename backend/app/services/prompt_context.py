@@ -0,0 +1,147 @@
+"""
+Compact product summaries for grounding LLM prompts.
+
+Every product stores a one-line summary (name, brand, price, stock, tags and
+the start of the description) capped at SUMMARY_MAX_TOKENS. Summaries are
+written with the product and mirrored in an in-process cache kept current by
+catalog change events, so packing the top-N candidates into a prompt is a
+dictionary read rather than a query and a serialization pass.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.catalog import subscribe
+from app.models.orm_models import Product
+
+SUMMARY_MAX_TOKENS = 48
+SUMMARY_MAX_TAGS = 4
+
+
+def count_tokens(text: str) -> int:
+    """Token estimate matching LLMClient.count_tokens."""
+    return len(text.split())
+
+
+def summarize_product(
+    name: str,
+    brand: Optional[str],
+    price,
+    stock: Optional[int],
+    tags: Optional[List[str]],
+    description: Optional[str],
+    max_tokens: int = SUMMARY_MAX_TOKENS
+) -> str:
+    """One-line product summary. The description is cut to fit the token budget."""
+    parts = [name]
+    if brand:
+        parts.append(f"by {brand}")
+    if price is not None:
+        parts.append(f"${float(price):.2f}")
+    parts.append("in stock" if stock else "out of stock")
+    if tags:
+        parts.append("tags: " + ", ".join(tags[:SUMMARY_MAX_TAGS]))
+    summary = " | ".join(parts)
+
+    if description:
+        remaining = max_tokens - count_tokens(summary)
+        words = description.split()
+        if remaining > 0 and words:
+            snippet = " ".join(words[:remaining])
+            if len(words) > remaining:
+                snippet += "..."
+            summary += f" | {snippet}"
+    return summary
+
+
+def summarize(product: Product) -> str:
+    return summarize_product(
+        product.name, product.brand, product.price, product.stock, product.tags, product.description
+    )
+
+
+class PromptContext:
+    __slots__ = ("text", "product_ids", "token_count")
+
+    def __init__(self, text: str, product_ids: List[str], token_count: int):
+        self.text = text
+        self.product_ids = product_ids
+        self.token_count = token_count
+
+
+class SummaryCache:
+    """Product ID -> (summary, token count), filled on first use and by catalog events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, int]] = {}
+
+    def put(self, product_id: str, summary: str):
+        with self._lock:
+            self._entries[product_id] = (summary, count_tokens(summary))
+
+    def discard(self, product_id: str):
+        with self._lock:
+            self._entries.pop(product_id, None)
+
+    def get_many(self, product_ids: Iterable[str]) -> Dict[str, Tuple[str, int]]:
+        with self._lock:
+            return {product_id: self._entries[product_id] for product_id in product_ids if product_id in self._entries}
+
+
+summary_cache = SummaryCache()
+
+
+def _on_catalog_change(kind: str, entity_id: str, entity):
+    if kind != "product":
+        return
+    if entity is None or entity.summary is None:
+        summary_cache.discard(entity_id)
+    else:
+        summary_cache.put(entity_id, entity.summary)
+
+
+subscribe(_on_catalog_change)
+
+
+class PromptContextBuilder:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _load_summaries(self, product_ids: List[str]) -> Dict[str, Tuple[str, int]]:
+        found = summary_cache.get_many(product_ids)
+        missing = [product_id for product_id in product_ids if product_id not in found]
+        if missing:
+            rows = self.db.execute(
+                select(
+                    Product.id, Product.summary, Product.name, Product.brand, Product.price,
+                    Product.stock, Product.tags, Product.description
+                ).where(Product.id.in_(missing))
+            )
+            for product_id, summary, *fields in rows:
+                # Rows written before summaries existed are summarized on the fly
+                summary_cache.put(product_id, summary or summarize_product(*fields))
+            found.update(summary_cache.get_many(missing))
+        return found
+
+    def build(self, product_ids: List[str], max_tokens: int, header: str = "Relevant products:") -> PromptContext:
+        """Pack product summaries, in the given order, into a block of at most max_tokens."""
+        summaries = self._load_summaries(product_ids)
+        lines = [header]
+        used = count_tokens(header)
+        packed = []
+        for product_id in product_ids:
+            entry = summaries.get(product_id)
+            if entry is None:
+                continue
+            summary, tokens = entry
+            # Each line also carries a "-" bullet token
+            if used + tokens + 1 > max_tokens:
+                break
+            lines.append(f"- {summary}")
+            used += tokens + 1
+            packed.append(product_id)
+
+        if not packed:
+            return PromptContext("", [], 0)
+        return PromptContext("\n".join(lines), packed, used)
@@ -0,0 +1,308 @@
+"""
+Item-to-item collaborative filtering.
+
+The offline job (`build_recommendations.py`) turns orders, carts, wishlists and
+reviews into a sparse user x item interaction matrix, computes the top-k most
+similar items for every product by cosine similarity, and writes the result as
+a directory of `.npy` arrays. The API memory-maps that artifact at startup, so
+answering a request is a dictionary lookup plus an array slice.
+"""
+import json
+import os
+import shutil
+import numpy as np
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import instrumented
+from app.models.orm_models import Cart, CartItem, Order, OrderItem, Review, WishlistItem
+
+# scipy is only needed by the offline build, so serving the artifact doesn't import it
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+# Interaction weights: stronger purchase intent counts for more
+ORDER_WEIGHT = 3.0
+CART_WEIGHT = 2.0
+WISHLIST_WEIGHT = 1.5
+
+
+def load_interactions(db: Session) -> List[Tuple[str, str, float]]:
+    """Load weighted (user_id, product_id, weight) interactions from all sources."""
+    interactions = []
+
+    orders = db.execute(
+        select(Order.user_id, OrderItem.product_id)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.user_id.isnot(None))
+    )
+    interactions.extend((user_id, product_id, ORDER_WEIGHT) for user_id, product_id in orders)
+
+    carts = db.execute(
+        select(Cart.user_id, CartItem.product_id)
+        .join(CartItem, CartItem.cart_id == Cart.id)
+        .where(Cart.user_id.isnot(None))
+    )
+    interactions.extend((user_id, product_id, CART_WEIGHT) for user_id, product_id in carts)
+
+    wishlists = db.execute(select(WishlistItem.user_id, WishlistItem.product_id))
+    interactions.extend((user_id, product_id, WISHLIST_WEIGHT) for user_id, product_id in wishlists)
+
+    # Ratings of 3 and above count as positive signal; lower ratings are ignored
+    reviews = db.execute(
+        select(Review.user_id, Review.product_id, Review.rating).where(Review.rating >= 3)
+    )
+    interactions.extend((user_id, product_id, float(rating - 2)) for user_id, product_id, rating in reviews)
+
+    return interactions
+
+
+def build_interaction_matrix(
+    interactions: List[Tuple[str, str, float]]
+) -> Tuple[np.ndarray, np.ndarray, "sp.csr_matrix"]:
+    """Build a CSR user x item matrix. Repeated interactions are summed."""
+    import scipy.sparse as sp
+    user_ids, user_index = np.unique([row[0] for row in interactions], return_inverse=True)
+    item_ids, item_index = np.unique([row[1] for row in interactions], return_inverse=True)
+    weights = np.fromiter((row[2] for row in interactions), dtype=np.float32, count=len(interactions))
+
+    matrix = sp.csr_matrix(
+        (weights, (user_index, item_index)),
+        shape=(len(user_ids), len(item_ids)),
+        dtype=np.float32
+    )
+    matrix.sum_duplicates()
+    return user_ids, item_ids, matrix
+
+
+def _top_k_rows(matrix: "sp.csr_matrix", k: int, exclude: Optional["sp.csr_matrix"] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k column indices and scores for every row of a sparse score matrix.
+
+    Rows with fewer than k positive scores are padded with index -1 and score 0.
+    Entries present in `exclude` (same shape) are skipped.
+    """
+    n_rows = matrix.shape[0]
+    indices = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+
+    for row in range(n_rows):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        cols = matrix.indices[start:end]
+        vals = matrix.data[start:end]
+
+        mask = vals > 0
+        if exclude is not None:
+            seen = exclude.indices[exclude.indptr[row]:exclude.indptr[row + 1]]
+            mask &= ~np.isin(cols, seen)
+        cols, vals = cols[mask], vals[mask]
+
+        if len(vals) > k:
+            top = np.argpartition(-vals, k)[:k]
+            cols, vals = cols[top], vals[top]
+        order = np.argsort(-vals, kind="stable")
+        indices[row, :len(order)] = cols[order]
+        scores[row, :len(order)] = vals[order]
+
+    return indices, scores
+
+
+def compute_item_similarities(matrix: "sp.csr_matrix", k: int, block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k cosine-similar items for every item, computed in column blocks."""
+    import scipy.sparse as sp
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = sp.csc_matrix(matrix.multiply(1.0 / norms[np.newaxis, :]), dtype=np.float32)
+
+    n_items = matrix.shape[1]
+    neighbors = np.full((n_items, k), -1, dtype=np.int32)
+    scores = np.zeros((n_items, k), dtype=np.float32)
+    identity = sp.identity(n_items, dtype=np.float32, format="csr")
+
+    for start in range(0, n_items, block_size):
+        end = min(start + block_size, n_items)
+        block = sp.csr_matrix(normalized[:, start:end].T @ normalized)
+        neighbors[start:end], scores[start:end] = _top_k_rows(block, k, exclude=identity[start:end])
+
+    return neighbors, scores
+
+
+def compute_user_recommendations(
+    matrix: "sp.csr_matrix",
+    neighbors: np.ndarray,
+    scores: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k unseen items per user, scored through the item neighbor lists."""
+    import scipy.sparse as sp
+    n_items = neighbors.shape[0]
+    rows = np.repeat(np.arange(n_items), neighbors.shape[1])
+    cols = neighbors.ravel()
+    valid = cols >= 0
+    similarity = sp.csr_matrix(
+        (scores.ravel()[valid], (rows[valid], cols[valid])),
+        shape=(n_items, n_items),
+        dtype=np.float32
+    )
+    user_scores = sp.csr_matrix(matrix @ similarity)
+    return _top_k_rows(user_scores, k, exclude=matrix)
+
+
+def write_artifact(path: str, arrays: Dict[str, np.ndarray], meta: dict):
+    """Write arrays to a fresh directory and swap it into place."""
+    tmp_path = f"{path}.tmp"
+    old_path = f"{path}.old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def build_recommendation_artifact(db: Session, path: str, k: int) -> dict:
+    """Run the full offline build and write the artifact. Returns its metadata."""
+    interactions = load_interactions(db)
+    if not interactions:
+        user_ids = item_ids = np.array([], dtype="U1")
+        neighbors = user_items = np.zeros((0, k), dtype=np.int32)
+        item_scores = user_scores = np.zeros((0, k), dtype=np.float32)
+        nnz = 0
+    else:
+        user_ids, item_ids, matrix = build_interaction_matrix(interactions)
+        neighbors, item_scores = compute_item_similarities(matrix, k)
+        user_items, user_scores = compute_user_recommendations(matrix, neighbors, item_scores, k)
+        nnz = int(matrix.nnz)
+
+    meta = {
+        "built_at": datetime.utcnow().isoformat(),
+        "k": k,
+        "users": int(len(user_ids)),
+        "items": int(len(item_ids)),
+        "interactions": nnz,
+    }
+    write_artifact(path, {
+        "item_ids": item_ids,
+        "item_neighbors": neighbors,
+        "item_scores": item_scores,
+        "user_ids": user_ids,
+        "user_items": user_items,
+        "user_scores": user_scores,
+    }, meta)
+    return meta
+
+
+class SimilarityIndex:
+    """Read-only view over a memory-mapped recommendation artifact."""
+
+    def __init__(self, path: str):
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        self.item_ids = load("item_ids")
+        self.item_neighbors = load("item_neighbors")
+        self.item_scores = load("item_scores")
+        self.user_ids = load("user_ids")
+        self.user_items = load("user_items")
+        self.user_scores = load("user_scores")
+
+        self._item_id_list = self.item_ids.tolist()
+        self._item_rows = {item_id: row for row, item_id in enumerate(self._item_id_list)}
+        self._user_rows = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+
+    def _scored(self, indices: np.ndarray, scores: np.ndarray, limit: int) -> List[Tuple[str, float]]:
+        return [
+            (self._item_id_list[index], score)
+            for index, score in zip(indices[:limit].tolist(), scores[:limit].tolist())
+            if index >= 0
+        ]
+
+    def has_item(self, product_id: str) -> bool:
+        return product_id in self._item_rows
+
+    def similar_items(self, product_id: str, limit: int) -> List[Tuple[str, float]]:
+        row = self._item_rows.get(product_id)
+        if row is None:
+            return []
+        return self._scored(self.item_neighbors[row], self.item_scores[row], limit)
+
+    def user_recommendations(self, user_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+        """Precomputed recommendations, or None if the user was not in the build."""
+        row = self._user_rows.get(user_id)
+        if row is None:
+            return None
+        return self._scored(self.user_items[row], self.user_scores[row], limit)
+
+    def recommend_from_items(self, product_ids: List[str], limit: int) -> List[Tuple[str, float]]:
+        """Score unseen items through the neighbor lists of the given items."""
+        seen = set(product_ids)
+        totals: Dict[str, float] = {}
+        for product_id in seen:
+            for neighbor_id, score in self.similar_items(product_id, self.item_neighbors.shape[1]):
+                if neighbor_id not in seen:
+                    totals[neighbor_id] = totals.get(neighbor_id, 0.0) + score
+        return sorted(totals.items(), key=lambda item: -item[1])[:limit]
+
+
+_index: Optional[SimilarityIndex] = None
+
+
+def load_similarity_index(path: Optional[str] = None) -> Optional[SimilarityIndex]:
+    """(Re)load the artifact. Leaves recommendations empty if it has not been built yet."""
+    global _index
+    path = path or settings.recommendation_artifact_dir
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        _index = None
+        return None
+    _index = SimilarityIndex(path)
+    return _index
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    return _index
+
+
+@instrumented
+class RecommendationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_similar_products(self, product_id: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Products most often interacted with by the same users."""
+        index = get_similarity_index()
+        if index is None:
+            return []
+        return index.similar_items(product_id, limit)
+
+    def get_user_recommendations(self, user_id: str, limit: int = 10) -> Tuple[List[Tuple[str, float]], str]:
+        """Recommendations for a user and where they came from ("precomputed", "live" or "none")."""
+        index = get_similarity_index()
+        if index is None:
+            return [], "none"
+
+        recommendations = index.user_recommendations(user_id, limit)
+        if recommendations is not None:
+            return recommendations, "precomputed"
+
+        # Users who started interacting after the last build: score their current items
+        return index.recommend_from_items(self._live_product_ids(user_id), limit), "live"
+
+    def _live_product_ids(self, user_id: str) -> List[str]:
+        """Products the user has interacted with, in one UNION query."""
+        stmt = union(
+            select(WishlistItem.product_id).where(WishlistItem.user_id == user_id),
+            select(CartItem.product_id).join(Cart, CartItem.cart_id == Cart.id).where(Cart.user_id == user_id),
+            select(OrderItem.product_id).join(Order, OrderItem.order_id == Order.id).where(Order.user_id == user_id),
+        )
+        return list(self.db.execute(stmt).scalars())
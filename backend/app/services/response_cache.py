@@ -0,0 +1,236 @@
+"""
+Semantic cache for assistant responses.
+
+A lookup first tries the normalized query text as an exact key, then falls
+back to the most similar cached query by embedding cosine similarity. Entries
+are only served for the catalog version they were produced under, expire after
+a TTL, and the least recently used entry is evicted when the cache is full.
+
+Entries are shared by all users, so the chat service only looks up and stores
+replies to a session's first message, whose prompt holds nothing but the
+message and catalog context.
+"""
+import re
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.embeddings import Embedder, get_embedder
+
+_STOP_WORDS = {
+    "a", "an", "the", "me", "i", "im", "please", "show", "find", "some", "any",
+    "for", "looking", "want", "need", "can", "you", "get", "give", "is", "are",
+}
+_WORD_RE = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and filler words, and collapse whitespace."""
+    words = _WORD_RE.findall(text.lower())
+    return " ".join(word for word in words if word not in _STOP_WORDS)
+
+
+class CachedResponse:
+    __slots__ = (
+        "key", "numbers", "tokens", "model", "cost", "response_time",
+        "token_count", "catalog_version", "expires_at", "slot"
+    )
+
+    def __init__(self, key, numbers, tokens, model, cost, response_time, token_count, catalog_version, expires_at, slot):
+        self.key = key
+        self.numbers = numbers
+        self.tokens = tokens
+        self.model = model
+        self.cost = cost
+        self.response_time = response_time
+        self.token_count = token_count
+        self.catalog_version = catalog_version
+        self.expires_at = expires_at
+        self.slot = slot
+
+
+class ResponseCache:
+    """LRU + TTL cache of assistant responses with a semantic fallback lookup.
+
+    Query embeddings live in one preallocated float32 matrix so the similarity
+    search is a single matrix-vector product over the occupied slots.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        similarity_threshold: float,
+        embedder: Optional[Embedder] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._embedder = embedder
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def _embed(self, key: str) -> np.ndarray:
+        vector = self.embedder.embed([key])[0]
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        return vector
+
+    def _remove(self, entry: CachedResponse):
+        self._entries.pop(entry.key, None)
+        self._matrix[entry.slot] = 0.0
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    def _is_fresh(self, entry: CachedResponse, catalog_version: int, now: float) -> bool:
+        return entry.catalog_version == catalog_version and entry.expires_at > now
+
+    def get(self, query: str, catalog_version: int) -> tuple[Optional[CachedResponse], float]:
+        """Look up a response. Returns the entry (or None) and the match similarity."""
+        key = normalize_query(query)
+        if not key:
+            return None, 0.0
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry, catalog_version, now):
+                    self._entries.move_to_end(key)
+                    return entry, 1.0
+                self._remove(entry)
+
+            if not self._entries:
+                return None, 0.0
+
+            vector = self._embed(key)
+            similarities = self._matrix @ vector
+            numbers = _NUMBER_RE.findall(key)
+
+            # Walk candidates best-first; prices and quantities must match exactly
+            for slot in np.argsort(-similarities)[:8]:
+                similarity = float(similarities[slot])
+                if similarity < self.similarity_threshold:
+                    break
+                candidate = self._entries.get(self._slot_keys[slot])
+                if candidate is None or candidate.numbers != numbers:
+                    continue
+                if not self._is_fresh(candidate, catalog_version, now):
+                    self._remove(candidate)
+                    continue
+                self._entries.move_to_end(candidate.key)
+                return candidate, similarity
+
+        return None, 0.0
+
+    def put(
+        self,
+        query: str,
+        tokens: List[str],
+        catalog_version: int,
+        model: str,
+        cost: Decimal,
+        response_time: int,
+        token_count: int
+    ):
+        """Store a response produced under the given catalog version."""
+        key = normalize_query(query)
+        if not key:
+            return
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._remove(existing)
+            if not self._free_slots:
+                self._remove(next(iter(self._entries.values())))
+
+            vector = self._embed(key)
+            slot = self._free_slots.pop()
+            self._matrix[slot] = vector
+            self._slot_keys[slot] = key
+            self._entries[key] = CachedResponse(
+                key=key,
+                numbers=_NUMBER_RE.findall(key),
+                tokens=list(tokens),
+                model=model,
+                cost=cost,
+                response_time=response_time,
+                token_count=token_count,
+                catalog_version=catalog_version,
+                expires_at=time.monotonic() + self.ttl_seconds,
+                slot=slot
+            )
+
+    def clear(self):
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._remove(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheStats:
+    """Per chat session hit/miss counts and what the hits saved."""
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Totals over all sessions, evicted ones included
+        self.hits = 0
+        self.misses = 0
+
+    def _session(self, session_id: str) -> Dict:
+        stats = self._sessions.get(session_id)
+        if stats is None:
+            stats = {"hits": 0, "misses": 0, "saved_cost": Decimal("0"), "saved_time_ms": 0}
+            self._sessions[session_id] = stats
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return stats
+
+    def record_hit(self, session_id: str, saved_cost: Decimal, saved_time_ms: int):
+        with self._lock:
+            self.hits += 1
+            stats = self._session(session_id)
+            stats["hits"] += 1
+            stats["saved_cost"] += saved_cost or Decimal("0")
+            stats["saved_time_ms"] += max(saved_time_ms, 0)
+
+    def record_miss(self, session_id: str):
+        with self._lock:
+            self.misses += 1
+            self._session(session_id)["misses"] += 1
+
+    def get(self, session_id: str) -> Dict:
+        with self._lock:
+            stats = dict(self._sessions.get(session_id) or {
+                "hits": 0, "misses": 0, "saved_cost": Decimal("0"), "saved_time_ms": 0
+            })
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    similarity_threshold=settings.response_cache_similarity
+)
+cache_stats = CacheStats(max_sessions=settings.chat_recent_sessions)
@@ -0,0 +1,102 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, tuple_
+from app.models.orm_models import SessionTransaction
+from app.schemas.chat import SessionTransactionCreate
+from app.services.chat_history_service import encode_cursor, decode_cursor
+from app.core.metrics import instrumented
+from fastapi import HTTPException, status
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import uuid
+
+# Range used when a caller does not give one; every ledger query is bounded in
+# time so that only the matching monthly partitions are scanned
+DEFAULT_WINDOW = timedelta(days=30)
+
+
+def resolve_window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = end or datetime.utcnow()
+    start = start or end - DEFAULT_WINDOW
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    return start, end
+
+
+@instrumented
+class SessionTransactionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_transaction(self, session_id: str, transaction_data: SessionTransactionCreate) -> SessionTransaction:
+        """Append a transaction to a session's ledger."""
+        transaction = SessionTransaction(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            created_at=datetime.utcnow(),
+            **transaction_data.dict()
+        )
+        self.db.add(transaction)
+        self.db.commit()
+        self.db.refresh(transaction)
+        return transaction
+
+    def get_transactions(
+        self,
+        session_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        before: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[SessionTransaction], Optional[str]]:
+        """Get a page of a session's transactions in [start, end), newest first."""
+        start, end = resolve_window(start, end)
+        query = self.db.query(SessionTransaction).filter(
+            SessionTransaction.session_id == session_id,
+            SessionTransaction.created_at >= start,
+            SessionTransaction.created_at < end
+        )
+
+        if before:
+            created_at, transaction_id = decode_cursor(before)
+            query = query.filter(
+                tuple_(SessionTransaction.created_at, SessionTransaction.id) < tuple_(created_at, transaction_id)
+            )
+
+        rows = query.order_by(
+            SessionTransaction.created_at.desc(), SessionTransaction.id.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+    def summarize(
+        self,
+        session_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Tuple[datetime, datetime, List[dict]]:
+        """Count and total amount per transaction type and status in [start, end)."""
+        start, end = resolve_window(start, end)
+        rows = self.db.execute(
+            select(
+                SessionTransaction.type, SessionTransaction.status,
+                func.count(), func.coalesce(func.sum(SessionTransaction.amount), 0)
+            )
+            .where(
+                SessionTransaction.session_id == session_id,
+                SessionTransaction.created_at >= start,
+                SessionTransaction.created_at < end
+            )
+            .group_by(SessionTransaction.type, SessionTransaction.status)
+            .order_by(SessionTransaction.type, SessionTransaction.status)
+        )
+        return start, end, [
+            {"type": tx_type, "status": tx_status, "count": count, "amount": amount}
+            for tx_type, tx_status, count, amount in rows
+        ]
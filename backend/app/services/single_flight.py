@@ -0,0 +1,138 @@
+"""
+Request coalescing for catalog reads.
+
+During a flash sale many clients ask for the same product or the same first
+page of a category at once. Read methods decorated with `coalesced` share one
+in-flight execution per identical call: the first caller (the leader) runs
+the query on its own session, callers that arrive while it is running wait
+for it and get the same result, or the same exception (a 404, say). Nothing
+is kept once the call finishes; this is not a cache.
+
+Keys are the method name, its arguments and the catalog version, so a read
+that starts after a committed write (local, or from another worker through
+the invalidation bus) never joins a flight that started before it. Flights
+are also separated by the database the caller's session is bound to: a
+read-your-writes request pinned to the primary never gets a result read
+from a replica that may not have its write yet. Results are shared between
+requests and must be treated as read-only.
+
+Per-key counts of executed and coalesced calls are kept for the most
+recently used `single_flight_max_tracked_keys` keys.
+"""
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from app.core.catalog import get_catalog_version
+from app.core.config import settings
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, max_tracked_keys: int):
+        self.max_tracked_keys = max_tracked_keys
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # key -> [executed, coalesced, most waiters on one execution]
+        self._keys: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], version: int = 0, bind: Hashable = None) -> Any:
+        """Run fn() once for all concurrent callers with the same key, version and bind."""
+        flight = (key, version, bind)
+        with self._lock:
+            call = self._calls.get(flight)
+            leader = call is None
+            if leader:
+                call = self._calls[flight] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                # Nobody can join once the call is removed, so `waiters` is final
+                del self._calls[flight]
+                self._record(key, call.waiters)
+            call.done.set()
+        return call.result
+
+    def _record(self, key: Hashable, waiters: int):
+        self.executed += 1
+        self.coalesced += waiters
+        counts = self._keys.get(key)
+        if counts is None:
+            counts = self._keys[key] = [0, 0, 0]
+        else:
+            self._keys.move_to_end(key)
+        counts[0] += 1
+        counts[1] += waiters
+        counts[2] = max(counts[2], waiters)
+        while len(self._keys) > self.max_tracked_keys:
+            self._keys.popitem(last=False)
+
+    def stats(self, top: int = 20) -> dict:
+        """Totals, and the `top` tracked keys by number of coalesced calls."""
+        with self._lock:
+            keys = sorted(self._keys.items(), key=lambda item: -item[1][1])[:top]
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "keys": [
+                    {"key": _label(key), "executed": executed, "coalesced": coalesced, "max_waiters": max_waiters}
+                    for key, (executed, coalesced, max_waiters) in keys
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._keys.clear()
+            self.executed = 0
+            self.coalesced = 0
+
+
+def _label(key: tuple) -> str:
+    method, args, kwargs = key
+    parts = [repr(arg) for arg in args]
+    parts += [f"{name}={value!r}" for name, value in kwargs if value is not None]
+    return f"{method}({', '.join(parts)})"
+
+
+single_flight = SingleFlight(settings.single_flight_max_tracked_keys)
+
+
+def coalesced(name: str):
+    """Coalesce concurrent identical calls to a service read method (arguments must be hashable)."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not settings.single_flight_enabled:
+                return method(self, *args, **kwargs)
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return single_flight.do(
+                key, lambda: method(self, *args, **kwargs), get_catalog_version(),
+                bind=str(self.db.get_bind().url)
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,238 @@
+"""
+Write-behind buffer for chat telemetry.
+
+The turns of streamed assistant replies are queued in memory and written by
+a background thread as multi-row INSERTs, together with one coalesced
+`last_used_at` UPDATE per flush, so a reply does not wait on its own
+telemetry writes. Writes a client gets a 201 for (appended messages, ledger
+transactions) are committed inline instead. The buffer is bounded (`telemetry_max_pending` rows);
+when it is full the `telemetry_backpressure` policy applies:
+
+- "sync": the caller writes its rows inline, paying the latency itself
+- "block": the caller waits for the next flush to make room
+- "drop": the rows are discarded and counted in `stats()["dropped"]`
+
+Everything still queued is flushed on shutdown. When the writer has not been
+started (scripts, tests) submissions are written inline.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import DateTime, String, column, insert, select, update, values
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.orm_models import ChatSession
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("sync", "block", "drop")
+
+
+def write_batch(db: Session, rows: Dict[type, List[dict]], touches: Dict[str, datetime], chunk_size: int):
+    """Insert rows per model in multi-row chunks and bump last_used_at, in one transaction."""
+    for model, model_rows in rows.items():
+        for start in range(0, len(model_rows), chunk_size):
+            db.execute(insert(model).values(model_rows[start:start + chunk_size]))
+
+    if touches:
+        touched = values(
+            column("id", String), column("last_used_at", DateTime), name="touched"
+        ).data(list(touches.items()))
+        db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == touched.c.id)
+            .values(last_used_at=touched.c.last_used_at)
+        )
+    db.commit()
+
+
+class TelemetryWriter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_pending: int,
+        flush_interval_ms: int,
+        batch_size: int,
+        backpressure: str
+    ):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.backpressure = backpressure
+
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._rows: Dict[type, List[dict]] = defaultdict(list)
+        self._touches: Dict[str, datetime] = {}
+        self._sessions: set = set()
+        # Sessions in the batch being written, until it has committed
+        self._flushing: set = set()
+        self._pending = 0
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush whatever is still queued."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def submit(
+        self,
+        db: Session,
+        rows: Dict[type, List[dict]],
+        session_id: Optional[str] = None,
+        touched_at: Optional[datetime] = None
+    ):
+        """Queue rows for insertion, optionally bumping a session's last_used_at.
+
+        Can block on a full buffer, so async callers run it in the threadpool.
+        """
+        touches = {session_id: touched_at} if session_id and touched_at else {}
+        count = sum(len(model_rows) for model_rows in rows.values())
+
+        with self._cond:
+            if self._running and self._pending + count > self.max_pending:
+                if self.backpressure == "drop":
+                    self.dropped += count
+                    logger.warning("Telemetry buffer full, dropped %d rows", count)
+                    return
+                if self.backpressure == "block":
+                    self._cond.notify_all()
+                    while self._running and self._pending and self._pending + count > self.max_pending:
+                        self._cond.wait()
+
+            if self._running and self._pending + count <= self.max_pending:
+                for model, model_rows in rows.items():
+                    self._rows[model].extend(model_rows)
+                for touched_id, touched in touches.items():
+                    self._touches[touched_id] = max(touched, self._touches.get(touched_id, touched))
+                if session_id:
+                    self._sessions.add(session_id)
+                self._pending += count
+                if self._pending >= self.batch_size:
+                    self._cond.notify_all()
+                return
+
+        # Not running, or the "sync" policy with a full buffer
+        write_batch(db, rows, touches, self.batch_size)
+
+    def has_pending(self, session_id: str) -> bool:
+        """Whether the session has rows queued or in a batch that has not committed yet."""
+        with self._cond:
+            return session_id in self._sessions or session_id in self._flushing
+
+    def flush_session(self, session_id: str):
+        """Flush now if the session has rows not yet committed, so reads see its latest writes.
+
+        A batch already being written holds the flush lock, so this waits for it to commit.
+        """
+        if self.has_pending(session_id):
+            self.flush()
+
+    def _take(self):
+        with self._cond:
+            rows, touches, count = self._rows, self._touches, self._pending
+            self._flushing = self._sessions
+            self._rows, self._touches, self._sessions, self._pending = defaultdict(list), {}, set(), 0
+            self._cond.notify_all()
+        return rows, touches, count
+
+    def flush(self):
+        with self._flush_lock:
+            rows, touches, count = self._take()
+            if not count and not touches:
+                self._flushing = set()
+                return
+            start = time.perf_counter()
+            db = self.session_factory()
+            try:
+                try:
+                    write_batch(db, rows, touches, self.batch_size)
+                except IntegrityError:
+                    # Usually a session deleted while its rows were queued: drop those rows and retry once
+                    db.rollback()
+                    rows, touches, count = self._without_missing_sessions(db, rows, touches, count)
+                    write_batch(db, rows, touches, self.batch_size)
+                self.flushed += count
+            except Exception:
+                db.rollback()
+                self.failed += count
+                logger.exception("Telemetry flush failed, %d rows lost", count)
+            finally:
+                db.close()
+                with self._cond:
+                    self._flushing = set()
+            self.flushes += 1
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def _without_missing_sessions(self, db: Session, rows, touches, count):
+        session_ids = {row["session_id"] for model_rows in rows.values() for row in model_rows} | set(touches)
+        existing = set(db.execute(select(ChatSession.id).where(ChatSession.id.in_(session_ids))).scalars())
+        kept = {
+            model: [row for row in model_rows if row["session_id"] in existing]
+            for model, model_rows in rows.items()
+        }
+        kept_count = sum(len(model_rows) for model_rows in kept.values())
+        self.failed += count - kept_count
+        return kept, {key: value for key, value in touches.items() if key in existing}, kept_count
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running and self._pending < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if not self._running:
+                    return
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending = self._pending
+        return {
+            "pending": pending,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+telemetry_writer = TelemetryWriter(
+    session_factory=SessionLocal,
+    max_pending=settings.telemetry_max_pending,
+    flush_interval_ms=settings.telemetry_flush_interval_ms,
+    batch_size=settings.telemetry_batch_size,
+    backpressure=settings.telemetry_backpressure
+)
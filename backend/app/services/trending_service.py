@@ -0,0 +1,344 @@
+"""
+Trending products from windowed view counters shared by all workers.
+
+Views are ranked over the last `trending_window_minutes` for the whole
+cluster. The shared table `product_view_counts` holds one row per product
+and minute with the views every worker has flushed, and each worker keeps
+a copy of the window in memory as a ring of per-minute buckets, plus a
+running total per product, so ranking never queries the table. Recording a
+view only bumps a local pending counter under a lock; nothing is written
+per view.
+
+A background thread keeps the rest off the request path:
+
+- every `trending_flush_interval_seconds` it upserts the views recorded
+  here since the last flush, one row per product and minute, in multi-row
+  batches, then re-reads the last few minutes of the table into the ring,
+  picking up what the other workers flushed meanwhile; rows older than
+  `trending_retention_hours` are pruned once an hour
+- every `trending_refresh_seconds` it expires buckets that left the window
+  and ranks the bucket totals plus this worker's unflushed views into
+  top-`trending_top_k` lists, overall and per category;
+  `GET /products/trending` only looks a list up
+
+On start the whole window is read from the table. Every worker therefore
+ranks the same counts, which include each other worker's views up to its
+last flush. When the counter has not been started (scripts, tests)
+rankings are computed on read.
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.metrics import instrumented
+from app.models.orm_models import ProductViewCount
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.product_service import ProductService
+
+logger = logging.getLogger(__name__)
+
+# Ranking key for all categories together
+ALL_CATEGORIES = ""
+PRUNE_INTERVAL_SECONDS = 3600
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _minute_start(minute: int) -> datetime:
+    return datetime.utcfromtimestamp(minute * 60)
+
+
+def _minute_of(minute_start: datetime) -> int:
+    return int((minute_start - _EPOCH).total_seconds() // 60)
+
+
+class TrendingCounter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        window_minutes: int,
+        top_k: int,
+        refresh_seconds: float,
+        flush_interval_seconds: float,
+        retention_hours: int,
+        batch_size: int = 500
+    ):
+        self.session_factory = session_factory
+        self.window_minutes = window_minutes
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.retention_hours = retention_hours
+        self.batch_size = batch_size
+        # Other workers write a minute's views up to one flush interval after it ends
+        self.sync_minutes = int(flush_interval_seconds // 60) + 2
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Slot minute % window_minutes holds that minute's views per product, from the table
+        self._buckets: List[Dict[str, int]] = [{} for _ in range(window_minutes)]
+        self._bucket_minutes: List[int] = [-1] * window_minutes
+        self._totals: Dict[str, int] = defaultdict(int)
+        self._categories: Dict[str, Optional[str]] = {}
+        # (minute, product_id) -> views recorded here and not in the buckets yet:
+        # `_pending` still to be written, `_writing` being written by a flush
+        self._pending: Dict[Tuple[int, str], int] = defaultdict(int)
+        self._writing: Dict[Tuple[int, str], int] = {}
+        self._rankings: Dict[str, List[Tuple[str, int]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.recorded = 0
+        self.flushed = 0
+        self.failed = 0
+        self.last_refresh_ms = 0.0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trending-counter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush the views not written yet."""
+        if not self._running:
+            return
+        self._running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _clear(self, slot: int):
+        """Empty a slot, taking the views it held out of the totals. Caller holds the lock."""
+        for product_id, views in self._buckets[slot].items():
+            remaining = self._totals[product_id] - views
+            if remaining > 0:
+                self._totals[product_id] = remaining
+            else:
+                del self._totals[product_id]
+        self._buckets[slot] = {}
+        self._bucket_minutes[slot] = -1
+
+    def _set_bucket(self, minute: int, views: Dict[str, int]):
+        """Replace a minute's views, unless its slot already holds a later minute. Caller holds the lock."""
+        slot = minute % self.window_minutes
+        if self._bucket_minutes[slot] > minute:
+            return
+        self._clear(slot)
+        for product_id, count in views.items():
+            self._totals[product_id] += count
+        self._buckets[slot] = views
+        self._bucket_minutes[slot] = minute
+
+    def record_view(self, product_id: str, category_id: Optional[str]):
+        minute = int(time.time() // 60)
+        with self._lock:
+            self._pending[(minute, product_id)] += 1
+            self._categories[product_id] = category_id
+            self.recorded += 1
+
+    def refresh(self):
+        """Drop buckets that left the window and rebuild the rankings."""
+        start = time.perf_counter()
+        oldest = int(time.time() // 60) - self.window_minutes + 1
+        with self._lock:
+            for slot, minute in enumerate(self._bucket_minutes):
+                if 0 <= minute < oldest:
+                    self._clear(slot)
+            totals = dict(self._totals)
+            for local in (self._writing, self._pending):
+                for (minute, product_id), views in local.items():
+                    if minute >= oldest:
+                        totals[product_id] = totals.get(product_id, 0) + views
+            # Forget the categories of products that left the window
+            categories = self._categories = {product_id: self._categories.get(product_id) for product_id in totals}
+
+        by_category: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+        for item in totals.items():
+            by_category[categories.get(item[0]) or ALL_CATEGORIES].append(item)
+        rankings = {
+            category_id: heapq.nlargest(self.top_k, items, key=lambda item: item[1])
+            for category_id, items in by_category.items() if category_id != ALL_CATEGORIES
+        }
+        rankings[ALL_CATEGORIES] = heapq.nlargest(self.top_k, totals.items(), key=lambda item: item[1])
+        # A reference swap; readers keep whichever rankings they already hold
+        self._rankings = rankings
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+
+    def top(self, category_id: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(product ID, views in the window across workers) pairs, most viewed first, as of the last refresh."""
+        if not self._running:
+            self.refresh()
+        return self._rankings.get(category_id or ALL_CATEGORIES, [])[:limit or self.top_k]
+
+    def flush(self):
+        """Add the views recorded since the last flush to product_view_counts, then re-read recent minutes."""
+        with self._flush_lock:
+            with self._lock:
+                self._writing, self._pending = self._pending, defaultdict(int)
+                writing = self._writing
+                categories = dict(self._categories)
+            start = time.perf_counter()
+            if writing:
+                self._write(writing, categories)
+            self.sync(int(time.time() // 60) - self.sync_minutes + 1, written=True)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def _write(self, views: Dict[Tuple[int, str], int], categories: Dict[str, Optional[str]]):
+        rows = [
+            {
+                "minute": _minute_start(minute),
+                "product_id": product_id,
+                "category_id": categories.get(product_id),
+                "views": count,
+            }
+            for (minute, product_id), count in views.items()
+        ]
+        db = self.session_factory()
+        try:
+            for offset in range(0, len(rows), self.batch_size):
+                statement = insert(ProductViewCount).values(rows[offset:offset + self.batch_size])
+                db.execute(statement.on_conflict_do_update(
+                    index_elements=[ProductViewCount.minute, ProductViewCount.product_id],
+                    set_={
+                        "views": ProductViewCount.views + statement.excluded.views,
+                        "category_id": statement.excluded.category_id,
+                    }
+                ))
+            db.commit()
+            self.flushed += len(rows)
+        except Exception:
+            db.rollback()
+            self.failed += len(rows)
+            logger.exception("Trending flush failed, %d rows lost", len(rows))
+        finally:
+            db.close()
+
+    def sync(self, first_minute: int, written: bool = False):
+        """Replace the buckets from `first_minute` on with every worker's views from the table.
+
+        With `written`, the views the current flush wrote are dropped from the
+        local counts in the same step, so they are never counted twice or not at all.
+        """
+        now = int(time.time() // 60)
+        first_minute = max(first_minute, now - self.window_minutes + 1)
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(
+                    ProductViewCount.minute, ProductViewCount.product_id,
+                    ProductViewCount.category_id, ProductViewCount.views
+                ).where(ProductViewCount.minute >= _minute_start(first_minute))
+            ).all()
+        except Exception:
+            logger.exception("Could not read trending counts")
+            rows = None
+        finally:
+            db.close()
+
+        with self._lock:
+            if rows is not None:
+                buckets: Dict[int, Dict[str, int]] = defaultdict(dict)
+                for minute_start, product_id, category_id, views in rows:
+                    buckets[_minute_of(minute_start)][product_id] = views
+                    self._categories[product_id] = category_id
+                for minute in range(first_minute, now + 1):
+                    self._set_bucket(minute, buckets.get(minute, {}))
+            if written:
+                # Unread, they reappear with the next sync; failed, they are gone
+                self._writing = {}
+
+    def prune(self):
+        cutoff = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        db = self.session_factory()
+        try:
+            db.execute(delete(ProductViewCount).where(ProductViewCount.minute < cutoff))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Pruning product view counts failed")
+        finally:
+            db.close()
+
+    def _run(self):
+        # The whole window, from every worker
+        self.sync(int(time.time() // 60) - self.window_minutes + 1)
+        last_flush = last_prune = time.monotonic()
+        while True:
+            self.refresh()
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval_seconds:
+                self.flush()
+                last_flush = now
+            if now - last_prune >= PRUNE_INTERVAL_SECONDS:
+                self.prune()
+                last_prune = now
+            if self._stop.wait(self.refresh_seconds):
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending) + len(self._writing)
+            products = len(self._totals)
+        return {
+            "running": self._running,
+            "products": products,
+            "recorded": self.recorded,
+            "pending_rows": pending,
+            "flushed_rows": self.flushed,
+            "failed_rows": self.failed,
+            "last_refresh_ms": round(self.last_refresh_ms, 3),
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+trending_counter = TrendingCounter(
+    session_factory=SessionLocal,
+    window_minutes=settings.trending_window_minutes,
+    top_k=settings.trending_top_k,
+    refresh_seconds=settings.trending_refresh_seconds,
+    flush_interval_seconds=settings.trending_flush_interval_seconds,
+    retention_hours=settings.trending_retention_hours
+)
+
+
+@instrumented
+class TrendingService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_trending(self, category_id: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """The most viewed products in the window as response-ready dicts, each with its `views`."""
+        ranked = trending_counter.top(category_id, limit)
+        products: Dict[str, dict] = {}
+        for product_id, _ in ranked:
+            product = catalog_snapshot.get_product(product_id)
+            if product is not None:
+                products[product_id] = product
+        missing = [product_id for product_id, _ in ranked if product_id not in products]
+        if missing:
+            products.update(
+                (row["id"], row) for row in ProductService(self.db).get_product_rows_by_ids(missing)
+            )
+        # Products deleted since they were viewed drop out
+        return [
+            {**products[product_id], "views": views}
+            for product_id, views in ranked if product_id in products
+        ]
@@ -0,0 +1,83 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from app.models.orm_models import Product, WishlistItem
+from app.schemas.product import ProductResponse
+from app.core.metrics import instrumented
+from fastapi import HTTPException, status
+from typing import Iterable, List, Set
+import uuid
+
+@instrumented
+class WishlistService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add_item(self, user_id: str, product_id: str) -> bool:
+        """Add a product to the user's wishlist. Returns False if it was already there."""
+        product_exists = self.db.query(Product.id).filter(Product.id == product_id).first()
+        if not product_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+
+        # Idempotent upsert: a second add hits the (user_id, product_id) constraint and is ignored
+        stmt = insert(WishlistItem).values(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            product_id=product_id
+        ).on_conflict_do_nothing(index_elements=["user_id", "product_id"])
+
+        result = self.db.execute(stmt)
+        self.db.commit()
+        return result.rowcount > 0
+
+    def remove_item(self, user_id: str, product_id: str) -> bool:
+        """Remove a product from the user's wishlist. Returns False if it was not there."""
+        stmt = delete(WishlistItem).where(
+            WishlistItem.user_id == user_id,
+            WishlistItem.product_id == product_id
+        )
+
+        result = self.db.execute(stmt)
+        self.db.commit()
+        return result.rowcount > 0
+
+    def get_wishlist(self, user_id: str, skip: int = 0, limit: int = 20) -> tuple[List[Product], int]:
+        """Get the products in the user's wishlist, most recently added first."""
+        query = self.db.query(Product).join(
+            WishlistItem, WishlistItem.product_id == Product.id
+        ).filter(WishlistItem.user_id == user_id)
+
+        total = query.count()
+        products = query.order_by(WishlistItem.created_at.desc()).offset(skip).limit(limit).all()
+
+        return products, total
+
+    def get_member_ids(self, user_id: str, product_ids: Iterable[str]) -> Set[str]:
+        """Return which of the given product IDs are in the user's wishlist, in a single query."""
+        product_ids = list(set(product_ids))
+        if not product_ids:
+            return set()
+
+        stmt = select(WishlistItem.product_id).where(
+            WishlistItem.user_id == user_id,
+            WishlistItem.product_id.in_(product_ids)
+        )
+        return set(self.db.execute(stmt).scalars())
+
+    def annotate_products(self, user_id: str, products: List[ProductResponse]) -> List[ProductResponse]:
+        """Set `in_wishlist` on a page of products for the given user."""
+        member_ids = self.get_member_ids(user_id, (product.id for product in products))
+        for product in products:
+            product.in_wishlist = product.id in member_ids
+        return products
+
+    def annotate_rows(self, user_id: str, products: List[dict]) -> List[dict]:
+        """Copies of a page of product dicts from the listing fast path with `in_wishlist` set.
+
+        The rows may be shared with other requests (see single_flight), so they are not modified.
+        """
+        member_ids = self.get_member_ids(user_id, (product["id"] for product in products))
+        return [{**product, "in_wishlist": product["id"] in member_ids} for product in products]
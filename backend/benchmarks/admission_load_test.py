@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Load test for admission control: tail latency at twice capacity.
+
+Seeds a synthetic catalog and one user into a scratch schema (dropped
+afterwards) and starts the API in a uvicorn subprocess against it. Traffic
+is a mix of browse requests (filtered product listings, `--browse-share`)
+and critical ones (`GET /auth/me`, standing in for auth/checkout).
+
+1. capacity: closed-loop clients with admission control off; the completed
+   requests per second are the worker's capacity
+2. overload: an open-loop arrival rate of `--overload` x capacity for
+   `--seconds`, once with admission control off and once with it on
+
+Latency is measured from each request's scheduled send time, so time spent
+waiting behind earlier requests counts (no coordinated omission). With
+admission off, every request queues and tail latency grows for as long as
+the overload lasts. With it on, the excess browse traffic gets fast 503s
+and the admitted requests, critical ones in particular, stay near their
+unloaded latency. Needs DATABASE_URL to point at a PostgreSQL database the
+user can create schemas in.
+
+Exits non-zero, so it can gate CI, unless with admission control on:
+
+- the p99 of served critical and browse requests stays within
+  `--p99-budget-ms`
+- at most `--max-critical-shed` of the critical requests get a 503
+- the served browse p99 is below its p99 with admission control off
+
+    python benchmarks/admission_load_test.py --products 50000 --seconds 15 --p99-budget-ms 500
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.models.orm_models import Base
+
+SCHEMA = "admission_load_test"
+CATEGORIES = 50
+PORT = 8765
+CLIENT_THREADS = 512
+TIMEOUT_SECONDS = 60
+ADMIN_TOKEN = "admission-load-test"
+
+def seed(engine, products: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"INSERT INTO categories (id, name, description, is_active, created_at, updated_at) "
+            f"SELECT 'c' || g, 'Category ' || g, 'Synthetic category ' || g, true, now(), now() "
+            f"FROM generate_series(1, {CATEGORIES}) g"
+        ))
+        conn.execute(text(
+            f"INSERT INTO products (id, name, description, price, category_id, brand, images, tags, stock, "
+            f"created_at, updated_at) "
+            f"SELECT md5(g::text), 'Product ' || g, repeat('Synthetic description ' || g || ' ', 10), "
+            f"(g % 50000) / 100.0, 'c' || (1 + g % {CATEGORIES}), 'Brand ' || (g % 500), "
+            f"ARRAY['https://img.example.com/' || g || '.jpg'], ARRAY['synthetic', 'tag' || (g % 30)], g % 40, "
+            f"now() - g * interval '1 minute', now() "
+            f"FROM generate_series(1, {products}) g"
+        ))
+        conn.execute(text("ANALYZE"))
+
+def start_server(database_url: str, admission: bool) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "ADMISSION_CONTROL_ENABLED": str(admission),
+        "ADMIN_TOKEN": ADMIN_TOKEN,
+        "CATALOG_SNAPSHOT_ENABLED": "False",
+        "INVALIDATION_BUS_ENABLED": "False",
+        "PRELOAD_RECOMMENDATIONS": "False",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        # Still draining an overload backlog; its connections must close before the schema is dropped
+        server.kill()
+        server.wait()
+
+def call(conn_local, method: str, path: str, headers=None, body=None):
+    conn = getattr(conn_local, "conn", None)
+    if conn is None:
+        conn = conn_local.conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=TIMEOUT_SECONDS)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except (OSError, http.client.HTTPException):
+        conn.close()
+        conn_local.conn = None
+        return 0
+
+def login() -> dict:
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=TIMEOUT_SECONDS)
+    credentials = json.dumps({"email": "load@example.com", "password": "load-test-password"})
+    headers = {"Content-Type": "application/json"}
+    conn.request("POST", "/auth/register", body=credentials, headers=headers)
+    conn.getresponse().read()
+    conn.request("POST", "/auth/login", body=credentials, headers=headers)
+    token = json.loads(conn.getresponse().read())["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+class Traffic:
+    def __init__(self, auth_headers: dict, browse_share: float, seed: int):
+        self.auth_headers = auth_headers
+        self.browse_share = browse_share
+        self.random = random.Random(seed)
+
+    def next(self):
+        if self.random.random() < self.browse_share:
+            min_price = self.random.randint(0, 400)
+            page = self.random.randint(1, 20)
+            return "browse", f"/products/?min_price={min_price}&page={page}&search={quote('Product 1')}", {}
+        return "critical", "/auth/me", self.auth_headers
+
+def closed_loop(traffic: Traffic, clients: int, seconds: float) -> float:
+    """Completed requests per second with `clients` back-to-back clients"""
+    requests = [traffic.next() for _ in range(200000)]
+    position, completed = [0], [0]
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+
+    def client():
+        local = threading.local()
+        while time.time() < deadline:
+            with lock:
+                kind, path, headers = requests[position[0] % len(requests)]
+                position[0] += 1
+            if call(local, "GET", path, headers) == 200:
+                with lock:
+                    completed[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return completed[0] / seconds
+
+def open_loop(traffic: Traffic, rate: float, seconds: float):
+    """(kind, status, latency ms) per request sent at a fixed arrival rate"""
+    results = []
+    lock = threading.Lock()
+    local = threading.local()
+    start = time.perf_counter() + 0.5
+
+    def send(scheduled: float, kind: str, path: str, headers: dict):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        status = call(local, "GET", path, headers)
+        with lock:
+            results.append((kind, status, (time.perf_counter() - scheduled) * 1000))
+
+    with ThreadPoolExecutor(max_workers=CLIENT_THREADS) as pool:
+        for index in range(int(rate * seconds)):
+            scheduled = start + index / rate
+            kind, path, headers = traffic.next()
+            # Submitting ahead of time keeps the dispatcher from lagging the schedule
+            while scheduled - time.perf_counter() > 1.0:
+                time.sleep(0.1)
+            pool.submit(send, scheduled, kind, path, headers)
+    return results
+
+def percentile(samples, fraction: float) -> float:
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] if samples else float("nan")
+
+def report(label: str, results, seconds: float) -> dict:
+    """Print per-kind throughput, latency percentiles and shed share; return {kind: (p99 ms, shed share)}"""
+    print(f"  {label}")
+    summary = {}
+    for kind in ("browse", "critical"):
+        served = sorted(latency for k, status, latency in results if k == kind and status == 200)
+        shed = [latency for k, status, latency in results if k == kind and status == 503]
+        failed = sum(1 for k, status, _ in results if k == kind and status not in (200, 503))
+        total = sum(1 for k, _, _ in results if k == kind)
+        print(f"    {kind:<9} {len(served) / seconds:7.1f} ok/s  "
+              f"p50 {percentile(served, 0.50):8.1f}  p95 {percentile(served, 0.95):8.1f}  "
+              f"p99 {percentile(served, 0.99):8.1f}  max {served[-1] if served else float('nan'):8.1f} ms  "
+              f"503 {len(shed) / max(total, 1):6.1%} (median {statistics.median(shed) if shed else 0:.1f} ms)  "
+              f"errors {failed}")
+        summary[kind] = (percentile(served, 0.99), len(shed) / max(total, 1))
+    return summary
+
+def report_shed_reasons():
+    """Print why the worker shed requests, per class, so the limit that did the shedding is visible"""
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=TIMEOUT_SECONDS)
+    conn.request("GET", "/analytics/admission", headers={"X-Admin-Token": ADMIN_TOKEN})
+    stats = json.loads(conn.getresponse().read())
+    for name, counts in stats["classes"].items():
+        if counts["shed"]:
+            reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(counts["shed"].items()))
+            print(f"    {name:<9} limit {counts['limit']}, admitted {counts['admitted']}, shed: {reasons}")
+
+def check(off: dict, on: dict, p99_budget_ms: float, max_critical_shed: float) -> list:
+    problems = []
+    for kind in ("critical", "browse"):
+        p99 = on[kind][0]
+        # NaN (nothing served) fails the comparison too
+        if not p99 <= p99_budget_ms:
+            problems.append(f"{kind} p99 {p99:.1f} ms with admission on exceeds the {p99_budget_ms:g} ms budget")
+    if on["critical"][1] > max_critical_shed:
+        problems.append(f"{on['critical'][1]:.1%} of critical requests shed (allowed {max_critical_shed:.1%})")
+    if not on["browse"][0] < off["browse"][0]:
+        problems.append(f"browse p99 did not improve: {off['browse'][0]:.1f} ms off, {on['browse'][0]:.1f} ms on")
+    return problems
+
+def run(products: int, seconds: float, overload: float, clients: int, browse_share: float,
+        p99_budget_ms: float, max_critical_shed: float) -> bool:
+    database_url = settings.database_url
+    separator = "&" if "?" in database_url else "?"
+    scratch_url = f"{database_url}{separator}options={quote(f'-csearch_path={SCHEMA}')}"
+    engine = create_engine(scratch_url)
+    print(f"📦 seeding {products:,} products")
+    seed(engine, products)
+
+    try:
+        server = start_server(scratch_url, admission=False)
+        try:
+            auth_headers = login()
+            closed_loop(Traffic(auth_headers, browse_share, 1), clients, 2)
+            capacity = closed_loop(Traffic(auth_headers, browse_share, 2), clients, seconds)
+            print(f"📏 capacity with {clients} closed-loop clients: {capacity:.1f} req/s")
+            rate = capacity * overload
+            print(f"🔥 open loop at {rate:.1f} req/s ({overload:g}x capacity) for {seconds:g}s")
+            off = report("admission control off", open_loop(Traffic(auth_headers, browse_share, 3), rate, seconds), seconds)
+        finally:
+            stop_server(server)
+
+        server = start_server(scratch_url, admission=True)
+        try:
+            on = report("admission control on", open_loop(Traffic(auth_headers, browse_share, 3), rate, seconds), seconds)
+            report_shed_reasons()
+        finally:
+            stop_server(server)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        engine.dispose()
+
+    problems = check(off, on, p99_budget_ms, max_critical_shed)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ tail latency bounded under overload")
+    return not problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--overload", type=float, default=2.0)
+    # More closed-loop clients than pooled connections measures pool timeouts, not capacity
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--browse-share", type=float, default=0.9)
+    parser.add_argument("--p99-budget-ms", type=float, default=float(os.getenv("ADMISSION_P99_BUDGET_MS", "500")))
+    parser.add_argument("--max-critical-shed", type=float, default=0.01, help="Largest share of critical requests shed")
+    args = parser.parse_args()
+    ok = run(
+        args.products, args.seconds, args.overload, args.clients, args.browse_share,
+        args.p99_budget_ms, args.max_critical_shed
+    )
+    sys.exit(0 if ok else 1)
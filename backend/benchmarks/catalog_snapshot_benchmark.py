@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory-mapped catalog snapshot.
+
+Seeds a synthetic catalog into a scratch schema (dropped afterwards), builds a
+snapshot from it and reports build time and file size, single-product lookup
+latency from the snapshot against the projected database query, and how much
+private memory each worker process adds when it maps the snapshot and serves
+lookups from it (RssAnon stays flat; the mapped pages are shared page cache).
+Needs DATABASE_URL to point at a PostgreSQL database the user can create
+schemas in.
+
+    python benchmarks/catalog_snapshot_benchmark.py --products 200000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.models.orm_models import Base, Category, Product
+from app.services.catalog_snapshot import CatalogSnapshot, build_snapshot
+from app.services.listing_serializer import product_row_builder, select_products
+
+SCHEMA = "catalog_snapshot_benchmark"
+CATEGORIES = 200
+
+def seed(engine, products: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"INSERT INTO categories (id, name, description, is_active, created_at, updated_at) "
+            f"SELECT 'c' || g, 'Category ' || g, 'Synthetic category ' || g, true, now(), now() "
+            f"FROM generate_series(1, {CATEGORIES}) g"
+        ))
+        conn.execute(text(
+            f"INSERT INTO products (id, name, description, price, category_id, brand, images, tags, stock, "
+            f"created_at, updated_at) "
+            f"SELECT md5(g::text), 'Product ' || g, repeat('Synthetic description ' || g || ' ', 10), "
+            f"(g % 50000) / 100.0, 'c' || (1 + g % {CATEGORIES}), 'Brand ' || (g % 500), "
+            f"ARRAY['https://img.example.com/' || g || '.jpg'], ARRAY['synthetic', 'tag' || (g % 30)], g % 40, "
+            f"now() - g * interval '1 minute', now() "
+            f"FROM generate_series(1, {products}) g"
+        ))
+        conn.execute(text("ANALYZE"))
+
+def timed(fn, repeat: int):
+    """Median and p95 latency in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+def memory_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+def worker(path: str, ids, queue):
+    before = memory_kb("RssAnon")
+    snapshot = CatalogSnapshot(path)
+    for product_id in ids:
+        snapshot.get_product(product_id)
+    queue.put((memory_kb("RssAnon") - before, memory_kb("RssFile")))
+
+def run(products: int, workers: int, repeat: int):
+    engine = create_engine(settings.database_url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    session_factory = sessionmaker(bind=engine)
+    path = os.path.join(tempfile.mkdtemp(), "catalog.snap")
+    print(f"📦 seeding {products:,} products")
+    seed(engine, products)
+
+    try:
+        with session_factory() as db:
+            start = time.perf_counter()
+            meta = build_snapshot(db, path)
+            print(f"🏗️  built generation {meta['generation']} in {time.perf_counter() - start:.2f}s, "
+                  f"{os.path.getsize(path) / 1e6:.1f} MB")
+
+            ids = db.execute(text("SELECT id FROM products")).scalars().all()
+            sample = random.Random(7).sample(ids, min(len(ids), 5000))
+            snapshot = CatalogSnapshot(path)
+            build_row = product_row_builder()
+            lookups = iter(sample * (repeat // len(sample) + 1))
+
+            from_snapshot = timed(lambda: snapshot.get_product(next(lookups)), repeat)
+            from_db = timed(
+                lambda: build_row(db.execute(select_products().where(Product.id == next(lookups))).first()),
+                min(repeat, 2000)
+            )
+            print(f"{'get_product':<22} {'p50 us':>10} {'p95 us':>10}")
+            print(f"{'  snapshot':<22} {from_snapshot[0]:10.1f} {from_snapshot[1]:10.1f}")
+            print(f"{'  database':<22} {from_db[0]:10.1f} {from_db[1]:10.1f}")
+
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(path, sample, queue)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        for index, (private_kb, file_kb) in enumerate(results):
+            print(f"  worker {index}: +{private_kb / 1024:.1f} MB private memory, {file_kb / 1024:.1f} MB file-backed RSS")
+    finally:
+        os.remove(path)
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.products, args.workers, args.repeat)
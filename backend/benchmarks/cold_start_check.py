@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Cold-start regression check.
+
+Starts the app (import plus lifespan) in fresh interpreters and fails with a
+non-zero exit status when the median time exceeds the budget, so it can gate
+CI. It also fails if any module listed in LAZY_MODULES is imported before the
+first request, since those are meant to load on first use.
+
+    python benchmarks/cold_start_check.py --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules that must stay off the startup path
+LAZY_MODULES = ["scipy", "jose", "app.services.hybrid_search", "app.services.content_similarity"]
+
+SNIPPET = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+from app.main import app
+async def run():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+ready = asyncio.run(run())
+print(json.dumps({"startup_ms": (ready - start) * 1000, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+def measure() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", SNIPPET % LAZY_MODULES],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def check(runs: int, budget_ms: float) -> bool:
+    samples, eager = [], set()
+    for _ in range(runs):
+        result = measure()
+        samples.append(result["startup_ms"])
+        eager.update(result["loaded"])
+
+    median = statistics.median(samples)
+    print(f"⏱️  startup over {runs} runs: median {median:.0f} ms, "
+          f"min {min(samples):.0f} ms, max {max(samples):.0f} ms (budget {budget_ms:.0f} ms)")
+
+    ok = True
+    if median > budget_ms:
+        print(f"❌ median startup {median:.0f} ms exceeds the {budget_ms:.0f} ms budget")
+        ok = False
+    if eager:
+        print(f"❌ imported at startup but expected to be lazy: {', '.join(sorted(eager))}")
+        ok = False
+    if ok:
+        print("✅ cold start within budget")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", "1500")))
+    args = parser.parse_args()
+    sys.exit(0 if check(args.runs, args.budget_ms) else 1)
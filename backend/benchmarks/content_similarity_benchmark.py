@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the TF-IDF content similarity engine on synthetic catalogs.
+
+Reports index build time and query latency (single and batched similar-product
+and free-text queries, plus the cost of the first query after an incremental
+update) for each catalog size. No database is needed.
+
+    python benchmarks/content_similarity_benchmark.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.content_similarity import ContentSimilarityEngine
+
+VOCABULARY_SIZE = 30000
+WORDS_PER_PRODUCT = 40
+BATCH_SIZE = 32
+
+def synthetic_documents(n: int, seed: int = 7):
+    """Zipf-distributed word ids, roughly like real product text"""
+    rng = np.random.default_rng(seed)
+    words = np.minimum(rng.zipf(1.3, size=(n, WORDS_PER_PRODUCT)), VOCABULARY_SIZE)
+    return [(f"p{i}", " ".join(f"w{w}" for w in row)) for i, row in enumerate(words.tolist())]
+
+def timed(fn, repeat: int):
+    """Median and p95 latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+def run(n: int, repeat: int):
+    documents = synthetic_documents(n)
+    engine = ContentSimilarityEngine()
+
+    start = time.perf_counter()
+    engine.build(documents)
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    ids = [documents[i][0] for i in rng.integers(0, n, size=BATCH_SIZE)]
+    queries = [" ".join(documents[i][1].split()[:4]) for i in rng.integers(0, n, size=BATCH_SIZE)]
+
+    results = {
+        "similar x1": timed(lambda: engine.similar(ids[:1], 10), repeat),
+        f"similar x{BATCH_SIZE}": timed(lambda: engine.similar(ids, 10), repeat),
+        "search x1": timed(lambda: engine.search(queries[:1], 10), repeat),
+        f"search x{BATCH_SIZE}": timed(lambda: engine.search(queries, 10), repeat),
+    }
+
+    def update_then_query():
+        engine.upsert(ids[0], queries[0])
+        engine.similar(ids[:1], 10)
+
+    results["upsert + first query"] = timed(update_then_query, max(repeat // 5, 3))
+
+    print(f"\n{n:,} products: build {build_s:.2f}s, {engine._counts.nnz:,} non-zeros")
+    for name, (median, p95) in results.items():
+        print(f"  {name:<22} median {median:8.2f} ms   p95 {p95:8.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
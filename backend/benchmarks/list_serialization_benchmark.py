@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark product list serialization: ORM + Pydantic against the projected
+rows + orjson fast path.
+
+Seeds a synthetic catalog into a scratch schema (dropped afterwards) and, for
+each page size, times building the JSON body of a product listing each way:
+
+- pydantic: `ProductService.get_products` (ORM objects, categories loaded
+  lazily), validated into `ProductListResponse` and JSON-encoded the way
+  FastAPI does it (json mode dump, then `json.dumps`)
+- fast: `ProductService.get_product_rows` (one projected query with the
+  category joined in) encoded by `listing_serializer.render_page`
+- compact: the fast path narrowed to `--fields`, as a grid view requests it
+
+"end to end" includes the queries; "serialize" times only the Python work
+after the rows are fetched. Each iteration uses a fresh session so the
+identity map does not hide ORM hydration. Needs DATABASE_URL to point at a
+PostgreSQL database the user can create schemas in.
+
+    python benchmarks/list_serialization_benchmark.py --page-sizes 10 20 50 100 --fields name,price,brand,thumbnail
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.models.orm_models import Base, Category, Product
+from app.schemas.product import ProductListResponse
+from app.services.listing_serializer import parse_fields, product_row_builder, render_page, select_products
+from app.services.product_service import ProductService
+
+SCHEMA = "list_serialization_benchmark"
+CATEGORIES = 50
+
+def seed(engine, products: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+
+    now = datetime.utcnow()
+    category_ids = [str(uuid.uuid4()) for _ in range(CATEGORIES)]
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [
+            {"id": category_id, "name": f"Category {i}", "description": f"Synthetic category {i}",
+             "is_active": True, "created_at": now, "updated_at": now}
+            for i, category_id in enumerate(category_ids)
+        ])
+        conn.execute(insert(Product), [
+            {"id": str(uuid.uuid4()), "name": f"Product {i}", "description": f"Synthetic product number {i} " * 20,
+             "price": Decimal(i % 50000) / 100, "category_id": category_ids[i % CATEGORIES],
+             "brand": f"Brand {i % 200}", "images": [f"https://img.example.com/{i}.jpg"],
+             "tags": ["synthetic", f"tag{i % 30}"], "stock": i % 40,
+             "created_at": now - timedelta(minutes=i), "updated_at": now}
+            for i in range(products)
+        ])
+
+def pydantic_body(products, total: int, page_size: int) -> bytes:
+    response = ProductListResponse(
+        products=products, total=total, page=1, page_size=page_size,
+        total_pages=(total + page_size - 1) // page_size
+    )
+    return json.dumps(
+        response.model_dump(mode="json"), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+def timed(fn, repeat: int):
+    """Median and p95 latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+def run(products: int, page_sizes, fields: str, repeat: int):
+    engine = create_engine(settings.database_url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    session_factory = sessionmaker(bind=engine)
+    compact_fields = parse_fields(fields)
+    print(f"📦 seeding {products:,} products")
+    seed(engine, products)
+
+    print(f"{'page size':>9} {'path':<9} {'end to end p50/p95 ms':>24} {'serialize p50/p95 ms':>24} {'bytes':>9}")
+    try:
+        for page_size in page_sizes:
+            def pydantic_end_to_end():
+                with session_factory() as db:
+                    page, total = ProductService(db).get_products(limit=page_size)
+                    return pydantic_body(page, total, page_size)
+
+            def fast_end_to_end():
+                with session_factory() as db:
+                    page, total = ProductService(db).get_product_rows(limit=page_size)
+                    return render_page("products", page, total, 1, page_size).body
+
+            def compact_end_to_end():
+                with session_factory() as db:
+                    page, total = ProductService(db).get_product_rows(limit=page_size, fields=compact_fields)
+                    return render_page("products", page, total, 1, page_size).body
+
+            # Rows fetched once (categories included) so only the Python work is timed
+            with session_factory() as db:
+                orm_page, total = ProductService(db).get_products(limit=page_size)
+                for product in orm_page:
+                    product.category
+                raw_rows = db.execute(select_products().limit(page_size)).all()
+                compact_rows = db.execute(select_products(compact_fields).limit(page_size)).all()
+                pydantic_serialize = lambda: pydantic_body(orm_page, total, page_size)
+
+                def serializer(rows, fields=None):
+                    build = product_row_builder(fields)
+                    return lambda: render_page("products", list(map(build, rows)), total, 1, page_size).body
+
+                for name, end_to_end, serialize in (
+                    ("pydantic", pydantic_end_to_end, pydantic_serialize),
+                    ("fast", fast_end_to_end, serializer(raw_rows)),
+                    ("compact", compact_end_to_end, serializer(compact_rows, compact_fields)),
+                ):
+                    full = timed(end_to_end, repeat)
+                    cpu = timed(serialize, repeat)
+                    print(f"{page_size:>9} {name:<9} {full[0]:11.2f} / {full[1]:8.2f} "
+                          f"{cpu[0]:11.3f} / {cpu[1]:8.3f} {len(serialize()):>9,}")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--fields", default="name,price,brand,thumbnail")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.products, args.page_sizes, args.fields, args.repeat)
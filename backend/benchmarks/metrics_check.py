@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Metrics overhead and scrape check.
+
+1. overhead: drives `MetricsMiddleware` around a no-op ASGI app in-process
+   and reports what it adds per request (labels lookup, histogram
+   observation, counters and the in-flight gauge), failing when the median
+   over `--rounds` exceeds `--budget-us`
+2. scrape: starts the API in a uvicorn subprocess (with the features that
+   need a database switched off), sends a few requests, then scrapes
+   `/metrics` the way a Prometheus server would and parses the exposition
+   with a small stand-in collector. Fails if the format does not parse, a
+   histogram is inconsistent (buckets not cumulative, `+Inf` bucket not
+   equal to `_count`), the requests are not counted, or a counter went
+   backwards between two scrapes
+
+Exits non-zero on failure so it can gate CI.
+
+    python benchmarks/metrics_check.py --requests 200000 --budget-us 5
+"""
+
+import argparse
+import asyncio
+import http.client
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.metrics import MetricsMiddleware
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8766
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+async def _noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def _send(message):
+    pass
+
+async def _drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/products/"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), None, _send)
+    return time.perf_counter() - start
+
+def measure_overhead(requests: int, rounds: int) -> float:
+    """Median microseconds the middleware adds per request."""
+    wrapped = MetricsMiddleware(_noop_app, classify=lambda method, path: "browse")
+    samples = []
+    for _ in range(rounds):
+        bare = asyncio.run(_drive(_noop_app, requests))
+        measured = asyncio.run(_drive(wrapped, requests))
+        samples.append((measured - bare) / requests * 1e6)
+    return statistics.median(samples)
+
+def parse(text: str) -> dict:
+    """Stand-in collector: {(name, frozenset(labels)): value}, and the declared types."""
+    samples, types = {}, {}
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line:
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ", 3)
+            types[name] = kind
+            continue
+        if line.startswith("#"):
+            continue
+        match = SAMPLE_RE.match(line)
+        if match is None:
+            raise ValueError(f"line {number} does not parse: {line!r}")
+        name, labels, value = match.groups()
+        labels = frozenset(LABEL_RE.findall(labels or ""))
+        samples[(name, labels)] = float(value)
+    return {"samples": samples, "types": types}
+
+def check_histograms(scrape: dict) -> list:
+    problems = []
+    for name, kind in scrape["types"].items():
+        if kind != "histogram":
+            continue
+        series = {}
+        for (sample, labels), value in scrape["samples"].items():
+            if sample == f"{name}_bucket":
+                le = dict(labels)["le"]
+                key = labels - {("le", le)}
+                series.setdefault(key, []).append((float(le), value))
+        for key, buckets in series.items():
+            counts = [count for _, count in sorted(buckets)]
+            if counts != sorted(counts):
+                problems.append(f"{name}{dict(key)} buckets are not cumulative")
+            if counts[-1] != scrape["samples"].get((f"{name}_count", key)):
+                problems.append(f"{name}{dict(key)} +Inf bucket differs from _count")
+    return problems
+
+def request(method: str, path: str) -> tuple:
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=10)
+    conn.request(method, path)
+    response = conn.getresponse()
+    return response.status, response.getheader("content-type"), response.read().decode()
+
+def start_server() -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CATALOG_SNAPSHOT_ENABLED": "False",
+        "INVALIDATION_BUS_ENABLED": "False",
+        "PRELOAD_RECOMMENDATIONS": "False",
+        "TELEMETRY_WRITE_BEHIND": "False",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            request("GET", "/")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+def check_scrape(requests: int) -> list:
+    server = start_server()
+    try:
+        for _ in range(requests):
+            request("GET", "/")
+        request("GET", "/no-such-route")
+        status, content_type, body = request("GET", "/metrics")
+        first = parse(body)
+        request("GET", "/")
+        second = parse(request("GET", "/metrics")[2])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    problems = []
+    if status != 200 or not content_type.startswith("text/plain"):
+        problems.append(f"/metrics answered {status} with {content_type}")
+    problems += check_histograms(first) + check_histograms(second)
+    root = ("http_requests_total", frozenset({("method", "GET"), ("route", "/"), ("status", "200")}))
+    if first["samples"].get(root, 0) < requests + 1:
+        problems.append(f"expected at least {requests + 1} GET / requests, got {first['samples'].get(root, 0)}")
+    for (name, labels), value in first["samples"].items():
+        if first["types"].get(name) == "counter" and second["samples"].get((name, labels), value) < value:
+            problems.append(f"counter {name}{dict(labels)} went backwards")
+    print(f"🔎 scraped {len(first['samples'])} samples in {len(first['types'])} metric families")
+    return problems
+
+def check(requests: int, rounds: int, budget_us: float, scrape: bool) -> bool:
+    overhead = measure_overhead(requests, rounds)
+    print(f"⏱️  middleware overhead: median {overhead:.2f} µs per request over {rounds} rounds "
+          f"(budget {budget_us:.2f} µs)")
+    ok = overhead <= budget_us
+    if not ok:
+        print(f"❌ overhead {overhead:.2f} µs exceeds the {budget_us:.2f} µs budget")
+    if scrape:
+        problems = check_scrape(20)
+        for problem in problems:
+            print(f"❌ {problem}")
+        ok = ok and not problems
+    if ok:
+        print("✅ metrics within budget and scrapeable")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=float(os.getenv("METRICS_BUDGET_US", "5")))
+    parser.add_argument("--no-scrape", action="store_true", help="Only measure the overhead")
+    args = parser.parse_args()
+    sys.exit(0 if check(args.requests, args.rounds, args.budget_us, not args.no_scrape) else 1)
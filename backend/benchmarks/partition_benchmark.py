@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark monthly range partitioning against a plain table for a
+session_transactions-shaped ledger.
+
+Loads the same synthetic rows into both layouts (in a scratch schema that is
+dropped afterwards), then times the recent-range queries the ledger serves
+and the cost of removing the oldest month. Needs DATABASE_URL to point at a
+PostgreSQL database the user can create schemas in.
+
+    python benchmarks/partition_benchmark.py --rows 5000000 --months 24
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.partition_service import add_months
+
+SCHEMA = "partition_benchmark"
+SESSIONS = 50000
+
+def setup(conn, rows: int, months: int, first_month: date):
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    columns = "id text NOT NULL, session_id text NOT NULL, type text, amount numeric(10, 2), created_at timestamp NOT NULL"
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.plain ({columns}, PRIMARY KEY (id, created_at))"))
+    conn.execute(text(
+        f"CREATE TABLE {SCHEMA}.partitioned ({columns}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    ))
+    for i in range(months):
+        start, end = add_months(first_month, i), add_months(first_month, i + 1)
+        conn.execute(text(
+            f"CREATE TABLE {SCHEMA}.partitioned_p{start:%Y%m} PARTITION OF {SCHEMA}.partitioned "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+
+    span = (add_months(first_month, months) - first_month).total_seconds()
+    # Rows arrive in time order, as an append-only ledger would
+    load = (
+        f"SELECT md5(g::text), 's' || (g % {SESSIONS}), "
+        f"(ARRAY['PURCHASE','REFUND','CHECKOUT','ADD_TO_CART'])[1 + g % 4], (g % 500)::numeric, "
+        f"timestamp '{first_month}' + (g::float8 / {rows} * {span}) * interval '1 second' "
+        f"FROM generate_series(0, {rows - 1}) g"
+    )
+    for table in ("plain", "partitioned"):
+        start = time.perf_counter()
+        conn.execute(text(f"INSERT INTO {SCHEMA}.{table} {load}"))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (session_id, created_at)"))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (created_at)"))
+        conn.execute(text(f"ANALYZE {SCHEMA}.{table}"))
+        print(f"  loaded {table:<12} {time.perf_counter() - start:7.1f}s")
+
+def timed(conn, sql: str, params: dict, repeat: int):
+    """Median and p95 latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+def scanned_partitions(conn, sql: str, params: dict) -> int:
+    plan = "\n".join(conn.execute(text(f"EXPLAIN {sql}"), params).scalars())
+    return len(set(re.findall(r"partitioned_p\d{6}", plan)))
+
+def run(rows: int, months: int, repeat: int):
+    engine = create_engine(settings.database_url)
+    today = datetime.utcnow().date()
+    first_month = add_months(date(today.year, today.month, 1), -(months - 1))
+    end = datetime.combine(add_months(first_month, months), datetime.min.time())
+
+    print(f"📦 {rows:,} rows over {months} months")
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        setup(conn, rows, months, first_month)
+
+        recent = {"start": end - timedelta(days=7), "end": end, "session": "s42"}
+        queries = {
+            "session, last 7 days": (
+                "SELECT * FROM {table} WHERE session_id = :session "
+                "AND created_at >= :start AND created_at < :end ORDER BY created_at DESC LIMIT 50"
+            ),
+            "totals by type, last 7 days": (
+                "SELECT type, count(*), sum(amount) FROM {table} "
+                "WHERE created_at >= :start AND created_at < :end GROUP BY type"
+            ),
+            "session, all time count": "SELECT count(*) FROM {table} WHERE session_id = :session",
+        }
+
+        print(f"{'query':<30} {'plain p50/p95 ms':>20} {'partitioned p50/p95 ms':>26} {'partitions':>11}")
+        for name, sql in queries.items():
+            plain = timed(conn, sql.format(table=f"{SCHEMA}.plain"), recent, repeat)
+            partitioned_sql = sql.format(table=f"{SCHEMA}.partitioned")
+            partitioned = timed(conn, partitioned_sql, recent, repeat)
+            scanned = scanned_partitions(conn, partitioned_sql, recent)
+            print(f"{name:<30} {plain[0]:9.2f} / {plain[1]:8.2f} {partitioned[0]:13.2f} / {partitioned[1]:8.2f}"
+                  f" {scanned:>6}/{months}")
+
+        cutoff = datetime.combine(add_months(first_month, 1), datetime.min.time())
+        start = time.perf_counter()
+        conn.execute(text(f"DELETE FROM {SCHEMA}.plain WHERE created_at < :cutoff"), {"cutoff": cutoff})
+        delete_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        conn.execute(text(f"ALTER TABLE {SCHEMA}.partitioned DETACH PARTITION {SCHEMA}.partitioned_p{first_month:%Y%m}"))
+        conn.execute(text(f"DROP TABLE {SCHEMA}.partitioned_p{first_month:%Y%m}"))
+        detach_ms = (time.perf_counter() - start) * 1000
+        print(f"{'remove oldest month':<30} {delete_ms:20.1f} {detach_ms:26.1f}")
+
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.rows, args.months, args.repeat)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark request coalescing for identical concurrent catalog reads.
+
+Seeds a synthetic catalog into a scratch schema (dropped afterwards), then
+simulates a flash sale: for each concurrency level, that many threads (one
+session each, as in the API's threadpool) request the same first page of a
+category and the same product at once, several rounds in a row. Reports
+per-request latency, wall time and the number of SQL statements executed,
+with single-flight off and on. Needs DATABASE_URL to point at a PostgreSQL
+database the user can create schemas in.
+
+    python benchmarks/single_flight_benchmark.py --products 200000 --concurrency 8 32 128
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.models.orm_models import Base, Category, Product
+from app.services.product_service import ProductService
+from app.services.single_flight import single_flight
+
+SCHEMA = "single_flight_benchmark"
+CATEGORIES = 20
+POOL_SIZE = 32
+# md5('1'), the ID of the first seeded product
+PRODUCT_ID = "c4ca4238a0b923820dcc509a6f75849b"
+
+def seed(engine, products: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"INSERT INTO categories (id, name, description, is_active, created_at, updated_at) "
+            f"SELECT 'c' || g, 'Category ' || g, 'Synthetic category ' || g, true, now(), now() "
+            f"FROM generate_series(1, {CATEGORIES}) g"
+        ))
+        conn.execute(text(
+            f"INSERT INTO products (id, name, description, price, category_id, brand, images, tags, stock, "
+            f"created_at, updated_at) "
+            f"SELECT md5(g::text), 'Product ' || g, repeat('Synthetic description ' || g || ' ', 10), "
+            f"(g % 50000) / 100.0, 'c' || (1 + g % {CATEGORIES}), 'Brand ' || (g % 500), "
+            f"ARRAY['https://img.example.com/' || g || '.jpg'], ARRAY['synthetic', 'tag' || (g % 30)], g % 40, "
+            f"now() - g * interval '1 minute', now() "
+            f"FROM generate_series(1, {products}) g"
+        ))
+        conn.execute(text("ANALYZE"))
+
+def flash_sale(session_factory, concurrency: int, rounds: int):
+    """Per-request latencies in milliseconds and total wall time in seconds"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(barrier):
+        barrier.wait()
+        start = time.perf_counter()
+        with session_factory() as db:
+            service = ProductService(db)
+            service.get_product_rows(skip=0, limit=20, category_id="c1")
+            service.get_product_data(PRODUCT_ID)
+        with lock:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    wall = 0.0
+    for _ in range(rounds):
+        barrier = threading.Barrier(concurrency)
+        threads = [threading.Thread(target=client, args=(barrier,)) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall += time.perf_counter() - start
+    latencies.sort()
+    return statistics.median(latencies), latencies[max(int(len(latencies) * 0.95) - 1, 0)], wall
+
+def run(products: int, concurrency_levels, rounds: int):
+    engine = create_engine(
+        settings.database_url, pool_size=POOL_SIZE, max_overflow=0,
+        connect_args={"options": f"-csearch_path={SCHEMA}"}
+    )
+    session_factory = sessionmaker(bind=engine)
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    print(f"📦 seeding {products:,} products")
+    seed(engine, products)
+    print(f"{'threads':>7} {'single-flight':<13} {'p50 ms':>8} {'p95 ms':>8} {'wall s':>7} {'statements':>10} {'coalesced':>9}")
+    try:
+        for concurrency in concurrency_levels:
+            for enabled in (False, True):
+                settings.single_flight_enabled = enabled
+                single_flight.reset()
+                statements[0] = 0
+                p50, p95, wall = flash_sale(session_factory, concurrency, rounds)
+                print(f"{concurrency:>7} {'on' if enabled else 'off':<13} {p50:8.1f} {p95:8.1f} {wall:7.2f} "
+                      f"{statements[0]:>10,} {single_flight.coalesced:>9,}")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.products, args.concurrency, args.rounds)
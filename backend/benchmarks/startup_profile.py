@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Startup profile: where cold-start time goes.
+
+Imports the app in a fresh interpreter with `-X importtime` and reports the
+slowest modules by cumulative import time, split into the app's own modules
+and third-party packages, then runs the application lifespan and reports its
+initialization phases. No database connection is made.
+
+    python benchmarks/startup_profile.py --top 15
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+LIFESPAN_SNIPPET = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+async def run():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready
+ready = asyncio.run(run())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "phases": app.state.startup_timings,
+}))
+"""
+
+def import_profile():
+    """(module, depth, self_us, cumulative_us) for every module imported by app.main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return rows
+
+def lifespan_profile():
+    result = subprocess.run(
+        [sys.executable, "-c", LIFESPAN_SNIPPET],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def report(top: int):
+    rows = import_profile()
+    total = next(cumulative for module, _, _, cumulative in rows if module == "app.main")
+
+    print(f"📦 import app.main: {total / 1000:.1f} ms\n")
+    app_modules = sorted(
+        (row for row in rows if row[0].startswith("app.") and row[0] != "app.main"),
+        key=lambda row: -row[2]
+    )
+    print(f"{'app module (self time)':<48} {'self ms':>9} {'cum ms':>9}")
+    for module, _, self_us, cumulative_us in app_modules[:top]:
+        print(f"{module:<48} {self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}")
+
+    # Top-level third-party packages, each counted once at its first (outermost) import
+    packages = {}
+    for module, _, _, cumulative_us in rows:
+        package = module.split(".")[0]
+        if package != "app" and "." not in module:
+            packages[package] = max(packages.get(package, 0), cumulative_us)
+    print(f"\n{'third-party package':<48} {'cum ms':>19}")
+    for package, cumulative_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<48} {cumulative_us / 1000:19.1f}")
+
+    lifespan = lifespan_profile()
+    print(f"\n🚀 lifespan startup: {lifespan['lifespan_ms']:.1f} ms")
+    for phase, ms in lifespan["phases"].items():
+        print(f"  {phase:<46} {ms:9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    report(args.top)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Offline job that builds the collaborative-filtering recommendation artifact.
+Run this periodically (e.g. nightly); running API workers pick up the new
+artifact on their next restart.
+"""
+
+import argparse
+import time
+from app.core.db import SessionLocal
+from app.core.config import settings
+from app.services.recommendation_service import build_recommendation_artifact
+
+def build_recommendations(path: str, top_k: int):
+    """Build item-item similarities and per-user recommendations"""
+    db = SessionLocal()
+    
+    try:
+        print("🧮 Building recommendation artifact...")
+        start = time.perf_counter()
+        meta = build_recommendation_artifact(db, path, top_k)
+        elapsed = time.perf_counter() - start
+        
+        print(f"✅ {meta['users']} users, {meta['items']} items, {meta['interactions']} interactions")
+        print(f"🎉 Wrote top-{top_k} artifact to {path} in {elapsed:.2f}s")
+        
+    except Exception as e:
+        print(f"❌ Error building recommendations: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default=settings.recommendation_artifact_dir)
+    parser.add_argument("--top-k", type=int, default=settings.recommendation_top_k)
+    args = parser.parse_args()
+    build_recommendations(args.path, args.top_k)
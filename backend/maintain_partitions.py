@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance job for chat_messages and session_transactions.
+Run it daily (e.g. from cron): it creates the monthly partitions for the
+coming months and detaches partitions older than the retention window.
+"""
+
+import argparse
+from app.core.db import SessionLocal
+from app.services.partition_service import PartitionService
+
+def maintain_partitions(drop: bool):
+    """Create upcoming partitions and detach expired ones"""
+    db = SessionLocal()
+    
+    try:
+        print("🗂️  Maintaining partitions...")
+        report = PartitionService(db).run_maintenance(drop=drop)
+        
+        for table, changes in report.items():
+            print(f"✅ {table}: created {changes['created'] or 'none'}, "
+                  f"{'dropped' if drop else 'detached'} {changes['detached'] or 'none'}")
+        print("🎉 Partition maintenance complete")
+        
+    except Exception as e:
+        print(f"❌ Error maintaining partitions: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drop", action="store_true", help="Drop expired partitions instead of only detaching them")
+    args = parser.parse_args()
+    maintain_partitions(args.drop)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Batch job that folds new chat messages and feedback into the daily analytics
+rollups. Run it periodically (e.g. every few minutes from cron); each run
+only reads rows created since the previous one.
+"""
+
+import argparse
+import time
+from app.core.db import SessionLocal
+from app.services.chat_analytics_service import ChatAnalyticsService
+
+def rollup_chat_analytics():
+    """Update the chat analytics rollups up to the configured lag"""
+    db = SessionLocal()
+    
+    try:
+        print("📊 Rolling up chat analytics...")
+        start = time.perf_counter()
+        result = ChatAnalyticsService(db).run_rollup()
+        elapsed = time.perf_counter() - start
+        
+        print(f"✅ Processed {result['since']} -> {result['until']}")
+        print(f"🎉 Updated {result['rollups']} rollup rows in {elapsed:.2f}s")
+        
+    except Exception as e:
+        print(f"❌ Error rolling up chat analytics: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+    rollup_chat_analytics()